@@ -26,8 +26,7 @@ async def get_client_details(client_id: str):
     if not sim_data.get("graph"):
         raise HTTPException(status_code=409, detail="No active simulation found. Please run a simulation first.")
         
-    clients_list = sim_data.get("clients", [])
-    found_client = next((client for client in clients_list if client.id == client_id), None)
+    found_client = sim_data["clients"].get(client_id)
     if not found_client:
         raise HTTPException(status_code=404, detail=f"Client with ID '{client_id}' not found.")
     return found_client
\ No newline at end of file
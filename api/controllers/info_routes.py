@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict
+from fastapi import APIRouter, HTTPException, Response
+from typing import List, Dict, Optional
 from pydantic import BaseModel
 from api.shared_simulation_state import state_instance 
+from model.centrality import betweenness_centrality
+from model.csr import ROLE_CODES
 
 router = APIRouter()
 
@@ -15,62 +17,126 @@ class SimulationSummaryResponse(BaseModel):
     total_nodes: int = 0
     total_edges: int = 0
     node_type_distribution: Dict[str, int] = {}
+    degree_histogram: Dict[int, int] = {}
+    average_degree: float = 0.0
+    total_edge_weight: float = 0.0
+
+class NodeCentrality(BaseModel):
+    node_id: str
+    type: str
+    score: float
+
+class CentralityReport(BaseModel):
+    samples: int
+    exact: bool
+    epsilon: float
+    delta: float
+    seconds: float
+    nodes: List[NodeCentrality]
+
+class WindowCount(BaseModel):
+    key: str
+    count: int
+
+class RecentActivityReport(BaseModel):
+    window_seconds: float
+    routes: List[WindowCount]
+    nodes: List[WindowCount]
+    clients: List[WindowCount]
+
+class RechargeLoad(BaseModel):
+    node_id: str
+    visits: int
+    series: List[int]
+
+class RechargeLoadReport(BaseModel):
+    window_seconds: float
+    bucket_seconds: float
+    stations: List[RechargeLoad]
+
+DEFAULT_CENTRALITY_SAMPLES = 256
+_centrality_cache = {}  # Solo el último cálculo: (hash del contenido del grafo, parámetros) -> resultado
 
 def get_node_type(graph, node_id_str):
     if not graph: return "unknown"
     node_obj = graph.get_vertex_by_element(node_id_str)
     return node_obj.type() if node_obj else "unknown"
 
-@router.get("/info/reports/visits/clients", response_model=List[VisitedNodeRank])
-async def get_client_visit_ranking():
-    """Recupera un ranking de los nodos de clientes más visitados."""
-    sim_data = state_instance.get_data() # <-- USO CORREGIDO
+def _role_visit_ranking(role, offset, limit, response):
+    """Página del ranking de visitas de un rol, mantenido por el tracker; el total va en X-Total-Count."""
+    sim_data = state_instance.get_data()
     tracker = sim_data.get("route_tracker")
     graph = sim_data.get("graph")
 
     if not tracker or not graph:
         raise HTTPException(status_code=404, detail="Datos de simulación o rastreador de rutas no disponible.")
+    if offset < 0 or (limit is not None and limit < 0):
+        raise HTTPException(status_code=400, detail="offset and limit must be non-negative.")
 
-    node_visits = tracker.get_node_visit_stats(limit=None)
-    client_visits = [
-        VisitedNodeRank(node_id=node_id, type=get_node_type(graph, node_id), visits=count)
-        for node_id, count in node_visits if get_node_type(graph, node_id) == 'client'
-    ]
-    return sorted(client_visits, key=lambda x: x.visits, reverse=True)
+    if tracker.node_roles is None:
+        tracker.set_node_roles({v.element(): v.type() for v in graph.vertices()})
+    page, total = tracker.get_role_visit_ranking(role, offset, limit)
+    response.headers["X-Total-Count"] = str(total)
+    return [VisitedNodeRank(node_id=str(node_id), type=role, visits=count) for node_id, count in page]
 
-@router.get("/info/reports/visits/recharges", response_model=List[VisitedNodeRank])
-async def get_recharge_visit_ranking():
-    """Recupera un ranking de las estaciones de recarga más visitadas."""
-    sim_data = state_instance.get_data() 
-    tracker = sim_data.get("route_tracker")
-    graph = sim_data.get("graph")
-
-    if not tracker or not graph:
-        raise HTTPException(status_code=404, detail="Datos de simulación o rastreador de rutas no disponible.")
+@router.get("/info/reports/visits/clients", response_model=List[VisitedNodeRank])
+async def get_client_visit_ranking(response: Response, offset: int = 0, limit: Optional[int] = None):
+    """Recupera un ranking paginado de los nodos de clientes más visitados."""
+    return _role_visit_ranking('client', offset, limit, response)
 
-    node_visits = tracker.get_node_visit_stats(limit=None)
-    recharge_visits = [
-        VisitedNodeRank(node_id=node_id, type=get_node_type(graph, node_id), visits=count)
-        for node_id, count in node_visits if get_node_type(graph, node_id) == 'recharge'
-    ]
-    return sorted(recharge_visits, key=lambda x: x.visits, reverse=True)
+@router.get("/info/reports/visits/recharges", response_model=List[VisitedNodeRank])
+async def get_recharge_visit_ranking(response: Response, offset: int = 0, limit: Optional[int] = None):
+    """Recupera un ranking paginado de las estaciones de recarga más visitadas."""
+    return _role_visit_ranking('recharge', offset, limit, response)
 
 @router.get("/info/reports/visits/storages", response_model=List[VisitedNodeRank])
-async def get_storage_visit_ranking():
-    """Recupera un ranking de los nodos de almacenamiento más visitados."""
-    sim_data = state_instance.get_data() 
-    tracker = sim_data.get("route_tracker")
-    graph = sim_data.get("graph")
-
-    if not tracker or not graph:
-        raise HTTPException(status_code=404, detail="Datos de simulación o rastreador de rutas no disponible.")
-
-    node_visits = tracker.get_node_visit_stats(limit=None)
-    storage_visits = [
-        VisitedNodeRank(node_id=node_id, type=get_node_type(graph, node_id), visits=count)
-        for node_id, count in node_visits if get_node_type(graph, node_id) == 'warehouse'
-    ]
-    return sorted(storage_visits, key=lambda x: x.visits, reverse=True)
+async def get_storage_visit_ranking(response: Response, offset: int = 0, limit: Optional[int] = None):
+    """Recupera un ranking paginado de los nodos de almacenamiento más visitados."""
+    return _role_visit_ranking('warehouse', offset, limit, response)
+
+def _recent_tracker(window):
+    tracker = state_instance.get_data().get("route_tracker")
+    if not tracker:
+        raise HTTPException(status_code=404, detail="Route tracker not available. Please run a simulation first.")
+    if window is not None and window <= 0:
+        raise HTTPException(status_code=400, detail="window must be a positive number of seconds.")
+    span = tracker.recent_nodes.span()
+    return tracker, span if window is None else min(window, span)
+
+@router.get("/info/reports/recent", response_model=RecentActivityReport)
+async def get_recent_activity(window: Optional[float] = 300, limit: int = 10):
+    """Rutas, nodos y clientes más activos en los últimos window segundos (ventana deslizante)."""
+    tracker, window = _recent_tracker(window)
+    limit = max(0, limit)
+    as_counts = lambda ranking: [WindowCount(key=str(key), count=count) for key, count in ranking]
+    return RecentActivityReport(
+        window_seconds=window,
+        routes=as_counts(tracker.get_recent_routes(window, limit)),
+        nodes=as_counts(tracker.get_recent_node_visits(window, limit)),
+        clients=as_counts(tracker.get_recent_clients(window, limit)),
+    )
+
+@router.get("/info/reports/recent/recharges", response_model=RechargeLoadReport)
+async def get_recent_recharge_load(window: Optional[float] = 300, limit: Optional[int] = None):
+    """
+    Carga reciente de las estaciones de recarga: visitas en la ventana y serie
+    por intervalo (del más antiguo al más reciente), para alertas de congestión.
+    """
+    tracker, window = _recent_tracker(window)
+    graph = state_instance.get_data().get("graph")
+    if not graph:
+        raise HTTPException(status_code=409, detail="No active simulation found. Please run a simulation first.")
+    stations = {v.element() for v in graph.vertices() if v.type() == 'recharge'}
+    ranking = tracker.get_recent_node_visits(window, None if limit is None else max(0, limit), nodes=stations)
+    return RechargeLoadReport(
+        window_seconds=window,
+        bucket_seconds=tracker.recent_nodes.bucket_seconds,
+        stations=[
+            RechargeLoad(node_id=str(node_id), visits=visits,
+                         series=[count for _, count in tracker.recent_nodes.series(node_id, window)])
+            for node_id, visits in ranking
+        ],
+    )
 
 @router.get("/info/reports/summary", response_model=SimulationSummaryResponse)
 async def get_general_summary():
@@ -82,13 +148,58 @@ async def get_general_summary():
     if not graph:
         raise HTTPException(status_code=409, detail="No active simulation found. Please run a simulation first.")
 
-    type_dist = {v.type(): 0 for v in graph.vertices()}
-    for v_obj in graph.vertices():
-        type_dist[v_obj.type()] += 1
-        
+    metrics = graph.metrics()
+    type_dist = {(node_type or "unknown"): count for node_type, count in metrics["type_distribution"].items()}
+
     return SimulationSummaryResponse(
         summary_text=summary_text,
-        total_nodes=len(list(graph.vertices())),
-        total_edges=len(list(graph.edges())),
-        node_type_distribution=type_dist
-    )
\ No newline at end of file
+        total_nodes=metrics["vertices"],
+        total_edges=metrics["edges"],
+        node_type_distribution=type_dist,
+        degree_histogram=metrics["degree_histogram"],
+        average_degree=metrics["average_degree"],
+        total_edge_weight=metrics["total_weight"]
+    )
+
+@router.get("/info/reports/centrality", response_model=CentralityReport)
+def get_critical_nodes(role: Optional[str] = "recharge", limit: int = 10, samples: Optional[int] = None,
+                       epsilon: Optional[float] = None, delta: float = 0.1, seed: Optional[int] = 0):
+    """
+    Ranking de nodos críticos por centralidad de intermediación (Brandes con
+    fuentes muestreadas). role='all' incluye todos los tipos de nodo.
+    """
+    graph = state_instance.get_data().get("graph")
+    if not graph:
+        raise HTTPException(status_code=409, detail="No active simulation found. Please run a simulation first.")
+    if role == "all":
+        role = None
+    if role is not None and role not in ROLE_CODES:
+        raise HTTPException(status_code=400, detail=f"Unknown role '{role}'. Options: {list(ROLE_CODES)} or 'all'.")
+    if samples is None and epsilon is None:
+        samples = DEFAULT_CENTRALITY_SAMPLES
+
+    # El id y los contadores de versión se repiten entre grafos distintos (un id liberado se reutiliza);
+    # el hash del contenido no, y se calcula una sola vez por versión del grafo.
+    key = (graph.content_hash(), samples, epsilon, delta, seed)
+    result = _centrality_cache.get(key)
+    if result is None:
+        try:
+            result = betweenness_centrality(graph, samples=samples, epsilon=epsilon, delta=delta, seed=seed)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        _centrality_cache.clear()
+        _centrality_cache[key] = result
+
+    ranking = [
+        (node_id, score) for node_id, score in result["scores"].items()
+        if role is None or get_node_type(graph, node_id) == role
+    ]
+    ranking.sort(key=lambda item: item[1], reverse=True)
+    nodes = [
+        NodeCentrality(node_id=node_id, type=get_node_type(graph, node_id) or "unknown", score=score)
+        for node_id, score in ranking[:max(0, limit)]
+    ]
+    return CentralityReport(
+        samples=result["samples"], exact=result["exact"], epsilon=result["epsilon"],
+        delta=result["delta"], seconds=result["seconds"], nodes=nodes
+    )
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, HTTPException
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel
 from datetime import datetime
 from domain.orden import Order as DomainOrder
@@ -31,6 +31,15 @@ class OrderResponse(BaseModel):
     class Config:
         from_attributes = True 
 
+class PriorityQueueStats(BaseModel):
+    queued: int
+    dispatched: int
+    failed: int
+    cancelled: int
+    mean_wait_seconds: float
+    p95_wait_seconds: float
+    max_wait_seconds: float
+
 def map_domain_order_to_response(order_do: DomainOrder) -> OrderResponse:
     """Mapea un objeto de dominio Order a un modelo de respuesta Pydantic."""
     return OrderResponse.model_validate(order_do)
@@ -52,8 +61,7 @@ async def get_order_details(order_id: str):
     if not sim_data.get("graph"):
         raise HTTPException(status_code=409, detail="No active simulation found. Please run a simulation first.")
 
-    orders_domain_list = sim_data.get("orders", [])
-    found_order = next((order for order in orders_domain_list if order.order_id == order_id), None)
+    found_order = sim_data["orders"].get(order_id)
     if not found_order:
         raise HTTPException(status_code=404, detail=f"Order with ID '{order_id}' not found.")
     return map_domain_order_to_response(found_order)
@@ -65,16 +73,22 @@ async def cancel_order(order_id: str):
     if not sim_data.get("graph"):
         raise HTTPException(status_code=409, detail="No active simulation found. Please run a simulation first.")
         
-    orders_domain_list = sim_data.get("orders", [])
-    found_order = next((order for order in orders_domain_list if order.order_id == order_id), None)
+    found_order = sim_data["orders"].get(order_id)
 
     if not found_order:
         raise HTTPException(status_code=404, detail=f"Order with ID '{order_id}' not found.")
 
-    if found_order.status not in ["pending", "processing", "Normal"]:
-        raise HTTPException(status_code=400, detail=f"Order '{order_id}' cannot be cancelled. Status: {found_order.status}")
+    with state_instance.mutation():  # Excluye los snapshots de la bitácora mientras se modifica
+        if found_order.status not in ["pending", "processing", "Normal"]:
+            raise HTTPException(status_code=400, detail=f"Order '{order_id}' cannot be cancelled. Status: {found_order.status}")
 
-    found_order.status = "cancelled"
+        scheduler = state_instance.get_scheduler()
+        if scheduler is not None:
+            scheduler.cancel(order_id)  # O(log n): deja de estar entre las pendientes por despachar
+        found_order.status = "cancelled"
+        journal = state_instance.get_journal()
+        if journal is not None:
+            journal.order_status_changed(found_order)
 
     return map_domain_order_to_response(found_order)
 
@@ -85,20 +99,51 @@ async def complete_order(order_id: str):
     if not sim_data.get("graph"):
         raise HTTPException(status_code=409, detail="No active simulation found. Please run a simulation first.")
         
-    orders_domain_list = sim_data.get("orders", [])
-    found_order = next((order for order in orders_domain_list if order.order_id == order_id), None)
+    found_order = sim_data["orders"].get(order_id)
 
     if not found_order:
         raise HTTPException(status_code=404, detail=f"Order with ID '{order_id}' not found.")
 
-    if found_order.status == "Entregado":
-        raise HTTPException(status_code=400, detail=f"Order '{order_id}' is already delivered.")
-    
-    if found_order.status == "cancelled":
-        raise HTTPException(status_code=400, detail=f"Cannot complete an order that was cancelled.")
+    with state_instance.mutation():
+        if found_order.status == "Entregado":
+            raise HTTPException(status_code=400, detail=f"Order '{order_id}' is already delivered.")
+
+        if found_order.status == "cancelled":
+            raise HTTPException(status_code=400, detail=f"Cannot complete an order that was cancelled.")
 
-    found_order.status = "Entregado"
-    if not found_order.delivery_date:
-        found_order.delivery_date = datetime.now()
+        scheduler = state_instance.get_scheduler()
+        if scheduler is not None and order_id in scheduler:
+            scheduler.finish(found_order, datetime.now().timestamp())
+        found_order.status = "Entregado"
+        if not found_order.delivery_date:
+            found_order.delivery_date = datetime.now()
+        journal = state_instance.get_journal()
+        if journal is not None:
+            journal.order_status_changed(found_order)
+
+    return map_domain_order_to_response(found_order)
 
-    return map_domain_order_to_response(found_order)
\ No newline at end of file
+@router.post("/orders/{order_id}/priority", response_model=OrderResponse)
+async def reprioritize_order(order_id: str, priority: str):
+    """Cambia la prioridad de una orden que todavía espera ser procesada."""
+    scheduler = state_instance.get_scheduler()
+    if scheduler is None:
+        raise HTTPException(status_code=409, detail="No order scheduler available. Please run a simulation first.")
+    if priority not in scheduler.allowances:
+        raise HTTPException(status_code=400, detail=f"Unknown priority '{priority}'. Options: {sorted(scheduler.allowances)}")
+    with state_instance.mutation():
+        order = scheduler.reprioritize(order_id, priority)
+        if order is None:
+            raise HTTPException(status_code=404, detail=f"Order with ID '{order_id}' is not waiting to be processed.")
+        journal = state_instance.get_journal()
+        if journal is not None:
+            journal.order_status_changed(order)
+    return map_domain_order_to_response(order)
+
+@router.get("/orders/stats/priorities", response_model=Dict[str, PriorityQueueStats])
+async def get_priority_stats():
+    """Por prioridad: órdenes en cola, procesadas, fallidas, canceladas y espera en cola (segundos)."""
+    scheduler = state_instance.get_scheduler()
+    if scheduler is None:
+        raise HTTPException(status_code=409, detail="No order scheduler available. Please run a simulation first.")
+    return {priority: PriorityQueueStats(**stats) for priority, stats in scheduler.stats().items()}
@@ -1,8 +1,9 @@
 import threading
+from sim.stores import ClientStore, OrderStore
 
 class SimulationState:
     _instance = None
-    _lock = threading.Lock()
+    _lock = threading.RLock()
 
     def __new__(cls):
         # El patrón Singleton asegura que solo se cree una instancia de esta clase.
@@ -11,16 +12,62 @@ class SimulationState:
                 cls._instance = super(SimulationState, cls).__new__(cls)
                 # Inicializar los atributos del estado aquí
                 cls._instance._graph = None
-                cls._instance._clients = []
-                cls._instance._orders = []
+                cls._instance._clients = ClientStore()
+                cls._instance._orders = OrderStore()
                 cls._instance._tracker = None
                 cls._instance._avl_tree = None
                 cls._instance._summary = "No simulation has been run yet."
+                cls._instance._journal = None
+                cls._instance._scheduler = None
         return cls._instance
 
+    def attach_journal(self, journal):
+        """
+        Asocia una SimulationJournal: cada simulación nueva se guarda como
+        snapshot y las mutaciones siguientes del tracker quedan en la bitácora.
+        """
+        with self._lock:
+            self._journal = journal
+            journal.state_provider = self._snapshot_data
+            journal.state_lock = self._lock
+            if self._tracker is not None:
+                self._tracker.journal = journal
+
+    def mutation(self):
+        """
+        Lock del estado compartido: toda mutación de las órdenes, el scheduler
+        o el tracker publicados se hace con él tomado. La bitácora lo toma
+        mientras serializa un snapshot periódico, así que nunca guarda un
+        estado a medio modificar, sea cual sea el hilo que lo dispare.
+        """
+        return self._lock
+
+    def get_journal(self):
+        return self._journal
+
+    def attach_scheduler(self, scheduler):
+        """Asocia el OrderScheduler con las órdenes pendientes de la simulación actual."""
+        with self._lock:
+            self._scheduler = scheduler
+
+    def get_scheduler(self):
+        return self._scheduler
+
+    def _snapshot_data(self):
+        with self._lock:
+            return {"graph": self._graph, "clients": self._clients, "orders": self._orders,
+                    "route_tracker": self._tracker, "avl_tree": self._avl_tree, "summary": self._summary}
+
     def update_data(self, graph, clients, orders, tracker, avl, summary):
         """Actualiza el estado de la simulación de forma segura."""
         with self._lock:
+            if self._journal is not None and graph is not None:
+                if graph is not self._graph or tracker is not self._tracker:
+                    # Simulación nueva: el snapshot la vuelve recuperable sin reproducir su historia
+                    self._journal.snapshot(graph, clients, orders, tracker, avl, summary)
+                tracker.journal = self._journal
+            if orders is not self._orders:
+                self._scheduler = None  # Otra lista de órdenes: el scheduler anterior ya no le corresponde
             self._graph = graph
             self._clients = clients
             self._orders = orders
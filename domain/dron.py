@@ -0,0 +1,32 @@
+class Drone:
+    def __init__(self, drone_id, position, battery):
+        self.drone_id = drone_id
+        self.position = position  # Node ID where the drone is (or will land)
+        self.battery = battery  # Energy left when it landed at position
+        self.at_charger = True  # Whether position can charge it (warehouse or recharge station)
+        self.available_at = 0.0  # Simulated second it landed / becomes free
+        self.busy = False
+        self.deliveries = 0
+
+    def battery_at(self, now, max_battery, full_charge_seconds):
+        """Energy at instant now: while idle at a charger the drone charges at a constant rate."""
+        if self.busy or not self.at_charger or now <= self.available_at:
+            return self.battery
+        if not full_charge_seconds:
+            return max_battery
+        charged = max_battery * (now - self.available_at) / full_charge_seconds
+        return min(max_battery, self.battery + charged)
+
+    def land(self, position, battery, now, at_charger=False):
+        self.position = position
+        self.battery = battery
+        self.at_charger = at_charger
+        self.available_at = now
+        self.busy = False
+
+    def __str__(self):
+        return (f"Drone(id={self.drone_id}, position={self.position}, battery={self.battery:.1f}, "
+                f"busy={self.busy}, deliveries={self.deliveries})")
+
+    def __repr__(self):
+        return self.__str__()
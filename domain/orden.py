@@ -9,11 +9,35 @@ class Order:
         self.destination = destination
         self.weight = weight  
         self.priority = priority 
-        self.status = "pending"  
+        self._store = None  # OrderStore indexing this order, notified on status changes
+        self._status = "pending"
         self.creation_date = datetime.now()
         self.delivery_date = None
         self.total_cost = 0
 
+    @property
+    def status(self):
+        return self._status
+
+    @status.setter
+    def status(self, value):
+        old = self._status
+        self._status = value
+        if self._store is not None and value != old:
+            self._store._status_changed(self, old)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_store'] = None  # The store re-indexes its orders when it is unpickled
+        return state
+
+    def __setstate__(self, state):
+        # Orders pickled before the status property kept it as a plain attribute
+        if 'status' in state:
+            state['_status'] = state.pop('status')
+        state.setdefault('_store', None)
+        self.__dict__.update(state)
+
     def mark_delivered(self, cost):
         self.status = "Entregado" 
         self.delivery_date = datetime.now()
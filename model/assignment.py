@@ -0,0 +1,235 @@
+import numpy as np
+
+
+def class_assignment(base, column_class, column_offset, infeasible=np.inf):
+    """Minimum-cost assignment when cost[i, j] = base[i, column_class[j]] + column_offset[j].
+
+    Columns of the same class are interchangeable up to their offset, so an
+    optimal solution always takes the cheapest columns of each class. The
+    problem is solved as a min-cost flow rows -> classes -> sink, where the
+    t-th unit sent through a class costs its t-th smallest offset, with
+    successive shortest paths: a multi-source Dijkstra over the classes
+    (Johnson potentials) finds one path and updates the potentials, then a
+    DFS takes every other path made only of zero reduced-cost edges before
+    the next Dijkstra. Identical rows (e.g. drones waiting at the same
+    warehouse) are merged into one node with several units of supply, so the
+    work depends on row groups and classes, not on the number of columns. As
+    many rows as possible are matched.
+
+    base has shape (rows, classes); entries equal to infeasible (or above
+    it) forbid that row from every column of the class. Returns
+    (row_indices, column_indices) sorted by row.
+    """
+    base = np.asarray(base, dtype=np.float64)
+    column_class = np.asarray(column_class, dtype=np.int64)
+    column_offset = np.asarray(column_offset, dtype=np.float64)
+    if base.ndim != 2:
+        raise ValueError("base must be a 2-D matrix.")
+    if column_class.shape != column_offset.shape or column_class.ndim != 1:
+        raise ValueError("column_class and column_offset must be 1-D arrays of the same length.")
+    num_rows, num_classes = base.shape
+    empty = np.empty(0, dtype=np.int64)
+    if num_rows == 0 or column_class.size == 0:
+        return empty, empty.copy()
+    if column_class.min() < 0 or column_class.max() >= num_classes:
+        raise ValueError("column_class must index the columns of base.")
+
+    blocked = ~np.isfinite(base) | (base >= infeasible)
+    first_row = {}
+    group_of_row = np.array([first_row.setdefault(row.tobytes(), len(first_row)) for row in base], dtype=np.int64)
+    num_groups = len(first_row)
+    group_rows = np.unique(group_of_row, return_index=True)[1]
+    group_blocked = blocked[group_rows]
+    if group_blocked.all():
+        return empty, empty.copy()
+    # Desplazar costos por una constante no cambia el óptimo (cada unidad usa una arista y un hueco)
+    cost = np.where(group_blocked, 0.0, base[group_rows])
+    cost -= cost[~group_blocked].min()
+    remaining = np.bincount(group_of_row, minlength=num_groups)
+
+    # Huecos de cada clase: sus columnas ordenadas por offset; used[k] es cuántos ya se tomaron
+    slots = np.lexsort((column_offset, column_class))
+    class_size = np.bincount(column_class, minlength=num_classes)
+    class_start = np.concatenate(([0], np.cumsum(class_size)[:-1]))
+    offset = column_offset - column_offset.min()
+    used = np.zeros(num_classes, dtype=np.int64)
+    slot_cost = np.where(class_size > 0, offset[slots[np.minimum(class_start, len(slots) - 1)]], np.inf)
+
+    flow = np.zeros((num_groups, num_classes), dtype=np.int64)
+    holders_of = [set() for _ in range(num_classes)]  # grupos con flujo hacia cada clase
+    p_group = np.zeros(num_groups)
+    p_class = np.zeros(num_classes)
+    p_sink = 0.0
+    eps = 1e-9 * max(1.0, cost.max(), offset.max())
+    # Costos reducidos grupo -> clase con los potenciales vigentes (inf si está prohibido). Son >= 0 y valen 0
+    # en los pares con flujo; el redondeo puede dejarlos apenas fuera y por eso se recortan al usarlos.
+    reduced = np.where(group_blocked, np.inf, cost)
+
+    def augment(path):
+        """path = [g0, k1, g1, k2, ..., kn]: g0 cede una unidad, cada gi pasa de ki a ki+1 y kn toma un hueco."""
+        groups_, classes_ = path[0::2], path[1::2]
+        for g, k in zip(groups_, classes_):
+            flow[g, k] += 1
+            holders_of[k].add(g)
+        for g, k in zip(groups_[1:], classes_[:-1]):
+            flow[g, k] -= 1
+            if not flow[g, k]:
+                holders_of[k].discard(g)
+        remaining[groups_[0]] -= 1
+        k = classes_[-1]
+        used[k] += 1
+        slot_cost[k] = offset[slots[class_start[k] + used[k]]] if used[k] < class_size[k] else np.inf
+
+    def shortest_path():
+        """
+        Dijkstra multi-fuente (todos los grupos con unidades pendientes a
+        distancia 0) solo sobre clases: un grupo alcanzado por su arista de
+        retorno se relaja en el mismo paso. Actualiza los potenciales y
+        retorna el camino hasta el hueco más barato, o None.
+        """
+        nonlocal p_sink
+        sources = np.nonzero(remaining > 0)[0]
+        group_dist = np.where(remaining > 0, 0.0, np.inf)
+        group_via = np.full(num_groups, -1, dtype=np.int64)  # clase por la que se llegó (arista de retorno)
+        nearest = reduced[sources].argmin(axis=0)
+        class_dist = np.maximum(reduced[sources[nearest], np.arange(num_classes)], 0.0)
+        class_via = sources[nearest]  # grupo desde el que se llegó a cada clase
+        frontier = class_dist.copy()  # Distancias de las clases abiertas; inf en las cerradas
+        bound = class_dist.copy()  # Ídem con -inf en las cerradas, para no reabrirlas
+        sink_dist, sink_via = np.inf, -1
+        while True:
+            k = int(frontier.argmin())
+            d = frontier[k]
+            if d >= sink_dist:
+                break
+            frontier[k] = np.inf
+            bound[k] = -np.inf
+            if used[k] < class_size[k]:
+                to_sink = d + max(slot_cost[k] + p_class[k] - p_sink, 0.0)
+                if to_sink < sink_dist:
+                    sink_dist, sink_via = to_sink, k
+            if not holders_of[k]:
+                continue
+            holders = np.fromiter(holders_of[k], dtype=np.int64, count=len(holders_of[k]))
+            back = d + np.maximum(-reduced[holders, k], 0.0)
+            better = back < group_dist[holders]
+            if not better.all():
+                holders, back = holders[better], back[better]
+                if not holders.size:
+                    continue
+            group_dist[holders] = back
+            group_via[holders] = k
+            onward = back[:, None] + np.maximum(reduced[holders], 0.0)
+            if len(holders) == 1:
+                via = holders[0]
+                onward = onward[0]
+            else:
+                nearest = onward.argmin(axis=0)
+                via = holders[nearest]
+                onward = onward[nearest, np.arange(num_classes)]
+            better = onward < bound
+            class_dist[better] = frontier[better] = bound[better] = onward[better]
+            class_via[better] = via if np.isscalar(via) else via[better]
+        if sink_via < 0:
+            return None
+        p_group[:] += np.minimum(group_dist, sink_dist)
+        p_class[:] += np.minimum(class_dist, sink_dist)
+        p_sink += sink_dist
+        k, path = sink_via, [sink_via]
+        while True:
+            g = int(class_via[k])
+            path.append(g)
+            if group_via[g] < 0:
+                return path[::-1]
+            k = int(group_via[g])
+            path.append(k)
+
+    def admissible_path(source, forward, forward_start, dead_group, dead_class):
+        """
+        DFS desde source hasta un hueco libre por aristas de costo reducido
+        ~0. Las clases admisibles de g son forward[forward_start[g]:forward_start[g + 1]];
+        los nodos sin salida se agregan a dead_group y dead_class.
+        """
+        def classes_from(g):
+            return iter(forward[forward_start[g]:forward_start[g + 1]])
+
+        def groups_from(k):
+            return iter([g for g in holders_of[k] if -reduced[g, k] <= eps])
+
+        path = [source]
+        frames = [classes_from(source)]
+        on_path = {('g', source)}
+        while frames:
+            nxt = next(frames[-1], None)
+            if nxt is None:
+                frames.pop()
+                node = path.pop()
+                if len(path) % 2:  # Era una clase (las clases ocupan posiciones impares)
+                    dead_class.add(node)
+                    on_path.discard(('k', node))
+                else:
+                    dead_group.add(node)
+                    on_path.discard(('g', node))
+                continue
+            if len(path) % 2:  # Tope del camino: un grupo; nxt es una clase
+                if nxt in dead_class or ('k', nxt) in on_path:
+                    continue
+                path.append(nxt)
+                if used[nxt] < class_size[nxt] and slot_cost[nxt] + p_class[nxt] - p_sink <= eps:
+                    return path
+                on_path.add(('k', nxt))
+                frames.append(groups_from(nxt))
+            else:
+                if nxt in dead_group or ('g', nxt) in on_path:
+                    continue
+                path.append(nxt)
+                on_path.add(('g', nxt))
+                frames.append(classes_from(nxt))
+        return None
+
+    while remaining.any():
+        path = shortest_path()
+        if path is None:
+            break  # Ninguna fila pendiente alcanza un hueco libre: el emparejamiento ya es máximo
+        augment(path)
+        reduced = np.where(group_blocked, np.inf, cost + p_group[:, None] - p_class)
+        # Con los potenciales nuevos todo camino de aristas con costo reducido ~0 también es mínimo:
+        # se agotan con DFS antes de volver a correr Dijkstra
+        admissible = reduced <= eps
+        # Nodos desde los que se llega a un hueco libre por aristas admisibles (búsqueda hacia atrás desde
+        # las clases con hueco); el resto queda descartado de entrada para las DFS de esta fase
+        reach_class = (used < class_size) & (slot_cost + p_class - p_sink <= eps)
+        returns = (flow > 0) & (reduced >= -eps)
+        while True:
+            reach_group = admissible[:, reach_class].any(axis=1)
+            grown = reach_class | returns[reach_group].any(axis=0)
+            if (grown == reach_class).all():
+                break
+            reach_class = grown
+        unreachable_group = set(np.nonzero(~reach_group)[0].tolist())
+        unreachable_class = set(np.nonzero(~reach_class)[0].tolist())
+        edge_group, edge_class = np.nonzero(admissible)
+        forward = edge_class.tolist()
+        forward_start = np.searchsorted(edge_group, np.arange(num_groups + 1)).tolist()
+        dead_group, dead_class = set(unreachable_group), set(unreachable_class)
+        for source in np.nonzero((remaining > 0) & reach_group)[0].tolist():
+            while remaining[source] > 0:
+                path = admissible_path(source, forward, forward_start, dead_group, dead_class)
+                if path is None:
+                    break
+                augment(path)
+                # El aumento agrega aristas de retorno admisibles: los callejones marcados pueden dejar de serlo
+                dead_group, dead_class = set(unreachable_group), set(unreachable_class)
+
+    members = [list(np.nonzero(group_of_row == g)[0]) for g in range(num_groups)]
+    rows, cols = [], []
+    for k in np.nonzero(used)[0]:
+        taken = iter(slots[class_start[k]:class_start[k] + used[k]])
+        for g in np.nonzero(flow[:, k])[0]:
+            for _ in range(flow[g, k]):
+                rows.append(members[g].pop())
+                cols.append(next(taken))
+    rows = np.array(rows, dtype=np.int64)
+    cols = np.array(cols, dtype=np.int64)
+    order = np.argsort(rows)
+    return rows[order], cols[order]
@@ -0,0 +1,126 @@
+from collections import deque
+
+
+class BottleneckIndex:
+    """Minimax (bottleneck) path queries over the minimum spanning forest.
+
+    For any pair u, v the path between them in the MST minimizes the largest
+    edge weight among all u-v paths of the graph, so the maximum edge on that
+    tree path is the smallest battery that allows hopping from u to v.
+    Queries are answered in O(log n) with binary lifting over max-edge tables.
+    """
+
+    def __init__(self, graph):
+        self._vertices = list(graph.vertices())
+        self._index = {v: i for i, v in enumerate(self._vertices)}
+        self._index_by_element = {v.element(): i for i, v in enumerate(self._vertices)}
+        n = len(self._vertices)
+
+        adjacency = [[] for _ in range(n)]
+        for edge in graph.kruskal_mst():
+            u_vertex, v_vertex = edge.endpoints()
+            u, v = self._index[u_vertex], self._index[v_vertex]
+            adjacency[u].append((v, edge.element(), edge))
+            adjacency[v].append((u, edge.element(), edge))
+
+        self._log = max(1, n.bit_length())
+        self._depth = [0] * n
+        self._component = [-1] * n
+        parent = list(range(n))
+        parent_weight = [0] * n
+        parent_edge = [None] * n
+
+        # BFS desde una raíz por componente (el MST puede ser un bosque).
+        component_id = 0
+        for root in range(n):
+            if self._component[root] != -1:
+                continue
+            self._component[root] = component_id
+            q = deque([root])
+            while q:
+                u = q.popleft()
+                for v, weight, edge in adjacency[u]:
+                    if self._component[v] == -1:
+                        self._component[v] = component_id
+                        self._depth[v] = self._depth[u] + 1
+                        parent[v] = u
+                        parent_weight[v] = weight
+                        parent_edge[v] = edge
+                        q.append(v)
+            component_id += 1
+
+        # up[k][v] es el ancestro 2^k de v; mx[k][v] la arista máxima en ese salto.
+        self._up = [parent]
+        self._mx = [parent_weight]
+        self._mx_edge = [parent_edge]
+        for k in range(1, self._log):
+            prev_up, prev_mx, prev_edge = self._up[k - 1], self._mx[k - 1], self._mx_edge[k - 1]
+            up_k = [prev_up[prev_up[v]] for v in range(n)]
+            mx_k = [0] * n
+            edge_k = [None] * n
+            for v in range(n):
+                mid = prev_up[v]
+                if prev_mx[v] >= prev_mx[mid]:
+                    mx_k[v], edge_k[v] = prev_mx[v], prev_edge[v]
+                else:
+                    mx_k[v], edge_k[v] = prev_mx[mid], prev_edge[mid]
+            self._up.append(up_k)
+            self._mx.append(mx_k)
+            self._mx_edge.append(edge_k)
+
+    def _resolve(self, element):
+        idx = self._index_by_element.get(element)
+        if idx is None:
+            raise ValueError(f"Vertex {element} not found in graph.")
+        return idx
+
+    def _query(self, u, v):
+        """Return (max_weight, max_edge) on the tree path between indices u and v."""
+        if u == v:
+            return 0, None
+        if self._component[u] != self._component[v]:
+            return float('infinity'), None
+
+        best = [0, None]
+
+        def take(k, w):
+            if best[1] is None or self._mx[k][w] > best[0]:
+                best[0], best[1] = self._mx[k][w], self._mx_edge[k][w]
+
+        if self._depth[u] < self._depth[v]:
+            u, v = v, u
+        diff = self._depth[u] - self._depth[v]
+        k = 0
+        while diff:
+            if diff & 1:
+                take(k, u)
+                u = self._up[k][u]
+            diff >>= 1
+            k += 1
+        if u == v:
+            return best[0], best[1]
+
+        for k in range(self._log - 1, -1, -1):
+            if self._up[k][u] != self._up[k][v]:
+                take(k, u)
+                take(k, v)
+                u, v = self._up[k][u], self._up[k][v]
+        take(0, u)
+        take(0, v)
+        return best[0], best[1]
+
+    def bottleneck(self, u_element, v_element):
+        """Return the bottleneck weight between two vertex elements (inf if disconnected)."""
+        return self._query(self._resolve(u_element), self._resolve(v_element))[0]
+
+    def bottleneck_edge(self, u_element, v_element):
+        """Return the MST edge that attains the bottleneck weight, or None."""
+        return self._query(self._resolve(u_element), self._resolve(v_element))[1]
+
+    def min_battery(self, u_element, v_element):
+        """Minimum battery for which some u-v path has every hop within range."""
+        return self.bottleneck(u_element, v_element)
+
+    def is_reachable(self, u_element, v_element, max_battery):
+        """True if a path exists whose longest hop does not exceed max_battery."""
+        return self.bottleneck(u_element, v_element) <= max_battery
@@ -0,0 +1,152 @@
+import heapq
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .csr import ROLE_CODES
+from .shared_graph import SharedGraph, attach_csr
+
+
+def _sample_range(num_vertices):
+    # Un origen aporta n * delta / ((n-1)(n-2)) con delta <= n-2: un valor en [0, n/(n-1)]
+    return num_vertices / max(1, num_vertices - 1)
+
+
+def samples_for_error(num_vertices, epsilon, delta=0.1):
+    """Sources needed so every normalized score is within epsilon with probability 1 - delta.
+
+    Each sampled source contributes a value in [0, R] per vertex, with
+    R = n / (n - 1), so Hoeffding's inequality plus a union bound over the
+    vertices gives k >= R^2 ln(2n / delta) / (2 epsilon^2). It is the
+    inverse of error_for_samples.
+    """
+    if epsilon <= 0:
+        raise ValueError("epsilon must be positive.")
+    if not 0 < delta < 1:
+        raise ValueError("delta must be in (0, 1).")
+    r = _sample_range(num_vertices)
+    return math.ceil(r * r * math.log(2 * max(1, num_vertices) / delta) / (2 * epsilon ** 2))
+
+
+def error_for_samples(num_vertices, samples, delta=0.1):
+    """Additive error bound on the normalized scores guaranteed by samples sources (see samples_for_error)."""
+    if samples >= num_vertices:
+        return 0.0
+    return _sample_range(num_vertices) * math.sqrt(math.log(2 * max(1, num_vertices) / delta) / (2 * samples))
+
+
+def _accumulate(csr, sources, totals):
+    """Brandes dependency accumulation from each source, added into totals (a list).
+
+    Arcs are sliced from the CSR columns, as in csr_array_dijkstra, so over
+    a shared graph a worker builds no O(m) structures of its own.
+    """
+    indptr, indices, weights = csr.indptr.tolist(), csr.indices, csr.weights
+    n = len(indptr) - 1
+    inf = float('infinity')
+    for s in sources:
+        dist = [inf] * n
+        sigma = [0] * n
+        preds = [[] for _ in range(n)]
+        done = [False] * n
+        order = []
+        dist[s] = 0.0
+        sigma[s] = 1
+        heap = [(0.0, s)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if done[u]:
+                continue
+            done[u] = True
+            order.append(u)
+            lo, hi = indptr[u], indptr[u + 1]
+            for v, w in zip(indices[lo:hi].tolist(), weights[lo:hi].tolist()):
+                nd = d + w
+                if nd < dist[v]:
+                    dist[v] = nd
+                    sigma[v] = sigma[u]
+                    preds[v] = [u]
+                    heapq.heappush(heap, (nd, v))
+                elif nd == dist[v] and not done[v]:
+                    sigma[v] += sigma[u]
+                    preds[v].append(u)
+        delta = [0.0] * n
+        for w in reversed(order):
+            coefficient = (1.0 + delta[w]) / sigma[w]
+            for v in preds[w]:
+                delta[v] += sigma[v] * coefficient
+            if w != s:
+                totals[w] += delta[w]
+    return totals
+
+
+def _shared_accumulate(handle, sources):
+    csr = attach_csr(handle)
+    return np.asarray(_accumulate(csr, sources, [0.0] * csr.num_vertices()))
+
+
+def betweenness_centrality(graph, samples=None, epsilon=None, delta=0.1, normalized=True,
+                           seed=None, processes=None):
+    """Weighted betweenness centrality, exact or estimated from sampled sources.
+
+    With neither samples nor epsilon every vertex is a source (exact Brandes).
+    epsilon picks the number of sources from samples_for_error(n, epsilon,
+    delta); the estimate sums the dependencies of k uniform sources scaled
+    by n / k. With processes > 1 the sources are split across a process
+    pool that reads the graph from shared memory. Normalized scores follow
+    networkx: divided by (n-1)(n-2).
+
+    Returns a dict with 'scores' ({element: score}), 'samples', 'exact',
+    'epsilon' (the bound achieved), 'delta' and 'seconds'.
+    """
+    start = time.perf_counter()
+    csr = graph.to_csr()
+    n = csr.num_vertices()
+    if epsilon is not None and samples is None:
+        samples = samples_for_error(n, epsilon, delta)
+    k = n if samples is None else max(1, min(int(samples), n))
+    exact = k >= n
+    sources = list(range(n)) if exact else random.Random(seed).sample(range(n), k)
+
+    if processes and processes > 1 and k > 1:
+        chunks = [sources[i::processes] for i in range(processes)]
+        chunks = [c for c in chunks if c]
+        totals = np.zeros(n)
+        with SharedGraph.publish(csr) as shared:
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                for partial in pool.map(_shared_accumulate, [shared.handle] * len(chunks), chunks):
+                    totals += partial
+    else:
+        totals = np.asarray(_accumulate(csr, sources, [0.0] * n))
+
+    scale = n / k
+    if normalized:
+        scale /= (n - 1) * (n - 2) if n > 2 else 1
+    elif not csr.directed:
+        scale /= 2  # Cada par no ordenado se contó en ambos sentidos
+    scores = totals * scale
+    return {
+        'scores': dict(zip(csr.elements, scores.tolist())),
+        'samples': k,
+        'exact': exact,
+        'epsilon': 0.0 if exact else error_for_samples(n, k, delta),
+        'delta': delta,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def critical_nodes(graph, role='recharge', limit=10, **kwargs):
+    """Top vertices by betweenness, optionally of one role. Returns (ranking, result)."""
+    result = betweenness_centrality(graph, **kwargs)
+    csr = graph.to_csr()
+    scores = result['scores']
+    if role is None:
+        candidates = csr.elements
+    else:
+        if role not in ROLE_CODES:
+            raise ValueError(f"Unknown role '{role}'. Options: {list(ROLE_CODES)}")
+        mask = csr.roles == ROLE_CODES[role]
+        candidates = [e for e, keep in zip(csr.elements, mask.tolist()) if keep]
+    ranking = sorted(((e, scores[e]) for e in candidates), key=lambda item: item[1], reverse=True)
+    return ranking[:limit] if limit is not None else ranking, result
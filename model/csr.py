@@ -0,0 +1,225 @@
+import hashlib
+import heapq
+import json
+import os
+import numpy as np
+
+ROLE_CODES = {'warehouse': 0, 'recharge': 1, 'client': 2}
+ROLE_NAMES = {code: name for name, code in ROLE_CODES.items()}
+UNKNOWN_ROLE = -1
+
+FORMAT_NAME = 'csr-graph'
+FORMAT_VERSION = 1
+MANIFEST = 'manifest.json'
+COLUMNS = ('elements', 'roles', 'latitudes', 'longitudes', 'indptr', 'indices', 'weights')
+
+
+class CSRGraph:
+    """Read-only compressed sparse row snapshot of a Graph.
+
+    Vertex i is the i-th vertex of the graph's index snapshot; the arcs
+    leaving it are indices[indptr[i]:indptr[i+1]] with matching weights.
+    Undirected edges appear once per direction.  All columns are NumPy
+    arrays so they can be handed to vectorized code, shared memory or disk.
+    """
+    __slots__ = ('elements', 'roles', 'latitudes', 'longitudes',
+                 'indptr', 'indices', 'weights', 'directed', '_position', '_hash')
+
+    def __init__(self, elements, roles, latitudes, longitudes, indptr, indices, weights, directed=False):
+        self.elements = elements      # list de elementos (ids de vértice)
+        self.roles = roles            # int8, ver ROLE_CODES
+        self.latitudes = latitudes    # float64
+        self.longitudes = longitudes  # float64
+        self.indptr = indptr          # int64, tamaño n + 1
+        self.indices = indices        # int32, destino de cada arco
+        self.weights = weights        # float64, peso de cada arco
+        self.directed = directed
+        self._position = None
+        self._hash = None
+
+    @classmethod
+    def from_graph(cls, graph):
+        vertices, position, _ = graph._vertex_index()
+        n = len(vertices)
+        outgoing = graph._outgoing
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        for i, v in enumerate(vertices):
+            indptr[i + 1] = indptr[i] + len(outgoing[v])
+        indices = np.empty(indptr[-1], dtype=np.int32)
+        weights = np.empty(indptr[-1], dtype=np.float64)
+        k = 0
+        for v in vertices:
+            for neighbor, edge in outgoing[v].items():
+                indices[k] = position[neighbor]
+                weights[k] = edge.element()
+                k += 1
+        roles = np.array([ROLE_CODES.get(v.type(), UNKNOWN_ROLE) for v in vertices], dtype=np.int8)
+        latitudes = np.array([v.latitude() for v in vertices], dtype=np.float64)
+        longitudes = np.array([v.longitude() for v in vertices], dtype=np.float64)
+        return cls([v.element() for v in vertices], roles, latitudes, longitudes,
+                   indptr, indices, weights, graph.is_directed())
+
+    def num_vertices(self):
+        return len(self.elements)
+
+    def num_arcs(self):
+        return int(self.indptr[-1])
+
+    def index_of(self, element):
+        """Return the vertex index of element, or None."""
+        if self._position is None:
+            self._position = {e: i for i, e in enumerate(self.elements)}
+        return self._position.get(element)
+
+    def neighbors(self, i):
+        """Return (indices, weights) arrays of the arcs leaving vertex i."""
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return self.indices[start:end], self.weights[start:end]
+
+    def degrees(self):
+        return np.diff(self.indptr)
+
+    def columns(self):
+        """Column name -> NumPy array, in on-disk order (elements as a fixed-width array)."""
+        return {'elements': np.asarray(self.elements), 'roles': self.roles,
+                'latitudes': self.latitudes, 'longitudes': self.longitudes,
+                'indptr': self.indptr, 'indices': self.indices, 'weights': self.weights}
+
+    def content_hash(self):
+        """SHA-256 over direction and every column; equal graphs give equal hashes."""
+        if self._hash is None:
+            digest = hashlib.sha256(b'directed' if self.directed else b'undirected')
+            for name, array in self.columns().items():
+                array = np.ascontiguousarray(array)
+                digest.update(f"{name}:{array.dtype.str}:{array.shape}".encode())
+                digest.update(array.tobytes())
+            self._hash = digest.hexdigest()
+        return self._hash
+
+    def save(self, path):
+        """Write one .npy file per column plus manifest.json into directory path.
+
+        The manifest is written last, so a directory without one is an
+        interrupted save and load() rejects it.
+        """
+        os.makedirs(path, exist_ok=True)
+        columns = {}
+        for name, array in self.columns().items():
+            if array.dtype == object:
+                raise TypeError("Vertex elements must be all strings or all numbers to be saved.")
+            np.save(os.path.join(path, f"{name}.npy"), array, allow_pickle=False)
+            columns[name] = {'file': f"{name}.npy", 'dtype': array.dtype.str, 'shape': list(array.shape)}
+        manifest = {
+            'format': FORMAT_NAME,
+            'version': FORMAT_VERSION,
+            'directed': bool(self.directed),
+            'num_vertices': self.num_vertices(),
+            'num_arcs': self.num_arcs(),
+            'roles': {str(code): name for code, name in ROLE_NAMES.items()},
+            'content_hash': self.content_hash(),
+            'columns': columns,
+        }
+        tmp = os.path.join(path, MANIFEST + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp, os.path.join(path, MANIFEST))
+        return manifest['content_hash']
+
+    @classmethod
+    def load(cls, path, mmap=True, verify=False):
+        """Read a directory written by save(); numeric columns are memory-mapped when mmap is true.
+
+        The stored content hash is trusted unless verify is true, which
+        re-hashes every column (and so reads the whole file).
+        """
+        manifest_path = os.path.join(path, MANIFEST)
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"No graph manifest found in {path}.")
+        with open(manifest_path, encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('format') != FORMAT_NAME or manifest.get('version') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported graph format in {path}: "
+                             f"{manifest.get('format')} v{manifest.get('version')}.")
+        arrays = {}
+        for name in COLUMNS:
+            spec = manifest['columns'][name]
+            array = np.load(os.path.join(path, spec['file']), mmap_mode='r' if mmap else None, allow_pickle=False)
+            if array.dtype.str != spec['dtype'] or list(array.shape) != spec['shape']:
+                raise ValueError(f"Column '{name}' in {path} does not match its manifest.")
+            arrays[name] = array
+        csr = cls(arrays['elements'].tolist(), arrays['roles'], arrays['latitudes'], arrays['longitudes'],
+                  arrays['indptr'], arrays['indices'], arrays['weights'], manifest['directed'])
+        if verify and csr.content_hash() != manifest['content_hash']:
+            raise ValueError(f"Graph data in {path} does not match its content hash.")
+        csr._hash = manifest['content_hash']
+        return csr
+
+    def adjacency_lists(self):
+        """Per-vertex Python lists of (neighbor, weight), for tight pure-Python loops."""
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+        weights = self.weights.tolist()
+        return [list(zip(indices[indptr[i]:indptr[i + 1]], weights[indptr[i]:indptr[i + 1]]))
+                for i in range(len(self.elements))]
+
+
+def csr_dijkstra(adjacency, sources, allowed=None):
+    """Multi-source Dijkstra over adjacency lists from CSRGraph.adjacency_lists().
+
+    sources is an iterable of (vertex, initial distance) pairs; when allowed
+    is given, only vertices in it are entered. Returns (dist, pred) lists.
+    """
+    n = len(adjacency)
+    inf = float('infinity')
+    dist = [inf] * n
+    pred = [-1] * n
+    heap = []
+    for s, d0 in sources:
+        if d0 < dist[s]:
+            dist[s] = d0
+            heapq.heappush(heap, (d0, s))
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        for v, w in adjacency[u]:
+            if allowed is not None and v not in allowed:
+                continue
+            nd = d + w
+            if nd < dist[v]:
+                dist[v] = nd
+                pred[v] = u
+                heapq.heappush(heap, (nd, v))
+    return dist, pred
+
+
+def csr_array_dijkstra(csr, sources):
+    """Multi-source Dijkstra reading the arcs straight from csr.indices/weights.
+
+    Same contract as csr_dijkstra, but instead of adjacency lists (O(m)
+    Python objects) it slices the NumPy columns of each settled vertex, so
+    over shared-memory or memory-mapped columns the only per-process
+    structures are O(n). Somewhat slower per search than csr_dijkstra.
+    """
+    indptr, indices, weights = csr.indptr.tolist(), csr.indices, csr.weights
+    n = len(indptr) - 1
+    inf = float('infinity')
+    dist = [inf] * n
+    pred = [-1] * n
+    heap = []
+    for s, d0 in sources:
+        if d0 < dist[s]:
+            dist[s] = d0
+            heapq.heappush(heap, (d0, s))
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > dist[u]:
+            continue
+        lo, hi = indptr[u], indptr[u + 1]
+        for v, w in zip(indices[lo:hi].tolist(), weights[lo:hi].tolist()):
+            nd = d + w
+            if nd < dist[v]:
+                dist[v] = nd
+                pred[v] = u
+                heapq.heappush(heap, (nd, v))
+    return dist, pred
@@ -1,9 +1,14 @@
+import gc
 import random
-import heapq
 import math
+import weakref
+import numpy as np
 from .vertex import Vertex
 from .edge import Edge
-from collections import deque
+from .sssp import ShortestPathResult
+from .csr import CSRGraph, ROLE_NAMES
+from tda.priority_queue import choose_frontier, get_frontier
+from collections import Counter, deque
 
 def haversine_distance(lat1, lon1, lat2, lon2):
     """Calcula la distancia en KM entre dos puntos geográficos."""
@@ -19,38 +24,326 @@ class Graph:
         self._outgoing = {}
         self._incoming = {} if directed else self._outgoing
         self._directed = directed
+        self._version = 0          # Se incrementa con cada cambio estructural
+        self._index_cache = None   # (version, vertices, {vertex: i}, {element: i})
+        self._weights_version = 0  # Se incrementa con cada cambio de peso
+        self._weight_listeners = []
+        self._csr_cache = None
+        self._geo_factor_cache = None
+        self._reset_metrics()
 
     def is_directed(self):
         return self._directed
 
+    def _reset_metrics(self):
+        # Métricas mantenidas en cada inserción/eliminación para responder metrics() en O(1).
+        self._vertex_count = 0
+        self._edge_count = 0
+        self._total_weight = 0.0
+        self._type_counts = Counter()
+        self._degree_histogram = Counter()
+
+    def _degree(self, v_vertex):
+        degree = len(self._outgoing[v_vertex])
+        return degree + len(self._incoming[v_vertex]) if self._directed else degree
+
+    def _update_degrees(self, before):
+        """Move each vertex of before ({vertex: old degree}) to its current histogram bucket."""
+        histogram = self._degree_histogram
+        for v_vertex, old in before.items():
+            new = self._degree(v_vertex) if v_vertex in self._outgoing else None
+            if new == old:
+                continue
+            histogram[old] -= 1
+            if not histogram[old]:
+                del histogram[old]
+            if new is not None:
+                histogram[new] += 1
+
+    def _count_vertex(self, v_vertex, delta):
+        self._vertex_count += delta
+        self._type_counts[v_vertex.type()] += delta
+        if not self._type_counts[v_vertex.type()]:
+            del self._type_counts[v_vertex.type()]
+        self._degree_histogram[0] += delta
+        if not self._degree_histogram[0]:
+            del self._degree_histogram[0]
+
+    def num_vertices(self):
+        return self._vertex_count
+
+    def num_edges(self):
+        return self._edge_count
+
+    def metrics(self):
+        """Counts, role distribution, degree histogram and weight totals, all kept up to date in O(1).
+
+        Degree is the number of incident edges (in + out for directed graphs).
+        """
+        n, m = self._vertex_count, self._edge_count
+        histogram = dict(sorted(self._degree_histogram.items()))
+        pairs = n * (n - 1) if self._directed else n * (n - 1) / 2
+        return {
+            'vertices': n,
+            'edges': m,
+            'directed': self._directed,
+            'type_distribution': dict(self._type_counts),
+            'degree_histogram': histogram,
+            'min_degree': min(histogram) if histogram else 0,
+            'max_degree': max(histogram) if histogram else 0,
+            'average_degree': sum(d * c for d, c in histogram.items()) / n if n else 0.0,
+            'total_weight': self._total_weight,
+            'average_weight': self._total_weight / m if m else 0.0,
+            'density': m / pairs if pairs else 0.0,
+        }
+
+    def _touch(self):
+        """Mark the structure as modified so derived indexes are rebuilt."""
+        self._version += 1
+
+    def _vertex_index(self):
+        """Return (vertex list, {vertex: idx}, {element: idx}) for the current structure."""
+        cache = self._index_cache
+        if cache is None or cache[0] != self._version:
+            vertices = list(self._outgoing.keys())
+            position = {v: i for i, v in enumerate(vertices)}
+            by_element = {}
+            for i, v in enumerate(vertices):
+                by_element.setdefault(v.element(), i)
+            cache = (self._version, vertices, position, by_element)
+            self._index_cache = cache
+        return cache[1], cache[2], cache[3]
+
     def insert_vertex(self, element, type=None, latitude=None, longitude=None):
         v = Vertex(element, type=type, latitude=latitude, longitude=longitude)
         self._outgoing[v] = {}
         if self._directed:
             self._incoming[v] = {}
+        self._count_vertex(v, 1)
+        self._touch()
         return v
 
+    def insert_vertices(self, rows):
+        """Insert (element, type, latitude, longitude) rows as one structural change; returns the new vertices."""
+        outgoing, incoming, directed = self._outgoing, self._incoming, self._directed
+        created = []
+        try:
+            for element, type, latitude, longitude in rows:
+                v = Vertex(element, type=type, latitude=latitude, longitude=longitude)
+                outgoing[v] = {}
+                if directed:
+                    incoming[v] = {}
+                self._count_vertex(v, 1)
+                created.append(v)
+        finally:
+            if created:
+                self._touch()
+        return created
+
+    def insert_edges(self, rows):
+        """Insert (u_vertex, v_vertex, weight) rows as one structural change; returns the number inserted."""
+        outgoing, incoming = self._outgoing, self._incoming
+        before = {}
+        count = 0
+        try:
+            for u_vertex, v_vertex, weight in rows:
+                if not isinstance(u_vertex, Vertex) or not isinstance(v_vertex, Vertex):
+                    raise TypeError("u_vertex and v_vertex must be Vertex instances.")
+                for x in (u_vertex, v_vertex):
+                    if x not in before:
+                        before[x] = self._degree(x)
+                old = outgoing[u_vertex].get(v_vertex)
+                e = Edge(u_vertex, v_vertex, weight)
+                outgoing[u_vertex][v_vertex] = e
+                incoming[v_vertex][u_vertex] = e
+                if old is None:
+                    self._edge_count += 1
+                else:
+                    self._total_weight -= old.element()
+                self._total_weight += weight
+                count += 1
+        finally:
+            if count:
+                self._update_degrees(before)
+                self._touch()
+        return count
+
     def get_vertex_by_element(self, element_val):
-        for v in self.vertices():
-            if v.element() == element_val:
-                return v
-        return None
+        vertices, _, by_element = self._vertex_index()
+        i = by_element.get(element_val)
+        return vertices[i] if i is not None else None
 
     def insert_edge(self, u_vertex, v_vertex, weight):
         if not isinstance(u_vertex, Vertex) or not isinstance(v_vertex, Vertex):
             raise TypeError("u_vertex and v_vertex must be Vertex instances.")
+        before = {u_vertex: self._degree(u_vertex), v_vertex: self._degree(v_vertex)}
+        old = self._outgoing[u_vertex].get(v_vertex)
         e = Edge(u_vertex, v_vertex, weight)
         self._outgoing[u_vertex][v_vertex] = e
         self._incoming[v_vertex][u_vertex] = e
+        if old is None:
+            self._edge_count += 1
+        else:
+            self._total_weight -= old.element()
+        self._total_weight += weight
+        self._update_degrees(before)
+        self._touch()
         return e
 
+    def to_csr(self):
+        """Return a CSRGraph snapshot, rebuilt only after structure or weight changes."""
+        key = (self._version, self._weights_version)
+        cache = self._csr_cache
+        if cache is None or cache[0] != key:
+            cache = (key, CSRGraph.from_graph(self))
+            self._csr_cache = cache
+        return cache[1]
+
+    def content_hash(self):
+        """SHA-256 of the graph's CSR snapshot: a cache key for indexes derived from it."""
+        return self.to_csr().content_hash()
+
+    def save(self, path):
+        """Save the graph as a columnar directory (see CSRGraph.save). Returns the content hash."""
+        return self.to_csr().save(path)
+
+    @classmethod
+    def load(cls, path, mmap=True, verify=False):
+        """Load a graph written by save().
+
+        With mmap the columns are memory-mapped, so loading costs the same
+        whatever the graph size: to_csr() and content_hash() answer straight
+        from the file, and the Vertex/Edge objects are built in one pass the
+        first time something needs them.
+        """
+        csr = CSRGraph.load(path, mmap=mmap, verify=verify)
+        graph = cls(directed=csr.directed)
+        del graph._outgoing, graph._incoming
+        graph._pending_csr = csr
+        graph._csr_cache = ((graph._version, graph._weights_version), csr)
+        graph._metrics_from_csr(csr)
+        return graph
+
+    def _metrics_from_csr(self, csr):
+        """Initialise the maintained metrics from a CSR snapshot with vectorized counts."""
+        n = csr.num_vertices()
+        sources = np.repeat(np.arange(n), np.diff(csr.indptr))
+        loops = sources == csr.indices
+        degrees = np.diff(csr.indptr)
+        if csr.directed:
+            degrees = degrees + np.bincount(csr.indices, minlength=n)
+            self._edge_count = csr.num_arcs()
+            self._total_weight = float(csr.weights.sum())
+        else:
+            # Cada arista aparece en ambos sentidos, salvo los lazos.
+            self._edge_count = int((csr.num_arcs() + loops.sum()) // 2)
+            self._total_weight = float((csr.weights.sum() + csr.weights[loops].sum()) / 2)
+        self._vertex_count = n
+        roles, counts = np.unique(csr.roles, return_counts=True)
+        self._type_counts = Counter({ROLE_NAMES.get(int(r)): int(c) for r, c in zip(roles, counts)})
+        values, counts = np.unique(degrees, return_counts=True)
+        self._degree_histogram = Counter({int(d): int(c) for d, c in zip(values, counts)})
+
+    def __getattr__(self, name):
+        # Solo se invoca si el atributo no existe: un grafo cargado construye sus objetos al primer uso.
+        if name in ('_outgoing', '_incoming') and '_pending_csr' in self.__dict__:
+            self._materialize()
+            return self.__dict__[name]
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    def _materialize(self):
+        """Build Vertex and Edge objects from the pending CSR snapshot, in its vertex order."""
+        csr = self.__dict__.pop('_pending_csr')
+        # Millones de objetos nuevos: el recolector cíclico se pausa durante la construcción.
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            self._build_from_csr(csr)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    def _build_from_csr(self, csr):
+        types = [ROLE_NAMES.get(code) for code in csr.roles.tolist()]
+        vertices = [Vertex(e, type=t, latitude=lat, longitude=lon) for e, t, lat, lon in
+                    zip(csr.elements, types, csr.latitudes.tolist(), csr.longitudes.tolist())]
+        out_maps = [{} for _ in vertices]
+        in_maps = [{} for _ in vertices] if self._directed else out_maps
+        indptr, indices, weights = csr.indptr.tolist(), csr.indices.tolist(), csr.weights.tolist()
+        directed = self._directed
+        for i, u in enumerate(vertices):
+            out_u = out_maps[i]
+            for j, w in zip(indices[indptr[i]:indptr[i + 1]], weights[indptr[i]:indptr[i + 1]]):
+                if not directed and j < i:
+                    continue  # La arista ya se creó desde el extremo de menor índice
+                v = vertices[j]
+                e = Edge(u, v, w)
+                out_u[v] = e
+                in_maps[j][u] = e
+        outgoing = dict(zip(vertices, out_maps))
+        incoming = dict(zip(vertices, in_maps)) if directed else outgoing
+        self._outgoing = outgoing
+        self._incoming = incoming
+
+    def _resolve_vertex(self, vertex_or_element):
+        if isinstance(vertex_or_element, Vertex):
+            return vertex_or_element
+        vertex = self.get_vertex_by_element(vertex_or_element)
+        if vertex is None:
+            raise ValueError(f"Vertex {vertex_or_element} not found in graph.")
+        return vertex
+
+    def __getstate__(self):
+        # Los listeners son referencias débiles a cachés ajenas (RouteManager): no viajan con el grafo.
+        state = self.__dict__.copy()
+        state.pop('_weight_listeners', None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._weight_listeners = []
+
+    def add_weight_listener(self, callback):
+        """Register callback(edge, old_weight) to run after update_edge_weight.
+
+        Bound methods are held weakly so listeners do not keep their owners alive.
+        """
+        ref = weakref.WeakMethod(callback) if hasattr(callback, '__self__') else (lambda: callback)
+        self._weight_listeners.append(ref)
+
+    def update_edge_weight(self, u, v, weight):
+        """Change the weight of edge (u, v) in place; u and v are Vertex objects or elements."""
+        u_vertex, v_vertex = self._resolve_vertex(u), self._resolve_vertex(v)
+        edge = self.get_edge(u_vertex, v_vertex)
+        if edge is None:
+            raise ValueError(f"Edge ({u_vertex}, {v_vertex}) not found in graph.")
+        old_weight = edge.element()
+        if old_weight == weight:
+            return edge
+        edge._element = weight
+        self._total_weight += weight - old_weight
+        self._weights_version += 1
+        alive = []
+        for ref in self._weight_listeners:
+            callback = ref()
+            if callback is not None:
+                alive.append(ref)
+                callback(edge, old_weight)
+        self._weight_listeners = alive
+        return edge
+
     def remove_edge(self, u_vertex, v_vertex):
         if u_vertex in self._outgoing and v_vertex in self._outgoing[u_vertex]:
+            before = {u_vertex: self._degree(u_vertex), v_vertex: self._degree(v_vertex)}
+            self._edge_count -= 1
+            self._total_weight -= self._outgoing[u_vertex][v_vertex].element()
             del self._outgoing[u_vertex][v_vertex]
             del self._incoming[v_vertex][u_vertex]
             if not self.is_directed() and v_vertex in self._outgoing and u_vertex in self._outgoing[v_vertex]:
                  del self._outgoing[v_vertex][u_vertex]
                  del self._incoming[u_vertex][v_vertex]
+            self._update_degrees(before)
+            self._touch()
 
 
     def remove_vertex(self, v_vertex):
@@ -60,9 +353,12 @@ class Graph:
         for u_vertex in list(self._incoming.get(v_vertex, {}).keys()):
             self.remove_edge(u_vertex, v_vertex)
 
+        if v_vertex in self._outgoing:
+            self._count_vertex(v_vertex, -1)
         self._outgoing.pop(v_vertex, None)
         if self._directed:
             self._incoming.pop(v_vertex, None)
+        self._touch()
 
     def get_edge(self, u_vertex, v_vertex):
         return self._outgoing.get(u_vertex, {}).get(v_vertex)
@@ -118,6 +414,8 @@ class Graph:
         """
         self._outgoing.clear()
         self._incoming.clear()
+        self._reset_metrics()
+        self._touch()
 
         if num_nodes <= 0: return
 
@@ -238,40 +536,184 @@ class Graph:
                 all_components.append(component)
         return all_components
 
-    def dijkstra(self, start_vertex_element):
-        start_vertex = self.get_vertex_by_element(start_vertex_element)
-        if not start_vertex:
+    def _make_frontier(self, frontier, num_vertices):
+        """Instantiate a frontier from a backend name, a Frontier class, or the size policy."""
+        if frontier is None:
+            return choose_frontier(num_vertices)()
+        if isinstance(frontier, str):
+            return get_frontier(frontier)()
+        return frontier()
+
+    def shortest_paths(self, start_vertex_element, frontier=None, mask=None):
+        """Run Dijkstra from start and return a lazy ShortestPathResult.
+
+        frontier selects the priority-queue backend (see tda.priority_queue);
+        by default it is chosen from the graph size. mask is an optional
+        ClosureMask whose edges and vertices the search will not use.
+        """
+        vertices, position, by_element = self._vertex_index()
+        start_idx = by_element.get(start_vertex_element)
+        if start_idx is None:
             raise ValueError(f"Start vertex {start_vertex_element} not found in graph.")
 
-        distances = {v: float('infinity') for v in self.vertices()}
-        predecessors = {v: None for v in self.vertices()}
-        distances[start_vertex] = 0
-        contador = 0  
-        pq = [(0, contador, start_vertex)]
+        inf = float('infinity')
+        dist = [inf] * len(vertices)
+        pred = [-1] * len(vertices)
+        dist[start_idx] = 0
+        settled = 0
+        pq = self._make_frontier(frontier, len(vertices))
+        push, pop = pq.push, pq.pop
+        push(start_idx, 0)
+        outgoing = self._outgoing
+        masked = mask is not None and not mask.is_empty()
+        closed_edges = mask.edges() if masked else ()
+        closed_vertices = mask.vertices() if masked else ()
         while pq:
-            current_cost, _, u_vertex = heapq.heappop(pq) # Extraemos el contador pero no lo usamos
-
-            if current_cost > distances[u_vertex]:
+            current_cost, u_idx = pop()
+            if current_cost > dist[u_idx]:
                 continue # Already found a shorter path
+            settled += 1
+
+            u_vertex = vertices[u_idx]
+            for v_vertex, edge in outgoing[u_vertex].items():
+                if masked and (v_vertex in closed_vertices or edge in closed_edges):
+                    continue
+                v_idx = position[v_vertex]
+                new_cost = current_cost + edge.element()
+                if new_cost < dist[v_idx]:
+                    dist[v_idx] = new_cost
+                    pred[v_idx] = u_idx
+                    push(v_idx, new_cost)
+
+        return ShortestPathResult(start_vertex_element, vertices, by_element, dist, pred, settled, self._version)
+
+    def reachable_within(self, start_vertex_element, budget, frontier=None, mask=None):
+        """Return {element: distance} for every vertex at distance <= budget from start.
+
+        A Dijkstra that never pushes a vertex beyond the budget and keeps its
+        state in dicts, so the cost depends on the size of the ball, not of
+        the graph. Elements come in nondecreasing distance order.
+        """
+        vertices, position, by_element = self._vertex_index()
+        start_idx = by_element.get(start_vertex_element)
+        if start_idx is None:
+            raise ValueError(f"Start vertex {start_vertex_element} not found in graph.")
+        if budget < 0:
+            return {}
+
+        inf = float('infinity')
+        dist = {start_idx: 0}
+        settled = {}
+        pq = self._make_frontier(frontier, len(vertices))
+        push, pop = pq.push, pq.pop
+        push(start_idx, 0)
+        outgoing = self._outgoing
+        masked = mask is not None and not mask.is_empty()
+        closed_edges = mask.edges() if masked else ()
+        closed_vertices = mask.vertices() if masked else ()
+        while pq:
+            current_cost, u_idx = pop()
+            if u_idx in settled or current_cost > dist[u_idx]:
+                continue
+            settled[u_idx] = current_cost
+            for v_vertex, edge in outgoing[vertices[u_idx]].items():
+                if masked and (v_vertex in closed_vertices or edge in closed_edges):
+                    continue
+                new_cost = current_cost + edge.element()
+                if new_cost > budget:
+                    continue
+                v_idx = position[v_vertex]
+                if new_cost < dist.get(v_idx, inf):
+                    dist[v_idx] = new_cost
+                    push(v_idx, new_cost)
+        return {vertices[i].element(): d for i, d in settled.items()}
+
+    def dijkstra(self, start_vertex_element, frontier=None, mask=None):
+        """Return (distances, predecessors) dicts keyed by vertex element."""
+        return self.shortest_paths(start_vertex_element, frontier, mask).to_dicts()
+
+    def _geo_factor(self):
+        """Smallest weight/haversine ratio over all edges, cached per structure version.
+
+        Scaling the straight-line distance by this factor gives an admissible and
+        consistent A* heuristic for this graph's edge weights.
+        """
+        cache = self._geo_factor_cache
+        if cache is None or cache[0] != (self._version, self._weights_version):
+            factor = float('infinity')
+            for edge in self.edges():
+                u, v = edge.endpoints()
+                straight = haversine_distance(u.latitude(), u.longitude(), v.latitude(), v.longitude())
+                if straight > 0:
+                    factor = min(factor, edge.element() / straight)
+            cache = ((self._version, self._weights_version), 0.0 if factor == float('infinity') else max(0.0, factor))
+            self._geo_factor_cache = cache
+        return cache[1]
+
+    def geographic_heuristic(self, goal_vertex_element):
+        """Return h(vertex) -> lower bound of the cost from vertex to goal."""
+        goal = self.get_vertex_by_element(goal_vertex_element)
+        if goal is None:
+            raise ValueError(f"Goal vertex {goal_vertex_element} not found in graph.")
+        factor = self._geo_factor()
+        goal_lat, goal_lon = goal.latitude(), goal.longitude()
+        def heuristic(vertex):
+            return factor * haversine_distance(vertex.latitude(), vertex.longitude(), goal_lat, goal_lon)
+        return heuristic
+
+    def astar(self, start_vertex_element, goal_vertex_element, heuristic=None, frontier=None, mask=None):
+        """A* search from start to goal; returns a ShortestPathResult.
+
+        Only the goal's distance and path are guaranteed to be final. heuristic
+        maps a Vertex to a lower bound of its remaining cost and defaults to the
+        geographic one; mask works as in shortest_paths.
+        """
+        vertices, position, by_element = self._vertex_index()
+        start_idx = by_element.get(start_vertex_element)
+        goal_idx = by_element.get(goal_vertex_element)
+        if start_idx is None:
+            raise ValueError(f"Start vertex {start_vertex_element} not found in graph.")
+        if goal_idx is None:
+            raise ValueError(f"Goal vertex {goal_vertex_element} not found in graph.")
+        if heuristic is None:
+            heuristic = self.geographic_heuristic(goal_vertex_element)
+
+        inf = float('infinity')
+        dist = [inf] * len(vertices)
+        pred = [-1] * len(vertices)
+        dist[start_idx] = 0
+        settled = 0
+        h_cache = {start_idx: heuristic(vertices[start_idx])}
+        pq = self._make_frontier(frontier, len(vertices))
+        pq.push(start_idx, h_cache[start_idx])
+        outgoing = self._outgoing
+        masked = mask is not None and not mask.is_empty()
+        closed_edges = mask.edges() if masked else ()
+        closed_vertices = mask.vertices() if masked else ()
+        while pq:
+            priority, u_idx = pq.pop()
+            current_cost = dist[u_idx]
+            if priority > current_cost + h_cache[u_idx]:
+                continue # Entrada obsoleta
+            settled += 1
+            if u_idx == goal_idx:
+                break
+            u_vertex = vertices[u_idx]
+            for v_vertex, edge in outgoing[u_vertex].items():
+                if masked and (v_vertex in closed_vertices or edge in closed_edges):
+                    continue
+                v_idx = position[v_vertex]
+                new_cost = current_cost + edge.element()
+                if new_cost < dist[v_idx]:
+                    dist[v_idx] = new_cost
+                    pred[v_idx] = u_idx
+                    h = h_cache.get(v_idx)
+                    if h is None:
+                        h = h_cache[v_idx] = heuristic(v_vertex)
+                    pq.push(v_idx, new_cost + h)
+
+        return ShortestPathResult(start_vertex_element, vertices, by_element, dist, pred, settled, self._version)
 
-            for edge in self.incident_edges(u_vertex, outgoing=True):
-                v_vertex = edge.opposite(u_vertex)
-                weight = edge.element() # Edge weight
-
-                if distances[u_vertex] + weight < distances[v_vertex]:
-                    distances[v_vertex] = distances[u_vertex] + weight
-                    predecessors[v_vertex] = u_vertex
-                    # --- INICIO DE LA CORRECCIÓN ---
-                    contador += 1 # Incrementar el contador en cada inserción
-                    heapq.heappush(pq, (distances[v_vertex], contador, v_vertex))
-                    # --- FIN DE LA CORRECCIÓN ---
-
-        # Convert keys in results from Vertex objects to vertex elements for easier use
-        dist_by_element = {v.element(): d for v, d in distances.items()}
-        pred_by_element = {v.element(): (p.element() if p else None) for v, p in predecessors.items()}
-
-        return dist_by_element, pred_by_element
-    
     def get_shortest_path(self, start_vertex_element, end_vertex_element, predecessors_map_elements):
         path = []
         current_element = end_vertex_element
@@ -0,0 +1,185 @@
+import heapq
+import time
+import random
+import numpy as np
+
+
+class HubLabelIndex:
+    """Pruned landmark labelling (PLL) distance oracle for undirected graphs.
+
+    Every vertex keeps a label: a list of (hub rank, distance, parent)
+    entries sorted by rank; order maps a rank back to its hub vertex.
+    distance(u, v) is the minimum of d(u, h) + d(h, v) over the hubs shared
+    by both labels, and the parent pointers (the next vertex towards the
+    hub) rebuild the actual path.  Labels are stored as
+    flat arrays with per-vertex offsets, which is also the on-disk layout.
+    """
+
+    def __init__(self, elements, order, offsets, hubs, dists, parents, build_seconds=0.0, graph_hash=None):
+        """Do not call constructor directly. Use HubLabelIndex.build(graph) or load(path)."""
+        self.elements = list(elements)
+        self.order = order        # int32, rango -> vértice hub
+        self.offsets = offsets    # int64, tamaño n + 1
+        self.hubs = hubs          # int32, rango del hub de cada entrada (creciente por vértice)
+        self.dists = dists        # float64
+        self.parents = parents    # int32, siguiente vértice hacia el hub (-1 en el propio hub)
+        self.build_seconds = build_seconds
+        self.graph_hash = graph_hash  # Graph.content_hash() del grafo indexado
+        self._position = {e: i for i, e in enumerate(self.elements)}
+
+    @classmethod
+    def build(cls, graph):
+        """Build the labels with one pruned Dijkstra per vertex, in decreasing degree order."""
+        if graph.is_directed():
+            raise ValueError("HubLabelIndex only supports undirected graphs.")
+        start = time.perf_counter()
+        csr = graph.to_csr()
+        n = csr.num_vertices()
+        adjacency = csr.adjacency_lists()
+        order = sorted(range(n), key=lambda i: -len(adjacency[i]))
+
+        inf = float('infinity')
+        label_hubs = [[] for _ in range(n)]     # rangos de hub (crecientes)
+        label_dists = [[] for _ in range(n)]
+        label_parents = [[] for _ in range(n)]
+        hub_dist = [inf] * (n + 1)              # distancias del hub actual indexadas por rango
+        dist = [inf] * n
+
+        for rank, hub in enumerate(order):
+            for r, d in zip(label_hubs[hub], label_dists[hub]):
+                hub_dist[r] = d
+            dist[hub] = 0
+            parent = {hub: -1}
+            visited = [hub]
+            heap = [(0, hub)]
+            while heap:
+                d, u = heapq.heappop(heap)
+                if d > dist[u]:
+                    continue
+                # Poda: si las etiquetas ya cubren la distancia, no se expande u.
+                pruned = False
+                for r, du in zip(label_hubs[u], label_dists[u]):
+                    if hub_dist[r] + du <= d:
+                        pruned = True
+                        break
+                if pruned:
+                    continue
+                label_hubs[u].append(rank)
+                label_dists[u].append(d)
+                label_parents[u].append(parent[u])
+                for v, w in adjacency[u]:
+                    nd = d + w
+                    if nd < dist[v]:
+                        if dist[v] == inf:
+                            visited.append(v)
+                        dist[v] = nd
+                        parent[v] = u
+                        heapq.heappush(heap, (nd, v))
+            for v in visited:
+                dist[v] = inf
+            for r in label_hubs[hub]:
+                hub_dist[r] = inf
+
+        offsets = np.zeros(n + 1, dtype=np.int64)
+        for i in range(n):
+            offsets[i + 1] = offsets[i] + len(label_hubs[i])
+        total = int(offsets[-1])
+        hubs = np.fromiter((r for lab in label_hubs for r in lab), dtype=np.int32, count=total)
+        dists = np.fromiter((d for lab in label_dists for d in lab), dtype=np.float64, count=total)
+        parents = np.fromiter((p for lab in label_parents for p in lab), dtype=np.int32, count=total)
+        return cls(csr.elements, np.asarray(order, dtype=np.int32), offsets, hubs, dists, parents,
+                   time.perf_counter() - start, csr.content_hash())
+
+    def _resolve(self, element):
+        i = self._position.get(element)
+        if i is None:
+            raise ValueError(f"Vertex {element} not found in index.")
+        return i
+
+    def _label(self, i):
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.hubs[start:end], self.dists[start:end], start
+
+    def _best_hub(self, u, v):
+        hubs_u, dists_u, start_u = self._label(u)
+        hubs_v, dists_v, start_v = self._label(v)
+        common, iu, iv = np.intersect1d(hubs_u, hubs_v, assume_unique=True, return_indices=True)
+        if not len(common):
+            return float('infinity'), None, None
+        totals = dists_u[iu] + dists_v[iv]
+        k = int(np.argmin(totals))
+        return float(totals[k]), start_u + int(iu[k]), start_v + int(iv[k])
+
+    def distance(self, u_element, v_element):
+        """Shortest-path distance between two elements (inf if disconnected)."""
+        u, v = self._resolve(u_element), self._resolve(v_element)
+        if u == v:
+            return 0.0
+        return self._best_hub(u, v)[0]
+
+    def _walk_to_hub(self, i, entry):
+        """Follow parent pointers from vertex i to the hub of its label entry."""
+        rank = self.hubs[entry]
+        hub = int(self.order[rank])
+        walk = [i]
+        while i != hub:
+            i = int(self.parents[entry])
+            walk.append(i)
+            # El padre fue expandido por la búsqueda del hub, así que tiene la entrada de ese rango.
+            hubs_i, _, start_i = self._label(i)
+            entry = start_i + int(np.searchsorted(hubs_i, rank))
+        return walk
+
+    def path(self, u_element, v_element):
+        """Shortest path between two elements as a list of elements, or None."""
+        u, v = self._resolve(u_element), self._resolve(v_element)
+        if u == v:
+            return [u_element]
+        total, entry_u, entry_v = self._best_hub(u, v)
+        if entry_u is None:
+            return None
+        to_hub = self._walk_to_hub(u, entry_u)
+        from_hub = self._walk_to_hub(v, entry_v)
+        return [self.elements[i] for i in to_hub + from_hub[-2::-1]]
+
+    def stats(self, num_queries=1000, seed=0):
+        """Build time, label size and average query latency over random pairs."""
+        n = len(self.elements)
+        sizes = np.diff(self.offsets)
+        latency_us = 0.0
+        if n > 1 and num_queries > 0:
+            rng = random.Random(seed)
+            pairs = [(self.elements[rng.randrange(n)], self.elements[rng.randrange(n)]) for _ in range(num_queries)]
+            start = time.perf_counter()
+            for a, b in pairs:
+                self.distance(a, b)
+            latency_us = (time.perf_counter() - start) / num_queries * 1e6
+        return {
+            'vertices': n,
+            'build_seconds': self.build_seconds,
+            'label_entries': int(self.offsets[-1]),
+            'avg_label_size': float(sizes.mean()) if n else 0.0,
+            'max_label_size': int(sizes.max()) if n else 0,
+            'index_bytes': int(self.offsets.nbytes + self.hubs.nbytes + self.dists.nbytes + self.parents.nbytes),
+            'avg_query_us': latency_us,
+        }
+
+    def save(self, path):
+        """Write the index to a .npz file (vertex elements must be all strings or all numbers)."""
+        elements = np.asarray(self.elements)  # Como CSRGraph.columns(): los ids numéricos siguen numéricos
+        # NumPy convertiría una mezcla de números y strings en strings sin avisar
+        if elements.dtype == object or len({isinstance(e, str) for e in self.elements}) > 1:
+            raise TypeError("Vertex elements must be all strings or all numbers to be saved.")
+        np.savez(path, elements=elements, order=self.order,
+                 offsets=self.offsets, hubs=self.hubs, dists=self.dists, parents=self.parents,
+                 build_seconds=np.float64(self.build_seconds), graph_hash=np.str_(self.graph_hash or ''))
+
+    @classmethod
+    def load(cls, path, graph=None):
+        """Read an index written by save(); with graph, reject it unless it was built on that graph."""
+        with np.load(path, allow_pickle=False) as data:
+            graph_hash = str(data['graph_hash']) if 'graph_hash' in data.files else ''
+            if graph is not None and graph_hash != graph.content_hash():
+                raise ValueError(f"Hub label index in {path} was built for a different graph.")
+            return cls(data['elements'].tolist(), data['order'], data['offsets'], data['hubs'],
+                       data['dists'], data['parents'], float(data['build_seconds']), graph_hash or None)
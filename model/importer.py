@@ -0,0 +1,300 @@
+import csv
+import json
+import math
+import os
+import time
+from .csr import ROLE_CODES
+from .graph import Graph, haversine_distance
+
+ROLE_ALIASES = {
+    'warehouse': 'warehouse', 'almacen': 'warehouse', 'almacén': 'warehouse', 'depot': 'warehouse',
+    'recharge': 'recharge', 'recarga': 'recharge', 'charger': 'recharge',
+    'client': 'client', 'cliente': 'client', 'customer': 'client',
+}
+NODE_FIELDS = {
+    'id': ('id', 'node', 'node_id', 'element'),
+    'role': ('role', 'type', 'tipo', 'rol'),
+    'lat': ('lat', 'latitude', 'latitud'),
+    'lon': ('lon', 'lng', 'longitude', 'longitud'),
+}
+EDGE_FIELDS = {
+    'u': ('u', 'source', 'from', 'origin', 'origen'),
+    'v': ('v', 'target', 'to', 'destination', 'destino'),
+    'weight': ('weight', 'cost', 'peso', 'distance'),
+}
+LINE_DELIMITED = ('.geojsonl', '.geojsons', '.geojsonseq', '.ndjson', '.jsonl')
+MAX_ERRORS_KEPT = 20
+
+
+class NetworkImportError(ValueError):
+    """Invalid row in an imported file (raised only when the importer is strict)."""
+
+
+def _column_map(header, fields):
+    names = [h.strip().lower() for h in header]
+    mapping = {}
+    for key, aliases in fields.items():
+        for alias in aliases:
+            if alias in names:
+                mapping[key] = names.index(alias)
+                break
+    return mapping
+
+
+def _csv_rows(path, fields, required):
+    """Yield (line number, {field: raw value}) from a CSV file with a header row."""
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        mapping = _column_map(header, fields)
+        missing = [key for key in required if key not in mapping]
+        if missing:
+            raise NetworkImportError(f"{path}: missing column(s) {missing}; header is {header}.")
+        for row in reader:
+            if not row:
+                continue
+            yield reader.line_num, {key: (row[i] if i < len(row) else '') for key, i in mapping.items()}
+
+
+def _geojson_features(path, buffer_size=1 << 16):
+    """Yield (feature number, feature dict) from a GeoJSON file without loading it whole.
+
+    A FeatureCollection is decoded one feature at a time with raw_decode over
+    a sliding buffer; line-delimited files (GeoJSONSeq / NDJSON) are read
+    line by line. The buffer never holds more than one feature plus a block.
+    """
+    if os.path.splitext(path)[1].lower() in LINE_DELIMITED:
+        with open(path, encoding='utf-8') as f:
+            for number, line in enumerate(f, 1):
+                line = line.strip().lstrip('\x1e')
+                if line:
+                    yield number, json.loads(line)
+        return
+
+    decoder = json.JSONDecoder()
+    with open(path, encoding='utf-8') as f:
+        buf = ''
+        start = -1
+        while start < 0:
+            block = f.read(buffer_size)
+            if not block:
+                raise NetworkImportError(f"{path}: no \"features\" array found.")
+            buf += block
+            key = buf.find('"features"')
+            if key >= 0:
+                start = buf.find('[', key)
+            else:
+                buf = buf[-len('"features"'):]
+        pos = start + 1
+        number = 0
+        eof = False
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buf) and buf[pos] == ']':
+                return
+            try:
+                if pos >= len(buf):
+                    raise json.JSONDecodeError("buffer exhausted", buf, pos)
+                feature, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise NetworkImportError(f"{path}: malformed feature #{number + 1}.")
+                block = f.read(buffer_size)
+                eof = not block
+                buf = buf[pos:] + block
+                pos = 0
+                continue
+            number += 1
+            yield number, feature
+            pos = end
+            if pos > buffer_size:
+                buf, pos = buf[pos:], 0
+
+
+def _geojson_node_rows(path):
+    for number, feature in _geojson_features(path):
+        props = feature.get('properties') or {}
+        coords = (feature.get('geometry') or {}).get('coordinates') or (None, None)
+        row = {'id': props.get('id', feature.get('id')), 'lon': coords[0], 'lat': coords[1]}
+        for alias in NODE_FIELDS['role']:
+            if alias in props:
+                row['role'] = props[alias]
+                break
+        yield number, row
+
+
+def _geojson_edge_rows(path):
+    for number, feature in _geojson_features(path):
+        props = feature.get('properties') or {}
+        row = {}
+        for key, aliases in EDGE_FIELDS.items():
+            for alias in aliases:
+                if alias in props:
+                    row[key] = props[alias]
+                    break
+        yield number, row
+
+
+class GraphImporter:
+    """Streaming loader of node and edge files into a Graph.
+
+    Files are read in chunks of chunk_size rows and every chunk goes into
+    the graph with one bulk insert, so memory stays bounded by the chunk
+    plus the graph being built. Formats are picked by extension: .csv (with
+    a header), .geojson/.json (FeatureCollection) or line-delimited GeoJSON.
+    Invalid rows raise when strict, otherwise they are skipped and counted
+    in the report.
+    """
+
+    def __init__(self, graph=None, directed=False, chunk_size=50000, strict=True):
+        self.graph = graph if graph is not None else Graph(directed=directed)
+        self.chunk_size = chunk_size
+        self.strict = strict
+        self._by_element = {v.element(): v for v in self.graph.vertices()}
+        self._phases = {}
+
+    def _reject(self, phase, path, number, message):
+        where = f"{os.path.basename(path)}:{number}"
+        if self.strict:
+            raise NetworkImportError(f"{where}: {message}")
+        phase['skipped'] += 1
+        if len(phase['errors']) < MAX_ERRORS_KEPT:
+            phase['errors'].append(f"{where}: {message}")
+
+    def _rows(self, path, fields, required, geojson_rows):
+        if os.path.splitext(path)[1].lower() == '.csv':
+            return _csv_rows(path, fields, required)
+        return geojson_rows(path)
+
+    def _run(self, name, path, rows, parse, flush):
+        phase = {'file': path, 'rows': 0, 'imported': 0, 'skipped': 0, 'errors': [], 'chunks': 0}
+        self._phases[name] = phase
+        start = time.perf_counter()
+        chunk = []
+        for number, raw in rows:
+            phase['rows'] += 1
+            parsed = parse(raw)
+            if isinstance(parsed, str):
+                self._reject(phase, path, number, parsed)
+                continue
+            chunk.append(parsed)
+            if len(chunk) >= self.chunk_size:
+                phase['imported'] += flush(chunk)
+                phase['chunks'] += 1
+                chunk = []
+        if chunk:
+            phase['imported'] += flush(chunk)
+            phase['chunks'] += 1
+        phase['seconds'] = time.perf_counter() - start
+        phase['rows_per_second'] = phase['rows'] / phase['seconds'] if phase['seconds'] else 0.0
+        return phase
+
+    def import_nodes(self, path):
+        """Import node rows (id, role, lat, lon). Returns the phase report."""
+        pending = set()
+
+        def parse(raw):
+            element = raw.get('id')
+            element = str(element).strip() if element is not None else ''
+            if not element:
+                return "missing node id"
+            if element in self._by_element or element in pending:
+                return f"duplicate node id '{element}'"
+            role = ROLE_ALIASES.get(str(raw.get('role') or '').strip().lower())
+            if role not in ROLE_CODES:
+                return f"invalid role '{raw.get('role')}' (expected one of {list(ROLE_CODES)})"
+            try:
+                lat, lon = float(raw.get('lat')), float(raw.get('lon'))
+            except (TypeError, ValueError):
+                return "latitude/longitude must be numbers"
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+                return f"coordinates out of range ({lat}, {lon})"
+            pending.add(element)
+            return element, role, lat, lon
+
+        def flush(chunk):
+            for v in self.graph.insert_vertices(chunk):
+                self._by_element[v.element()] = v
+            pending.clear()
+            return len(chunk)
+
+        rows = self._rows(path, NODE_FIELDS, ('id', 'role', 'lat', 'lon'), _geojson_node_rows)
+        return self._run('nodes', path, rows, parse, flush)
+
+    def import_edges(self, path):
+        """Import edge rows (u, v[, weight]); a missing weight is the haversine distance in km."""
+        by_element = self._by_element
+        directed = self.graph.is_directed()
+        pending = set()
+
+        def parse(raw):
+            u_element, v_element = str(raw.get('u') or '').strip(), str(raw.get('v') or '').strip()
+            u, v = by_element.get(u_element), by_element.get(v_element)
+            if u is None or v is None:
+                return f"unknown endpoint in edge ({u_element}, {v_element})"
+            if u is v:
+                return f"self-loop on '{u_element}'"
+            key = (u, v) if directed or id(u) < id(v) else (v, u)
+            if key in pending or self.graph.get_edge(u, v) is not None:
+                return f"duplicate edge ({u_element}, {v_element})"
+            weight = raw.get('weight')
+            if weight is None or (isinstance(weight, str) and not weight.strip()):
+                weight = round(haversine_distance(u.latitude(), u.longitude(), v.latitude(), v.longitude()), 2)
+            else:
+                try:
+                    weight = float(weight)
+                except (TypeError, ValueError):
+                    return f"weight '{weight}' is not a number"
+                if not math.isfinite(weight):  # float() acepta "nan" e "inf"
+                    return f"weight {weight} is not finite"
+                if weight < 0:
+                    return f"negative weight {weight}"
+            pending.add(key)
+            return u, v, weight
+
+        def flush(chunk):
+            count = self.graph.insert_edges(chunk)
+            pending.clear()
+            return count
+
+        rows = self._rows(path, EDGE_FIELDS, ('u', 'v'), _geojson_edge_rows)
+        return self._run('edges', path, rows, parse, flush)
+
+    def report(self):
+        """Per-phase counters and throughput, plus the resulting graph size."""
+        report = {name: dict(phase) for name, phase in self._phases.items()}
+        report['vertices'] = len(self._by_element)
+        report['seconds'] = sum(phase.get('seconds', 0.0) for phase in self._phases.values())
+        return report
+
+
+def import_network(nodes_path, edges_path, directed=False, chunk_size=50000, strict=True):
+    """Import a node file and an edge file into a new Graph. Returns (graph, report)."""
+    importer = GraphImporter(directed=directed, chunk_size=chunk_size, strict=strict)
+    importer.import_nodes(nodes_path)
+    importer.import_edges(edges_path)
+    return importer.graph, importer.report()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Import a node/edge network into the columnar graph format.")
+    parser.add_argument('nodes')
+    parser.add_argument('edges')
+    parser.add_argument('--directed', action='store_true')
+    parser.add_argument('--chunk-size', type=int, default=50000)
+    parser.add_argument('--lenient', action='store_true', help="skip invalid rows instead of failing")
+    parser.add_argument('--save', help="directory to write the imported graph to (Graph.save)")
+    args = parser.parse_args()
+    graph, report = import_network(args.nodes, args.edges, args.directed, args.chunk_size, not args.lenient)
+    for name in ('nodes', 'edges'):
+        phase = report[name]
+        print(f"{name}: {phase['imported']}/{phase['rows']} rows in {phase['seconds']:.2f} s "
+              f"({phase['rows_per_second']:,.0f} rows/s, {phase['skipped']} skipped)")
+        for error in phase['errors']:
+            print(f"  {error}")
+    if args.save:
+        print(f"saved to {args.save} (hash {graph.save(args.save)})")
@@ -0,0 +1,125 @@
+import random
+import time
+import numpy as np
+
+
+class LandmarkIndex:
+    """ALT (A*, landmarks, triangle inequality) preprocessing for undirected graphs.
+
+    For a landmark L, |d(L, t) - d(L, v)| <= d(v, t), so the maximum over all
+    landmarks is a consistent lower bound usable as an A* heuristic or to
+    discard candidates whose bound already exceeds a budget.
+    """
+
+    STRATEGIES = ('farthest', 'warehouse')
+
+    def __init__(self, graph, num_landmarks=4, strategy='farthest', seed=None):
+        if graph.is_directed():
+            raise ValueError("LandmarkIndex only supports undirected graphs.")
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown landmark strategy '{strategy}'. Options: {self.STRATEGIES}")
+        start = time.perf_counter()
+        self._graph_key = (graph._version, graph._weights_version)
+        vertices, _, by_element = graph._vertex_index()
+        self._by_element = by_element
+        self.strategy = strategy
+        self.landmarks = []
+        rows = []
+
+        if strategy == 'farthest':
+            candidates = [v.element() for v in vertices]
+        else:
+            candidates = [v.element() for v in vertices if v.type() == 'warehouse'] or [v.element() for v in vertices]
+        num_landmarks = min(num_landmarks, len(candidates))
+        if num_landmarks > 0:
+            rng = random.Random(seed)
+            # Selección por punto más lejano: cada landmark maximiza su distancia mínima a los anteriores.
+            first = rng.choice(candidates)
+            if strategy == 'farthest':
+                seed_row = self._distance_row(graph, first)
+                first = candidates[int(np.argmax(np.where(np.isinf(seed_row), -1, seed_row)))]
+            closest = np.full(len(vertices), np.inf)
+            current = first
+            candidate_idx = np.array([by_element[c] for c in candidates])
+            while True:
+                row = self._distance_row(graph, current)
+                self.landmarks.append(current)
+                rows.append(row)
+                if len(self.landmarks) == num_landmarks:
+                    break
+                closest = np.minimum(closest, row)
+                score = np.where(np.isinf(closest), -1.0, closest)[candidate_idx]
+                current = candidates[int(np.argmax(score))]
+
+        self.distances = np.vstack(rows) if rows else np.empty((0, len(vertices)))  # (k, n)
+        self._per_vertex = self.distances.T.tolist()
+        self.build_seconds = time.perf_counter() - start
+
+    @staticmethod
+    def _distance_row(graph, element):
+        return np.array(graph.shortest_paths(element)._dist, dtype=np.float64)
+
+    def is_current(self, graph):
+        """True while the graph structure and weights are those the index was built on.
+
+        After a weight increase the bounds stay valid (only looser); any other
+        change may break them, so callers should rebuild.
+        """
+        return self._graph_key == (graph._version, graph._weights_version)
+
+    def _bound(self, du, dt):
+        best = 0.0
+        for a, b in zip(du, dt):
+            if a == b:
+                continue
+            if a == float('inf') or b == float('inf'):
+                return float('inf')  # Distinta componente conexa
+            diff = a - b if a > b else b - a
+            if diff > best:
+                best = diff
+        return best
+
+    def lower_bound(self, u_element, t_element):
+        """Lower bound of the shortest-path distance between two elements."""
+        return self._bound(self._per_vertex[self._by_element[u_element]],
+                           self._per_vertex[self._by_element[t_element]])
+
+    def lower_bounds(self, u_element, t_elements):
+        """Vectorized lower_bound from u to every element of t_elements (NumPy array)."""
+        u = self._by_element[u_element]
+        targets = np.fromiter((self._by_element[t] for t in t_elements), dtype=np.int64, count=len(t_elements))
+        with np.errstate(invalid='ignore'):
+            diff = np.abs(self.distances[:, targets] - self.distances[:, u][:, None])
+            # inf - inf (ambos fuera de alcance del landmark) no aporta información.
+            bounds = np.fmax.reduce(diff, axis=0) if len(self.distances) else np.zeros(len(targets))
+        return np.nan_to_num(bounds, nan=0.0, posinf=np.inf)
+
+    def heuristic(self, goal_element):
+        """Return h(vertex) for Graph.astar towards goal_element."""
+        dt = self._per_vertex[self._by_element[goal_element]]
+        per_vertex, by_element, bound = self._per_vertex, self._by_element, self._bound
+        def h(vertex):
+            return bound(per_vertex[by_element[vertex.element()]], dt)
+        return h
+
+    def compare_settled(self, graph, queries):
+        """
+        Settled vertices per query for plain Dijkstra (stopping at the target),
+        geographic A* and ALT A* over the same (source, target) pairs.
+        """
+        totals = {'dijkstra': 0, 'geographic': 0, 'alt': 0}
+        for source, target in queries:
+            totals['dijkstra'] += graph.astar(source, target, heuristic=lambda v: 0).settled_count()
+            totals['geographic'] += graph.astar(source, target).settled_count()
+            totals['alt'] += graph.astar(source, target, heuristic=self.heuristic(target)).settled_count()
+        n = max(1, len(queries))
+        base = totals['dijkstra'] or 1
+        return {
+            'queries': len(queries),
+            'landmarks': list(self.landmarks),
+            'avg_settled_dijkstra': totals['dijkstra'] / n,
+            'avg_settled_geographic': totals['geographic'] / n,
+            'avg_settled_alt': totals['alt'] / n,
+            'alt_reduction_pct': 100.0 * (1 - totals['alt'] / base),
+            'geographic_reduction_pct': 100.0 * (1 - totals['geographic'] / base),
+        }
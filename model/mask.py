@@ -0,0 +1,98 @@
+class ClosureMask:
+    """Routing-time closure of edges and vertices (e.g. no-fly zones).
+
+    A mask never mutates the graph: searches receive it and simply skip the
+    closed edges and vertices, so shared caches stay valid.  Masks are
+    immutable and hashable, and compose with | (union of closures).
+    """
+    __slots__ = '_edges', '_vertices'
+
+    def __init__(self, edges=(), vertices=()):
+        """Build a mask from Edge and Vertex objects. See from_edges/from_polygon."""
+        self._edges = frozenset(edges)
+        self._vertices = frozenset(vertices)
+
+    @classmethod
+    def from_edges(cls, graph, element_pairs):
+        """Close the edges between the given (u_element, v_element) pairs."""
+        edges = []
+        for u_elem, v_elem in element_pairs:
+            u_vertex = graph.get_vertex_by_element(u_elem)
+            v_vertex = graph.get_vertex_by_element(v_elem)
+            edge = graph.get_edge(u_vertex, v_vertex) if u_vertex and v_vertex else None
+            if edge is None:
+                raise ValueError(f"Edge ({u_elem}, {v_elem}) not found in graph.")
+            edges.append(edge)
+        return cls(edges=edges)
+
+    @classmethod
+    def from_vertices(cls, graph, elements):
+        """Close the given vertices (and therefore every edge touching them)."""
+        vertices = []
+        for elem in elements:
+            vertex = graph.get_vertex_by_element(elem)
+            if vertex is None:
+                raise ValueError(f"Vertex {elem} not found in graph.")
+            vertices.append(vertex)
+        return cls(vertices=vertices)
+
+    @classmethod
+    def from_polygon(cls, graph, polygon):
+        """Close every vertex inside a polygon given as a list of (lat, lon) points."""
+        return cls(vertices=[v for v in graph.vertices()
+                             if point_in_polygon(v.latitude(), v.longitude(), polygon)])
+
+    def edges(self):
+        return self._edges
+
+    def vertices(self):
+        return self._vertices
+
+    def is_empty(self):
+        return not self._edges and not self._vertices
+
+    def blocks_edge(self, edge):
+        """True if the edge is closed directly or through one of its endpoints."""
+        if edge in self._edges:
+            return True
+        u_vertex, v_vertex = edge.endpoints()
+        return u_vertex in self._vertices or v_vertex in self._vertices
+
+    def blocks_path(self, graph, path_elements):
+        """True if a path (list of vertex elements) uses any closed vertex or edge."""
+        vertices = [graph.get_vertex_by_element(elem) for elem in path_elements]
+        if any(v in self._vertices for v in vertices):
+            return True
+        if self._edges:
+            for u_vertex, v_vertex in zip(vertices, vertices[1:]):
+                if graph.get_edge(u_vertex, v_vertex) in self._edges:
+                    return True
+        return False
+
+    def __or__(self, other):
+        if not isinstance(other, ClosureMask):
+            return NotImplemented
+        return ClosureMask(self._edges | other._edges, self._vertices | other._vertices)
+
+    def __eq__(self, other):
+        return isinstance(other, ClosureMask) and self._edges == other._edges and self._vertices == other._vertices
+
+    def __hash__(self):
+        return hash((self._edges, self._vertices))
+
+    def __repr__(self):
+        return f"ClosureMask(edges={len(self._edges)}, vertices={len(self._vertices)})"
+
+
+def point_in_polygon(lat, lon, polygon):
+    """Ray casting test for a point against a polygon of (lat, lon) vertices."""
+    inside = False
+    n = len(polygon)
+    for i in range(n):
+        lat1, lon1 = polygon[i]
+        lat2, lon2 = polygon[(i + 1) % n]
+        if (lon1 > lon) != (lon2 > lon):
+            cross_lat = lat1 + (lon - lon1) * (lat2 - lat1) / (lon2 - lon1)
+            if lat < cross_lat:
+                inside = not inside
+    return inside
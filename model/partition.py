@@ -0,0 +1,477 @@
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .csr import csr_dijkstra
+
+
+class GraphPartition:
+    """Balanced k-way partition of a graph's vertices into geographic regions.
+
+    Built multilevel: vertices are repeatedly contracted along heavy (short)
+    edges, the coarsest graph is split by recursive coordinate bisection on
+    lat/lon, and each level is projected back and refined by moving boundary
+    vertices whenever that removes cut edges without breaking the balance.
+    Vertex i is the i-th vertex of graph.to_csr().
+    """
+
+    def __init__(self, csr, regions, num_regions, graph_key=None, build_seconds=0.0):
+        """Do not call constructor directly. Use GraphPartition.build(graph, num_regions)."""
+        self.csr = csr
+        self.regions = regions          # int32, región de cada vértice
+        self.num_regions = num_regions
+        self.build_seconds = build_seconds
+        self._graph_key = graph_key
+        src = np.repeat(np.arange(csr.num_vertices(), dtype=np.int64), np.diff(csr.indptr))
+        self._cut_arcs = np.nonzero(regions[src] != regions[csr.indices])[0]
+        self._arc_sources = src
+
+    @classmethod
+    def build(cls, graph, num_regions, imbalance=1.05, seed=None, refine_passes=8):
+        """Partition graph into num_regions regions of at most imbalance x the average size."""
+        if num_regions < 1:
+            raise ValueError("num_regions must be at least 1.")
+        start = time.perf_counter()
+        csr = graph.to_csr()
+        n = csr.num_vertices()
+        num_regions = min(num_regions, max(1, n))
+        rng = random.Random(seed)
+
+        level = _Level.from_csr(csr)
+        levels = [level]
+        maps = []
+        target = max(20 * num_regions, 2 * num_regions)
+        while level.size() > target:
+            coarse, mapping = level.coarsen(rng, max_weight=max(1, n // (4 * num_regions)))
+            if coarse.size() > 0.9 * level.size():
+                break
+            levels.append(coarse)
+            maps.append(mapping)
+            level = coarse
+
+        max_weight = max(1, math.ceil(n / num_regions * imbalance))
+        regions = level.bisect(num_regions)
+        for depth in range(len(levels) - 1, -1, -1):
+            if depth < len(levels) - 1:
+                regions = [regions[c] for c in maps[depth]]
+            levels[depth].refine(regions, num_regions, max_weight, refine_passes)
+
+        return cls(csr, np.asarray(regions, dtype=np.int32), num_regions,
+                   (graph._version, graph._weights_version), time.perf_counter() - start)
+
+    def is_current(self, graph):
+        """True while the graph structure and weights are those the partition was built on."""
+        return self._graph_key == (graph._version, graph._weights_version)
+
+    def region_of(self, element):
+        i = self.csr.index_of(element)
+        if i is None:
+            raise ValueError(f"Vertex {element} not found in partition.")
+        return int(self.regions[i])
+
+    def boundary_vertices(self):
+        """Indices of vertices with at least one arc to (or from) another region."""
+        return np.unique(np.concatenate((self._arc_sources[self._cut_arcs],
+                                         self.csr.indices[self._cut_arcs].astype(np.int64))))
+
+    def cut_arcs(self):
+        """(source, target, weight) arrays of the arcs crossing regions."""
+        arcs = self._cut_arcs
+        return self._arc_sources[arcs], self.csr.indices[arcs].astype(np.int64), self.csr.weights[arcs]
+
+    def shards(self):
+        """One RegionShard per region."""
+        boundary = np.zeros(self.csr.num_vertices(), dtype=bool)
+        boundary[self.boundary_vertices()] = True
+        return [RegionShard.from_partition(self, r, boundary) for r in range(self.num_regions)]
+
+    def stats(self):
+        sizes = np.bincount(self.regions, minlength=self.num_regions)
+        arcs = self.csr.num_arcs()
+        cut = len(self._cut_arcs)
+        if not self.csr.directed:
+            arcs //= 2
+            cut //= 2
+        return {
+            'vertices': self.csr.num_vertices(),
+            'regions': self.num_regions,
+            'region_sizes': sizes.tolist(),
+            'imbalance': float(sizes.max() / sizes.mean()) if len(sizes) and sizes.mean() else 0.0,
+            'edges': arcs,
+            'cut_edges': cut,
+            'cut_fraction': cut / arcs if arcs else 0.0,
+            'boundary_vertices': len(self.boundary_vertices()),
+            'build_seconds': self.build_seconds,
+        }
+
+
+class _Level:
+    """One level of the multilevel hierarchy: weighted vertices, centroids and symmetric adjacency.
+
+    adjacency[u] maps a neighbor to [edge count, affinity]; the count is what
+    the partition cuts, the affinity (higher for shorter edges) guides matching.
+    """
+
+    def __init__(self, weights, xs, ys, adjacency):
+        self.weights = weights
+        self.xs = xs
+        self.ys = ys
+        self.adjacency = adjacency
+
+    @classmethod
+    def from_csr(cls, csr):
+        n = csr.num_vertices()
+        lat = np.nan_to_num(csr.latitudes.astype(np.float64))
+        lon = np.nan_to_num(csr.longitudes.astype(np.float64))
+        # Proyección equirectangular: las distancias en x e y quedan comparables.
+        scale = math.cos(math.radians(float(lat.mean()))) if n else 1.0
+        mean_w = float(csr.weights.mean()) if len(csr.weights) else 1.0
+        mean_w = mean_w if mean_w > 0 else 1.0
+        adjacency = [{} for _ in range(n)]
+        indptr, indices, weights = csr.indptr.tolist(), csr.indices.tolist(), csr.weights.tolist()
+        for u in range(n):
+            for k in range(indptr[u], indptr[u + 1]):
+                v = indices[k]
+                if v == u:
+                    continue
+                affinity = mean_w / (weights[k] + mean_w)
+                # Los arcos de un grafo no dirigido aparecen en ambos sentidos; se cuentan una vez.
+                share = 0.5 if not csr.directed else 1.0
+                for a, b in ((u, v), (v, u)):
+                    entry = adjacency[a].get(b)
+                    if entry is None:
+                        adjacency[a][b] = [share, affinity * share]
+                    else:
+                        entry[0] += share
+                        entry[1] += affinity * share
+        return cls([1] * n, (lon * scale).tolist(), lat.tolist(), adjacency)
+
+    def size(self):
+        return len(self.weights)
+
+    def coarsen(self, rng, max_weight):
+        """Heavy-edge matching. Returns (coarse level, fine -> coarse mapping)."""
+        n = self.size()
+        order = list(range(n))
+        rng.shuffle(order)
+        mapping = [-1] * n
+        weights, xs, ys = [], [], []
+        for u in order:
+            if mapping[u] >= 0:
+                continue
+            best, best_affinity = -1, 0.0
+            for v, (_, affinity) in self.adjacency[u].items():
+                if mapping[v] < 0 and affinity > best_affinity and self.weights[u] + self.weights[v] <= max_weight:
+                    best, best_affinity = v, affinity
+            c = len(weights)
+            mapping[u] = c
+            members = (u,) if best < 0 else (u, best)
+            if best >= 0:
+                mapping[best] = c
+            w = sum(self.weights[m] for m in members)
+            weights.append(w)
+            xs.append(sum(self.xs[m] * self.weights[m] for m in members) / w)
+            ys.append(sum(self.ys[m] * self.weights[m] for m in members) / w)
+
+        adjacency = [{} for _ in weights]
+        for u in range(n):
+            cu = mapping[u]
+            for v, (count, affinity) in self.adjacency[u].items():
+                cv = mapping[v]
+                if cu == cv:
+                    continue
+                entry = adjacency[cu].get(cv)
+                if entry is None:
+                    adjacency[cu][cv] = [count, affinity]
+                else:
+                    entry[0] += count
+                    entry[1] += affinity
+        return _Level(weights, xs, ys, adjacency), mapping
+
+    def bisect(self, num_regions):
+        """Initial partition by recursive coordinate bisection, splitting weight k1:k2."""
+        regions = [0] * self.size()
+        stack = [(list(range(self.size())), num_regions, 0)]
+        while stack:
+            ids, k, first = stack.pop()
+            if k == 1 or len(ids) <= 1:
+                for i in ids:
+                    regions[i] = first
+                continue
+            k1 = k // 2
+            xs = [self.xs[i] for i in ids]
+            ys = [self.ys[i] for i in ids]
+            coords = self.xs if max(xs) - min(xs) >= max(ys) - min(ys) else self.ys
+            ids.sort(key=lambda i: coords[i])
+            total = sum(self.weights[i] for i in ids)
+            goal = total * k1 / k
+            acc, cut = 0, 0
+            while cut < len(ids) - 1 and acc + self.weights[ids[cut]] / 2 <= goal:
+                acc += self.weights[ids[cut]]
+                cut += 1
+            cut = max(1, cut)
+            stack.append((ids[:cut], k1, first))
+            stack.append((ids[cut:], k - k1, first + k1))
+        return regions
+
+    def refine(self, regions, num_regions, max_weight, passes):
+        """Greedy boundary refinement in place: first restore balance, then reduce the cut."""
+        load = [0] * num_regions
+        for i, r in enumerate(regions):
+            load[r] += self.weights[i]
+
+        def connectivity(u):
+            conn = {}
+            for v, (count, _) in self.adjacency[u].items():
+                conn[regions[v]] = conn.get(regions[v], 0) + count
+            return conn
+
+        def move(u, target):
+            load[regions[u]] -= self.weights[u]
+            load[target] += self.weights[u]
+            regions[u] = target
+
+        # Equilibrio: las regiones sobrecargadas ceden vértices frontera con la menor pérdida.
+        for _ in range(passes):
+            overloaded = {r for r in range(num_regions) if load[r] > max_weight}
+            if not overloaded:
+                break
+            moved = False
+            for u in range(self.size()):
+                r = regions[u]
+                if r not in overloaded or load[r] <= max_weight:
+                    continue
+                conn = connectivity(u)
+                options = [(c - conn.get(r, 0), t) for t, c in conn.items()
+                           if t != r and load[t] + self.weights[u] <= max_weight]
+                if options:
+                    move(u, max(options)[1])
+                    moved = True
+            if not moved:
+                break
+
+        for _ in range(passes):
+            moved = False
+            for u in range(self.size()):
+                r = regions[u]
+                conn = connectivity(u)
+                if len(conn) < 2 and r in conn:
+                    continue
+                if load[r] - self.weights[u] <= 0:
+                    continue
+                internal = conn.get(r, 0)
+                best_gain, best_target = 0, None
+                for t, c in conn.items():
+                    if t == r or load[t] + self.weights[u] > max_weight:
+                        continue
+                    gain = c - internal
+                    # Con ganancia nula solo se mueve si mejora el equilibrio.
+                    if gain > best_gain or (gain == best_gain == 0 and best_target is None
+                                            and load[t] + self.weights[u] < load[r]):
+                        best_gain, best_target = gain, t
+                if best_target is not None:
+                    move(u, best_target)
+                    moved = True
+            if not moved:
+                break
+
+
+class RegionShard:
+    """The vertices of one region with the arcs between them.
+
+    Holds only plain arrays (local CSR, global ids, boundary flags), so a
+    shard can be pickled with to_payload() and served by a worker process.
+    Local index i corresponds to global vertex global_ids[i].
+    """
+
+    def __init__(self, region, global_ids, indptr, indices, weights, boundary):
+        self.region = region
+        self.global_ids = global_ids    # int64, local -> índice global
+        self.indptr = indptr            # int64
+        self.indices = indices          # int32, índices locales
+        self.weights = weights          # float64
+        self.boundary = boundary        # int32, índices locales de los vértices frontera
+        self._adjacency = None
+        self._local = None
+
+    @classmethod
+    def from_partition(cls, partition, region, boundary_mask):
+        csr = partition.csr
+        members = np.nonzero(partition.regions == region)[0]
+        local = np.full(csr.num_vertices(), -1, dtype=np.int64)
+        local[members] = np.arange(len(members))
+        starts, ends = csr.indptr[members], csr.indptr[members + 1]
+        arcs = np.concatenate([np.arange(s, e) for s, e in zip(starts, ends)]) if len(members) else np.empty(0, np.int64)
+        arcs = arcs.astype(np.int64)
+        owners = np.repeat(np.arange(len(members)), ends - starts)
+        keep = local[csr.indices[arcs]] >= 0
+        indptr = np.zeros(len(members) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(owners[keep], minlength=len(members)), out=indptr[1:])
+        return cls(region, members.astype(np.int64), indptr,
+                   local[csr.indices[arcs[keep]]].astype(np.int32), csr.weights[arcs[keep]],
+                   np.nonzero(boundary_mask[members])[0].astype(np.int32))
+
+    def to_payload(self):
+        return {'region': self.region, 'global_ids': self.global_ids, 'indptr': self.indptr,
+                'indices': self.indices, 'weights': self.weights, 'boundary': self.boundary}
+
+    @classmethod
+    def from_payload(cls, payload):
+        return cls(**payload)
+
+    def num_vertices(self):
+        return len(self.global_ids)
+
+    def local_index(self, global_index):
+        if self._local is None:
+            self._local = {g: i for i, g in enumerate(self.global_ids.tolist())}
+        return self._local.get(global_index)
+
+    def adjacency(self):
+        if self._adjacency is None:
+            indptr, indices, weights = self.indptr.tolist(), self.indices.tolist(), self.weights.tolist()
+            self._adjacency = [list(zip(indices[indptr[i]:indptr[i + 1]], weights[indptr[i]:indptr[i + 1]]))
+                               for i in range(self.num_vertices())]
+        return self._adjacency
+
+    def search(self, sources):
+        """Dijkstra inside the shard from (local index, initial distance) pairs."""
+        return csr_dijkstra(self.adjacency(), sources)
+
+    def boundary_table(self):
+        """(b, b) matrix of shortest in-region distances between boundary vertices."""
+        boundary = self.boundary.tolist()
+        table = np.full((len(boundary), len(boundary)), np.inf)
+        for row, b in enumerate(boundary):
+            dist, _ = self.search([(b, 0.0)])
+            table[row] = [dist[c] for c in boundary]
+        return table
+
+
+def _boundary_table(payload):
+    """Worker entry point: rebuild the shard from its payload and compute its boundary table."""
+    return RegionShard.from_payload(payload).boundary_table()
+
+
+class RegionRouter:
+    """Exact shortest paths over a partitioned graph.
+
+    The overlay graph has every boundary vertex as a node, the cut arcs as
+    edges, and one shortcut per pair of boundary vertices of the same region
+    weighted by their in-region distance. A query searches the source shard,
+    continues over the overlay from the source's boundary and finishes in
+    the target shard; when the target shares the source's region and no
+    boundary vertex is closer than it, only that shard is searched.
+    """
+
+    def __init__(self, partition, processes=None):
+        self.partition = partition
+        self.shards = partition.shards()
+        self.build_seconds = 0.0
+        start = time.perf_counter()
+        if processes and processes > 1 and len(self.shards) > 1:
+            with ProcessPoolExecutor(max_workers=processes) as pool:
+                tables = list(pool.map(_boundary_table, [s.to_payload() for s in self.shards]))
+        else:
+            tables = [s.boundary_table() for s in self.shards]
+        self._build_overlay(tables)
+        self.build_seconds = time.perf_counter() - start
+
+    def _build_overlay(self, tables):
+        nodes = self.partition.boundary_vertices().tolist()
+        self._overlay_nodes = nodes
+        self._overlay_index = {g: i for i, g in enumerate(nodes)}
+        best = {}   # (a, b) -> (peso, región del atajo o -1 para un arco de corte)
+        for shard, table in zip(self.shards, tables):
+            ids = [self._overlay_index[int(shard.global_ids[b])] for b in shard.boundary.tolist()]
+            for i, a in enumerate(ids):
+                for j, b in enumerate(ids):
+                    w = table[i, j]
+                    if i != j and w != np.inf and w < best.get((a, b), (np.inf,))[0]:
+                        best[(a, b)] = (float(w), shard.region)
+        for u, v, w in zip(*(arr.tolist() for arr in self.partition.cut_arcs())):
+            key = (self._overlay_index[u], self._overlay_index[v])
+            if w < best.get(key, (np.inf,))[0]:
+                best[key] = (w, -1)
+        self._overlay = [[] for _ in nodes]
+        self._overlay_via = {}
+        for (a, b), (w, via) in best.items():
+            self._overlay[a].append((b, w))
+            self._overlay_via[(a, b)] = via
+
+    def overlay_size(self):
+        """(nodes, arcs) of the overlay graph."""
+        return len(self._overlay_nodes), len(self._overlay_via)
+
+    def _shard_of(self, global_index):
+        shard = self.shards[int(self.partition.regions[global_index])]
+        return shard, shard.local_index(global_index)
+
+    def _query(self, source, target):
+        csr = self.partition.csr
+        s, t = csr.index_of(source), csr.index_of(target)
+        if s is None or t is None:
+            raise ValueError("Source or target vertex not found in partition.")
+        shard_s, ls = self._shard_of(s)
+        shard_t, lt = self._shard_of(t)
+        dist_s, pred_s = shard_s.search([(ls, 0.0)])
+        local_best = dist_s[lt] if shard_s is shard_t else np.inf
+
+        seeds = [(self._overlay_index[int(shard_s.global_ids[b])], dist_s[b])
+                 for b in shard_s.boundary.tolist() if dist_s[b] < local_best]
+        if not seeds:
+            return local_best, ('local', shard_s, pred_s, lt)
+        dist_o, pred_o = csr_dijkstra(self._overlay, seeds)
+        finish = [(b, dist_o[self._overlay_index[int(shard_t.global_ids[b])]]) for b in shard_t.boundary.tolist()]
+        finish = [(b, d) for b, d in finish if d < local_best]
+        if not finish:
+            return local_best, ('local', shard_s, pred_s, lt)
+        dist_t, pred_t = shard_t.search(finish)
+        if dist_t[lt] >= local_best:
+            return local_best, ('local', shard_s, pred_s, lt)
+        return dist_t[lt], ('overlay', shard_s, pred_s, dist_o, pred_o, shard_t, pred_t, lt)
+
+    def distance(self, source, target):
+        """Shortest-path distance between two elements (inf if unreachable)."""
+        return float(self._query(source, target)[0])
+
+    def route(self, source, target):
+        """Return (path as a list of elements, cost), or (None, inf) if unreachable."""
+        cost, trace = self._query(source, target)
+        if cost == np.inf:
+            return None, float('infinity')
+        elements = self.partition.csr.elements
+        if trace[0] == 'local':
+            _, shard, pred, lt = trace
+            return [elements[g] for g in self._unwind(shard, pred, lt)], float(cost)
+
+        _, shard_s, pred_s, dist_o, pred_o, shard_t, pred_t, lt = trace
+        # Tramo final dentro de la región destino, hasta el vértice frontera de entrada.
+        tail = self._unwind(shard_t, pred_t, lt)
+        o = self._overlay_index[tail[0]]
+        middle = [tail[0]]
+        while pred_o[o] >= 0:
+            p = pred_o[o]
+            via = self._overlay_via[(p, o)]
+            a, b = self._overlay_nodes[p], self._overlay_nodes[o]
+            if via < 0:
+                middle.append(a)
+            else:
+                shard = self.shards[via]
+                la, lb = shard.local_index(a), shard.local_index(b)
+                _, pred = shard.search([(la, 0.0)])
+                middle.extend(reversed(self._unwind(shard, pred, lb)[:-1]))
+            o = p
+        head = self._unwind(shard_s, pred_s, shard_s.local_index(middle[-1]))
+        path = head[:-1] + middle[::-1] + tail[1:]
+        return [elements[g] for g in path], float(cost)
+
+    @staticmethod
+    def _unwind(shard, pred, local):
+        """Global indices from the search root to local, following shard predecessors."""
+        walk = []
+        while local >= 0:
+            walk.append(int(shard.global_ids[local]))
+            local = pred[local]
+        return walk[::-1]
@@ -0,0 +1,156 @@
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import NamedTuple
+import numpy as np
+from .csr import COLUMNS, CSRGraph, csr_array_dijkstra
+
+_ALIGN = 64
+
+
+class SharedGraphHandle(NamedTuple):
+    """Picklable description of a published graph: block name plus column layout.
+
+    layout holds one (column, dtype string, shape, byte offset) entry per
+    CSR column. Sending a handle to a worker costs the same whatever the
+    graph size.
+    """
+    name: str
+    layout: tuple
+    directed: bool
+    nbytes: int
+
+
+class SharedGraph:
+    """A CSR snapshot living in a multiprocessing.shared_memory block.
+
+    The publishing process creates the block with publish(graph) and owns
+    it; workers attach(handle) and get zero-copy NumPy views over the same
+    memory. Every process calls close() when done with its views. Only the
+    owner calls unlink(), once no one needs the block any more. Used as a
+    context manager, it closes on exit and the owner also unlinks.
+    """
+
+    def __init__(self, block, handle, owner):
+        """Do not call constructor directly. Use SharedGraph.publish(graph) or attach(handle)."""
+        self._block = block
+        self.handle = handle
+        self.owner = owner
+        self._csr = None
+
+    @classmethod
+    def publish(cls, graph_or_csr):
+        """Copy the graph's CSR snapshot into a new shared memory block."""
+        csr = graph_or_csr.to_csr() if hasattr(graph_or_csr, 'to_csr') else graph_or_csr
+        columns = csr.columns()
+        if columns['elements'].dtype == object:
+            raise TypeError("Vertex elements must be all strings or all numbers to be shared.")
+        layout = []
+        offset = 0
+        for name in COLUMNS:
+            array = columns[name]
+            layout.append((name, array.dtype.str, array.shape, offset))
+            offset += -(-array.nbytes // _ALIGN) * _ALIGN
+        block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        handle = SharedGraphHandle(block.name, tuple(layout), bool(csr.directed), offset)
+        shared = cls(block, handle, owner=True)
+        for name in COLUMNS:
+            shared.view(name)[...] = columns[name]
+        return shared
+
+    @classmethod
+    def attach(cls, handle):
+        """Map an existing block by name. The caller must close() it, never unlink()."""
+        if sys.version_info >= (3, 13):
+            block = shared_memory.SharedMemory(name=handle.name, track=False)
+        else:
+            block = shared_memory.SharedMemory(name=handle.name)
+        return cls(block, handle, owner=False)
+
+    def view(self, column):
+        """Zero-copy NumPy view of one column of the block."""
+        if self._block is None:
+            raise ValueError("Shared graph is closed.")
+        for name, dtype, shape, offset in self.handle.layout:
+            if name == column:
+                return np.ndarray(shape, dtype=np.dtype(dtype), buffer=self._block.buf, offset=offset)
+        raise KeyError(column)
+
+    def csr(self):
+        """CSRGraph whose columns are views into the shared block (elements stay a NumPy array)."""
+        if self._csr is None:
+            self._csr = CSRGraph(*(self.view(c) for c in COLUMNS), directed=self.handle.directed)
+        return self._csr
+
+    def close(self):
+        """Drop this process's mapping. Views obtained earlier must not be used afterwards."""
+        if self._block is not None:
+            self._csr = None
+            self._block.close()
+            self._block = None
+
+    def unlink(self):
+        """Free the block (owner only). Attached processes keep their mapping until they close."""
+        if not self.owner:
+            raise ValueError("Only the publishing process can unlink a shared graph.")
+        block = self._block or shared_memory.SharedMemory(name=self.handle.name)
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
+        finally:
+            if block is not self._block:
+                block.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.owner:
+            self.unlink()
+        self.close()
+
+
+_attached = {}  # Por proceso: nombre del bloque -> SharedGraph
+
+
+def attach_csr(handle):
+    """CSRGraph for handle in the current process, attaching the block only on first use."""
+    shared = _attached.get(handle.name)
+    if shared is None:
+        shared = _attached[handle.name] = SharedGraph.attach(handle)
+    return shared.csr()
+
+
+def detach_all():
+    """Close every block attached through attach_csr in this process."""
+    for shared in _attached.values():
+        shared.close()
+    _attached.clear()
+
+
+def _distance_rows(handle, sources):
+    csr = attach_csr(handle)  # Dijkstra directo sobre las vistas compartidas, sin copiar el grafo
+    return [csr_array_dijkstra(csr, [(s, 0.0)])[0] for s in sources]
+
+
+def parallel_distance_rows(graph, elements, processes=None, chunk_size=8):
+    """
+    Single-source distance rows for elements, computed in a process pool that
+    reads the graph from shared memory instead of unpickling it per task.
+    Returns a (len(elements), n) array in the order of graph.to_csr().
+    """
+    csr = graph.to_csr()
+    sources = []
+    for element in elements:
+        i = csr.index_of(element)
+        if i is None:
+            raise ValueError(f"Vertex {element} not found in graph.")
+        sources.append(i)
+    chunks = [sources[i:i + chunk_size] for i in range(0, len(sources), chunk_size)]
+    rows = []
+    with SharedGraph.publish(csr) as shared:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            for chunk_rows in pool.map(_distance_rows, [shared.handle] * len(chunks), chunks):
+                rows.extend(chunk_rows)
+    return np.array(rows, dtype=np.float64).reshape(len(sources), csr.num_vertices())
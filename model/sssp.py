@@ -0,0 +1,171 @@
+import heapq
+
+
+class ShortestPathResult:
+    """Single-source shortest path tree backed by index arrays.
+
+    Distances and predecessors are kept as flat lists indexed by the graph's
+    vertex positions; element-keyed answers are produced on demand, so a
+    caller that needs a single distance or path pays nothing for the rest.
+    """
+    __slots__ = '_source', '_vertices', '_position', '_dist', '_pred', '_settled', '_version'
+
+    def __init__(self, source, vertices, position, dist, pred, settled=0, version=None):
+        """Do not call constructor directly. Use Graph's shortest_paths(start)."""
+        self._source = source
+        self._vertices = vertices      # index -> Vertex
+        self._position = position      # element -> index
+        self._dist = dist              # index -> float distance (inf if unreachable)
+        self._pred = pred              # index -> predecessor index (-1 for none)
+        self._settled = settled
+        self._version = version        # Versión estructural del grafo al construirse
+
+    def graph_version(self):
+        """Structure version of the graph this tree was computed on."""
+        return self._version
+
+    def source(self):
+        """Return the element the search started from."""
+        return self._source
+
+    def settled_count(self):
+        """Number of vertices settled by the search that produced this tree."""
+        return self._settled
+
+    def _idx(self, element):
+        return self._position.get(element)
+
+    def distance(self, element):
+        """Return the shortest distance to element (inf if unreachable or unknown)."""
+        i = self._idx(element)
+        return self._dist[i] if i is not None else float('infinity')
+
+    def predecessor(self, element):
+        """Return the predecessor element of element in the tree, or None."""
+        i = self._idx(element)
+        if i is None or self._pred[i] < 0:
+            return None
+        return self._vertices[self._pred[i]].element()
+
+    def path_to(self, element):
+        """Return the list of elements from the source to element, or None."""
+        i = self._idx(element)
+        if i is None or self._dist[i] == float('infinity'):
+            return None
+        path = []
+        while i >= 0:
+            path.append(self._vertices[i].element())
+            i = self._pred[i]
+        return path[::-1]
+
+    def distances(self, elements):
+        """Return the list of distances to each of elements (inf if unreachable or unknown)."""
+        dist, position, inf = self._dist, self._position, float('infinity')
+        return [dist[position[e]] if e in position else inf for e in elements]
+
+    def is_reachable(self, element):
+        return self.distance(element) != float('infinity')
+
+    def __contains__(self, element):
+        return self.is_reachable(element)
+
+    def __iter__(self):
+        """Yield (element, distance) for every reachable vertex."""
+        inf = float('infinity')
+        for i, d in enumerate(self._dist):
+            if d != inf:
+                yield self._vertices[i].element(), d
+
+    def to_dicts(self):
+        """Return the (distances, predecessors) element-keyed dicts of Graph.dijkstra."""
+        dist_by_element = {}
+        pred_by_element = {}
+        for i, v in enumerate(self._vertices):
+            dist_by_element[v.element()] = self._dist[i]
+            p = self._pred[i]
+            pred_by_element[v.element()] = self._vertices[p].element() if p >= 0 else None
+        return dist_by_element, pred_by_element
+
+    def repair(self, graph, edge, old_weight):
+        """Update the tree in place after edge's weight changed from old_weight.
+
+        Ramalingam-Reps style: a decrease propagates improvements outward from
+        the edge, an increase on a tree edge resets and re-settles only the
+        subtree hanging below it. Returns the set of vertex indices whose
+        distance or predecessor may have changed. The graph structure must be
+        unchanged since the tree was computed (see graph_version).
+        """
+        new_weight = edge.element()
+        if new_weight == old_weight:
+            return set()
+        vertices = self._vertices
+        _, position, _ = graph._vertex_index()
+        dist, pred = self._dist, self._pred
+        u_vertex, v_vertex = edge.endpoints()
+        arcs = [(position[u_vertex], position[v_vertex])]
+        if not graph.is_directed():
+            arcs.append((position[v_vertex], position[u_vertex]))
+
+        changed = set()
+        heap = []
+        if new_weight < old_weight:
+            for x, y in arcs:
+                if dist[x] + new_weight < dist[y]:
+                    dist[y] = dist[x] + new_weight
+                    pred[y] = x
+                    changed.add(y)
+                    heapq.heappush(heap, (dist[y], y))
+            allowed = None
+        else:
+            roots = [y for x, y in arcs if pred[y] == x]
+            if not roots:
+                return changed
+            children = {}
+            for i, p in enumerate(pred):
+                if p >= 0:
+                    children.setdefault(p, []).append(i)
+            affected = set()
+            stack = list(roots)
+            while stack:
+                i = stack.pop()
+                if i in affected:
+                    continue
+                affected.add(i)
+                stack.extend(children.get(i, ()))
+            inf = float('infinity')
+            for i in affected:
+                dist[i] = inf
+                pred[i] = -1
+            # Distancia tentativa de cada vértice afectado desde sus vecinos no afectados.
+            incoming = graph._incoming
+            for i in affected:
+                for w_vertex, in_edge in incoming[vertices[i]].items():
+                    w = position[w_vertex]
+                    if w not in affected and dist[w] + in_edge.element() < dist[i]:
+                        dist[i] = dist[w] + in_edge.element()
+                        pred[i] = w
+                if dist[i] != inf:
+                    heapq.heappush(heap, (dist[i], i))
+            changed = affected
+            allowed = affected
+
+        outgoing = graph._outgoing
+        while heap:
+            cost, i = heapq.heappop(heap)
+            if cost > dist[i]:
+                continue
+            for w_vertex, out_edge in outgoing[vertices[i]].items():
+                w = position[w_vertex]
+                if allowed is not None and w not in allowed:
+                    continue
+                new_cost = cost + out_edge.element()
+                if new_cost < dist[w]:
+                    dist[w] = new_cost
+                    pred[w] = i
+                    changed.add(w)
+                    heapq.heappush(heap, (new_cost, w))
+        return changed
+
+    def elements(self, indices):
+        """Translate vertex indices (as returned by repair) into elements."""
+        return {self._vertices[i].element() for i in indices}
@@ -0,0 +1,178 @@
+import random
+import time
+from domain.cliente import Client
+from domain.orden import Order
+from model.graph import Graph
+from model.landmarks import LandmarkIndex
+from sim.rutas import RouteManager
+from sim.events import DeliverySimulation, EventEngine
+from sim.fleet import Dispatcher, Fleet
+from tda.priority_queue import FRONTIERS, set_frontier_policy
+
+
+def _random_graph(num_nodes, edges_per_node, seed):
+    state = random.getstate()
+    random.seed(seed)
+    graph = Graph(directed=False)
+    graph.generate_random_graph(num_nodes, num_nodes * edges_per_node, 20, 20)
+    random.setstate(state)
+    return graph
+
+
+def benchmark_frontiers(sizes=(50, 150, 500, 1500), edges_per_node=3, num_sources=20, seed=42):
+    """
+    Mide el tiempo de Dijkstra con cada backend de cola de prioridad para varios
+    tamaños de grafo. Retorna {tamaño: {backend: segundos}} usando los mismos
+    orígenes para todos los backends.
+    """
+    results = {}
+    for size in sizes:
+        graph = _random_graph(size, edges_per_node, seed)
+        elements = [v.element() for v in graph.vertices()]
+        sources = random.Random(seed).sample(elements, min(num_sources, len(elements)))
+        timings = {}
+        for name in FRONTIERS:
+            start = time.perf_counter()
+            for source in sources:
+                graph.shortest_paths(source, frontier=name)
+            timings[name] = time.perf_counter() - start
+        results[size] = timings
+    return results
+
+
+def frontier_policy_from_benchmark(results):
+    """Convierte el resultado de benchmark_frontiers en una política [(max_vertices, backend)]."""
+    policy = []
+    sizes = sorted(results)
+    for i, size in enumerate(sizes):
+        best = min(results[size], key=results[size].get)
+        limit = sizes[i + 1] - 1 if i + 1 < len(sizes) else float('inf')
+        if policy and policy[-1][1] == best:
+            policy[-1] = (limit, best)
+        else:
+            policy.append((limit, best))
+    return policy
+
+
+def calibrate_frontier_policy(**kwargs):
+    """Ejecuta el benchmark y aplica la política resultante a las búsquedas del grafo."""
+    results = benchmark_frontiers(**kwargs)
+    policy = frontier_policy_from_benchmark(results)
+    set_frontier_policy(policy)
+    return results, policy
+
+
+def benchmark_landmarks(num_nodes=500, edges_per_node=3, num_landmarks=8, strategy='farthest',
+                        num_queries=100, max_battery=3, seed=42):
+    """
+    Compara nodos asentados por Dijkstra, A* geográfico y A* con landmarks (ALT) sobre
+    el mismo conjunto de consultas, y el tiempo de búsquedas con recarga en frío
+    (sin cachés) con y sin cotas de landmarks.
+    """
+    graph = _random_graph(num_nodes, edges_per_node, seed)
+    rng = random.Random(seed)
+    elements = [v.element() for v in graph.vertices()]
+    landmarks = LandmarkIndex(graph, num_landmarks=num_landmarks, strategy=strategy, seed=seed)
+    queries = [(rng.choice(elements), rng.choice(elements)) for _ in range(num_queries)]
+    stats = landmarks.compare_settled(graph, queries)
+    stats['build_seconds'] = landmarks.build_seconds
+
+    warehouses = [v.element() for v in graph.vertices() if v.type() == 'warehouse']
+    clients = [v.element() for v in graph.vertices() if v.type() == 'client']
+    pairs = [(rng.choice(warehouses), rng.choice(clients)) for _ in range(min(20, num_queries))]
+    shared = RouteManager(graph)
+    shared.bottleneck_index()
+    for label, index in (('recharge_cold_plain_s', None), ('recharge_cold_alt_s', landmarks)):
+        start = time.perf_counter()
+        for origin, destination in pairs:
+            manager = RouteManager(graph, landmarks=index)
+            manager._bottleneck_index = shared.bottleneck_index()
+            manager.find_route_with_recharge(origin, destination, max_battery)
+        stats[label] = time.perf_counter() - start
+    return stats
+
+
+def benchmark_dispatch(num_nodes=500, edges_per_node=2, num_drones=1000, num_orders=10000, max_battery=80,
+                       seed=42):
+    """
+    Una ronda del Dispatcher: num_drones drones repartidos en clientes al
+    azar con batería al azar contra num_orders órdenes pendientes. Mide la
+    matriz de distancias (en frío) y la asignación por separado.
+    """
+    graph = _random_graph(num_nodes, edges_per_node, seed)
+    rng = random.Random(seed)
+    warehouses = [v.element() for v in graph.vertices() if v.type() == 'warehouse']
+    clients = [Client(i, f"Cliente {i}", v.element(), 'normal')
+               for i, v in enumerate(graph.vertices()) if v.type() == 'client']
+    fleet = Fleet(warehouses, num_drones, max_battery)
+    for drone in fleet:
+        drone.land(rng.choice(clients).node_id, rng.uniform(0, max_battery), 0.0)
+    orders = []
+    for i in range(num_orders):
+        client = rng.choice(clients)
+        orders.append(Order(f"BENCH{i:06d}", client, rng.choice(warehouses), client.node_id, 1.0, 'normal'))
+    dispatcher = Dispatcher(RouteManager(graph), fleet)
+    start = time.perf_counter()
+    dispatcher.distance_matrix()
+    matrix_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    pairs = dispatcher.assign(orders)
+    return {
+        'drones': num_drones,
+        'orders': num_orders,
+        'warehouses': len(warehouses),
+        'assigned': len(pairs),
+        'matrix_seconds': matrix_seconds,
+        'assign_seconds': time.perf_counter() - start,
+    }
+
+
+def benchmark_event_engine(num_events=1_000_000, num_streams=1000, seed=42):
+    """
+    Rendimiento del calendario de eventos: num_streams procesos que se
+    reagendan con demoras exponenciales hasta procesar num_events eventos.
+    Retorna las estadísticas de EventEngine (incluye events_per_minute).
+    """
+    rng = random.Random(seed)
+    engine = EventEngine()
+    expovariate = rng.expovariate
+    schedule = engine.schedule
+
+    def tick(stream):
+        schedule(expovariate(1.0), 'tick', stream)
+
+    engine.on('tick', tick)
+    for stream in range(num_streams):
+        tick(stream)
+    engine.run(max_events=num_events)
+    return engine.stats()
+
+
+def benchmark_delivery_simulation(num_nodes=150, edges_per_node=2, hours=24, arrivals_per_hour=3000,
+                                  max_battery=50, seed=42):
+    """
+    Rendimiento de una DeliverySimulation completa (llegadas, ruteo con
+    recarga, vuelos y cargas, tracker) durante hours horas simuladas, a
+    diferencia de benchmark_event_engine, que solo mide el calendario.
+    Retorna el reporte de la simulación (incluye events_per_minute).
+    """
+    graph = _random_graph(num_nodes, edges_per_node, seed)
+    clients = [Client(i, f"Cliente {i}", v.element(), 'normal')
+               for i, v in enumerate(graph.vertices()) if v.type() == 'client']
+    simulation = DeliverySimulation(RouteManager(graph), None, clients, max_battery,
+                                    arrivals_per_hour=arrivals_per_hour, seed=seed)
+    return simulation.run(hours=hours)
+
+
+if __name__ == "__main__":
+    results, policy = calibrate_frontier_policy()
+    for size, timings in results.items():
+        row = " | ".join(f"{name}: {seconds * 1000:8.1f} ms" for name, seconds in timings.items())
+        print(f"n={size:>5} | {row}")
+    print(f"Política seleccionada: {policy}")
+    for key, value in benchmark_landmarks().items():
+        print(f"{key}: {value}")
+    for key, value in benchmark_dispatch().items():
+        print(f"{key}: {value}")
+    print(f"Motor de eventos: {benchmark_event_engine()['events_per_minute']:,.0f} eventos/min")
+    print(f"Simulación de entregas: {benchmark_delivery_simulation()['events_per_minute']:,.0f} eventos/min")
@@ -0,0 +1,92 @@
+from model.graph import Graph
+
+
+class CoverageAnalyzer:
+    """
+    Cobertura de batería de los almacenes. Una "carga" es un tramo de a lo más
+    max_battery entre paradas; las paradas intermedias solo pueden ser
+    estaciones de recarga, igual que en RouteManager.find_route_with_recharge.
+    Cada almacén y cada estación resuelve una única búsqueda acotada
+    (Graph.reachable_within), compartida por todas las consultas.
+    """
+
+    def __init__(self, graph: Graph, max_battery):
+        self.graph = graph
+        self.max_battery = max_battery
+        self._balls = {}  # elemento -> {elemento: distancia <= max_battery}
+        self._graph_key = None
+
+    def _sync_with_graph(self):
+        # Cualquier cambio de estructura o de pesos invalida las bolas calculadas.
+        key = (self.graph._version, self.graph._weights_version)
+        if key != self._graph_key:
+            self._balls.clear()
+            self._graph_key = key
+
+    def ball(self, element):
+        """Nodos alcanzables desde element con una sola carga, con su distancia."""
+        self._sync_with_graph()
+        ball = self._balls.get(element)
+        if ball is None:
+            ball = self._balls[element] = self.graph.reachable_within(element, self.max_battery)
+        return ball
+
+    def _roles(self):
+        roles = {'warehouse': [], 'recharge': set(), 'client': set()}
+        for v in self.graph.vertices():
+            if v.type() == 'warehouse':
+                roles['warehouse'].append(v.element())
+            elif v.type() in roles:
+                roles[v.type()].add(v.element())
+        return roles
+
+    def warehouse_coverage(self, max_charges=1):
+        """
+        Retorna {almacén: {cliente: cargas necesarias}} con los clientes que cada
+        almacén alcanza usando a lo más max_charges cargas (max_charges - 1 recargas).
+        """
+        if max_charges < 1:
+            return {}
+        roles = self._roles()
+        stations, clients = roles['recharge'], roles['client']
+        coverage = {}
+        for warehouse in roles['warehouse']:
+            covered = {}
+            reached = {warehouse}
+            frontier = [warehouse]
+            for charges in range(1, max_charges + 1):
+                next_frontier = []
+                for stop in frontier:
+                    for node in self.ball(stop):
+                        if node in clients and node not in covered:
+                            covered[node] = charges
+                        elif node in stations and node not in reached:
+                            reached.add(node)
+                            next_frontier.append(node)
+                if not next_frontier:
+                    break
+                frontier = next_frontier
+            coverage[warehouse] = covered
+        return coverage
+
+    def coverage_summary(self, max_charges=1):
+        """Resumen por almacén, clientes cubiertos por al menos uno y clientes sin cobertura."""
+        coverage = self.warehouse_coverage(max_charges)
+        clients = self._roles()['client']
+        covered = set()
+        per_warehouse = {}
+        for warehouse, reached in coverage.items():
+            covered.update(reached)
+            per_warehouse[warehouse] = {
+                charges: sum(1 for c in reached.values() if c == charges)
+                for charges in range(1, max_charges + 1)
+            }
+        return {
+            'max_battery': self.max_battery,
+            'max_charges': max_charges,
+            'clients': len(clients),
+            'covered_clients': len(covered),
+            'uncovered_clients': sorted(clients - covered),
+            'per_warehouse': per_warehouse,
+            'searches': len(self._balls),
+        }
@@ -0,0 +1,422 @@
+import heapq
+import random
+import time
+from datetime import datetime, timedelta
+from domain.orden import Order
+from sim.fleet import Dispatcher, Fleet
+from sim.rutas import RouteManager, RouteTracker
+from sim.scheduler import OrderScheduler, latency_summary
+from sim.stations import StationNetwork
+from sim.stores import OrderStore
+
+
+class EventEngine:
+    """
+    Motor de eventos discretos. El calendario es un heap de
+    (instante, secuencia, tipo, datos) y el reloj (now, en segundos
+    simulados) salta de evento en evento. Cada tipo tiene un manejador
+    handler(datos) registrado con on(); los manejadores agendan eventos
+    nuevos con schedule().
+    """
+
+    def __init__(self, start_time=0.0):
+        self.now = start_time
+        self._calendar = []
+        self._seq = 0
+        self._handlers = {}
+        self.processed = 0
+        self.processed_by_kind = {}
+        self.wall_seconds = 0.0
+
+    def on(self, kind, handler):
+        self._handlers[kind] = handler
+
+    def schedule(self, delay, kind, data=None):
+        """Agenda un evento delay segundos después del instante actual."""
+        if delay < 0:
+            raise ValueError("Events cannot be scheduled in the past.")
+        self._seq += 1
+        heapq.heappush(self._calendar, (self.now + delay, self._seq, kind, data))
+
+    def schedule_at(self, when, kind, data=None):
+        self.schedule(when - self.now, kind, data)
+
+    def pending(self):
+        return len(self._calendar)
+
+    def run(self, until=None, max_events=None):
+        """
+        Procesa eventos en orden de tiempo hasta vaciar el calendario, pasar
+        until (el reloj queda en until) o procesar max_events. Retorna la
+        cantidad procesada en esta llamada.
+        """
+        calendar, handlers, counts = self._calendar, self._handlers, self.processed_by_kind
+        pop = heapq.heappop
+        limit = float('inf') if until is None else until
+        remaining = -1 if max_events is None else max_events
+        processed = 0
+        start = time.perf_counter()
+        while calendar and remaining != 0:
+            if calendar[0][0] > limit:
+                break
+            when, _, kind, data = pop(calendar)
+            self.now = when
+            handlers[kind](data)
+            counts[kind] = counts.get(kind, 0) + 1
+            processed += 1
+            remaining -= 1
+        if until is not None and (not calendar or calendar[0][0] > until) and self.now < until:
+            self.now = until
+        self.wall_seconds += time.perf_counter() - start
+        self.processed += processed
+        return processed
+
+    def stats(self):
+        rate = self.processed / self.wall_seconds if self.wall_seconds else 0.0
+        return {
+            'events': self.processed,
+            'events_by_kind': dict(self.processed_by_kind),
+            'pending': len(self._calendar),
+            'simulated_seconds': self.now,
+            'wall_seconds': self.wall_seconds,
+            'events_per_second': rate,
+            'events_per_minute': rate * 60,
+        }
+
+
+class DeliverySimulation:
+    """
+    Simulación en tiempo simulado de la llegada y entrega de órdenes.
+
+    Las órdenes llegan como un proceso de Poisson (arrivals_per_hour) a
+    clientes al azar desde almacenes al azar. Cada entrega vuela sus tramos
+    entre recargas a drone_speed (unidades de costo por hora) y en cada
+    estación recarga la energía gastada en el tramo anterior, a razón de
+    charge_minutes por batería completa. Las entregas se registran en el
+    tracker con la marca de tiempo simulada, así que el tracker tiene que ser
+    propio de la simulación: con tracker=None se crea uno sobre el reloj
+    simulado (timestamp); uno dado no puede usar el reloj real ni tener
+    bitácora, para no mezclar instantes simulados con la actividad en vivo.
+
+    Sin flota, cada orden sale apenas llega. Con una Fleet, las órdenes
+    esperan en un OrderScheduler (urgentes primero, con envejecimiento) y
+    cada dispatch_seconds las más prioritarias, tantas como drones libres,
+    se asignan por lotes con un Dispatcher: el dron vuela hasta el almacén,
+    recarga lo que le falta y hace la entrega. Los drones libres solo se
+    recargan en almacenes y estaciones: tras entregar, el dron espera en el
+    cliente con la batería que le quedó y, si con ella no alcanza ningún
+    almacén, vuela a recargar al almacén o estación más cercano. Los
+    almacenes son bases sin límite de puestos; las estaciones, no.
+
+    Con station_slots (un entero o un dict estación -> puestos), cada
+    estación de recarga tiene esa cantidad de puestos y los drones que
+    llegan con todos ocupados esperan en cola. La espera estimada de cada
+    estación se vuelve una penalización de costo para el ruteo (penalty_step
+    es su resolución, en unidades de costo); las rutas memorizadas se
+    revalidan contra las épocas de penalización en vez de descartarse.
+
+    Es una herramienta independiente para estudiar la operación en el
+    tiempo: OrderSimulator, el dashboard y la API no la usan y siguen
+    entregando cada orden al instante.
+    """
+
+    def __init__(self, route_manager: RouteManager, tracker: RouteTracker = None, clients=(), max_battery=100,
+                 arrivals_per_hour=60.0, drone_speed=40.0, charge_minutes=15.0, seed=None,
+                 start=None, priorities=(('normal', 0.8), ('urgent', 0.2)), fleet: Fleet = None,
+                 dispatch_seconds=60.0, station_slots=None, penalty_step=1.0, allowances=None):
+        self.manager = route_manager
+        if tracker is None:
+            tracker = RouteTracker(clock=self.timestamp)
+        elif tracker.clock is time.time or tracker.journal is not None:
+            raise ValueError("DeliverySimulation needs its own tracker on a simulated clock and without a journal "
+                             "(pass tracker=None to create one).")
+        self.tracker = tracker
+        self.clients = list(clients)
+        self.max_battery = max_battery
+        self.arrivals_per_hour = arrivals_per_hour
+        self.drone_speed = drone_speed
+        self.charge_minutes = charge_minutes
+        self.rng = random.Random(seed)
+        self.start = start or datetime.now()
+        self._epoch = self.start.timestamp()
+        self._priorities = [p for p, _ in priorities]
+        self._priority_weights = [w for _, w in priorities]
+        self.warehouses = [v.element() for v in route_manager.graph.vertices() if v.type() == 'warehouse']
+        if not self.warehouses or not self.clients:
+            raise ValueError("The simulation needs at least one warehouse and one client.")
+        self.engine = EventEngine()
+        self.engine.on('order_arrival', self._on_arrival)
+        self.engine.on('leg_end', self._on_leg_end)
+        self.engine.on('charge_end', self._on_charge_end)
+        self.engine.on('dispatch', self._on_dispatch)
+        self.fleet = fleet
+        self.dispatch_seconds = dispatch_seconds
+        self.dispatcher = Dispatcher(route_manager, fleet, 60.0 * charge_minutes) if fleet is not None else None
+        self.scheduler = OrderScheduler(allowances) if fleet is not None else None  # Órdenes esperando dron
+        self.stations = None
+        if station_slots is not None:
+            self.stations = StationNetwork.from_graph(route_manager.graph, slots=station_slots,
+                                                      service_seconds=self.charge_seconds(max_battery / 2),
+                                                      cost_per_second=drone_speed / 3600.0,
+                                                      penalty_step=penalty_step)
+        recharge = [v.element() for v in route_manager.graph.vertices() if v.type() == 'recharge']
+        self._chargers = self.warehouses + recharge  # Primero los almacenes
+        self.orders = OrderStore()
+        self.delivered = 0
+        self.failed = 0
+        self.in_flight = 0
+        self.repositions = 0  # Vuelos de drones libres a recargar
+        self.stranded = 0  # Drones que no alcanzan ningún cargador tras entregar
+        self.latencies = []  # Segundos simulados desde la llegada hasta la entrega
+        self.latencies_by_priority = {}
+        self._next_id = 0
+        self._arrivals = {}  # order_id -> instante de llegada, hasta la entrega
+        self._plans = {}  # (origen, destino) -> ((Route, tramos), época de penalización) mientras el grafo no cambie
+        self._plans_key = None
+        self.replans = 0  # Rutas recalculadas porque cambió la congestión
+
+    # --- Tiempo -------------------------------------------------------------
+
+    def timestamp(self):
+        """Instante simulado actual como timestamp POSIX (start + reloj del motor)."""
+        return self._epoch + self.engine.now
+
+    def sim_datetime(self, seconds=None):
+        return self.start + timedelta(seconds=self.engine.now if seconds is None else seconds)
+
+    def flight_seconds(self, cost):
+        return 3600.0 * cost / self.drone_speed
+
+    def charge_seconds(self, energy):
+        return 60.0 * self.charge_minutes * min(1.0, energy / self.max_battery)
+
+    # --- Eventos ------------------------------------------------------------
+
+    def _new_order(self):
+        self._next_id += 1
+        client = self.rng.choice(self.clients)
+        order = Order(order_id=f"SIM{self._next_id:06d}", client=client, origin=self.rng.choice(self.warehouses),
+                      destination=client.node_id, weight=self.rng.uniform(0.5, 5.0),
+                      priority=self.rng.choices(self._priorities, self._priority_weights)[0])
+        order.creation_date = self.sim_datetime()
+        self._arrivals[order.order_id] = self.engine.now
+        self.orders.add(order)
+        return order
+
+    def _on_arrival(self, _):
+        self.engine.schedule(self.rng.expovariate(self.arrivals_per_hour / 3600.0), 'order_arrival')
+        order = self._new_order()
+        if self.fleet is None:
+            self.dispatch(order)
+        else:
+            self.scheduler.push(order, self.engine.now)
+
+    def _on_dispatch(self, _):
+        self.engine.schedule(self.dispatch_seconds, 'dispatch')
+        self.dispatch_pending()
+
+    def dispatch_pending(self):
+        """
+        Toma del scheduler las órdenes más prioritarias, tantas como drones
+        libres, las asigna y despacha cada par; las que no consiguen dron
+        vuelven a la cola con su llegada original. Retorna la cantidad asignada.
+        """
+        now = self.engine.now
+        idle = self.fleet.idle()
+        batch = []
+        while self.scheduler and len(batch) < len(idle):
+            order = self.scheduler.pop()
+            if self.plan(order.origin, order.destination) is None:
+                self.scheduler.finish(order, now, failed=True)
+                self._fail(order)
+            else:
+                batch.append(order)
+        pairs = self.dispatcher.assign(batch, idle, now) if batch else []
+        taken = set()
+        for drone, order, approach in pairs:
+            taken.add(order.order_id)
+            self.scheduler.finish(order, now)
+            self.dispatch(order, drone, approach)
+        for order in batch:
+            if order.order_id not in taken:
+                self.scheduler.requeue(order)
+        return len(pairs)
+
+    def cancel(self, order_id):
+        """Cancela una orden que todavía espera dron. Retorna la orden o None."""
+        order = self.scheduler.cancel(order_id) if self.scheduler is not None else None
+        if order is not None:
+            order.status = "cancelled"
+            self._arrivals.pop(order_id, None)
+        return order
+
+    def plan(self, origin, destination):
+        """
+        (Route, costos de los tramos entre recargas) o None; memorizado por par
+        mientras el grafo no cambie. Con estaciones de capacidad limitada, un
+        plan de una época de penalización anterior se reutiliza si sigue
+        siendo óptimo y si no se recalcula con las penalizaciones vigentes.
+        """
+        graph = self.manager.graph
+        key = (graph._version, graph._weights_version)
+        if key != self._plans_key:
+            self._plans.clear()
+            self._plans_key = key
+        pair = (origin, destination)
+        epoch = self.stations.epoch if self.stations is not None else 0
+        entry = self._plans.get(pair)
+        if entry is not None:
+            plan, planned_at = entry
+            # La factibilidad no depende de la congestión: un par sin ruta sigue sin ruta.
+            if plan is None or planned_at == epoch or self.stations.is_still_optimal(plan[0].recharge_stops, planned_at):
+                self._plans[pair] = (plan, epoch)
+                return plan
+            self.replans += 1
+        penalties = self.stations.penalties() if self.stations is not None else None
+        route = self.manager.find_route_with_recharge(origin, destination, self.max_battery, penalties=penalties)
+        plan = None
+        if route is not None:
+            stops = [origin] + list(route.recharge_stops) + [destination]
+            legs = [self.manager.shortest_path_tree(a).distance(b) for a, b in zip(stops, stops[1:])]
+            plan = (route, legs)
+        self._plans[pair] = (plan, epoch)
+        return plan
+
+    def _fail(self, order):
+        order.status = "Fallido"
+        self.failed += 1
+        self._arrivals.pop(order.order_id, None)
+
+    def dispatch(self, order, drone=None, approach=0.0):
+        """
+        Busca la ruta de la orden e inicia su primer tramo (o la marca como
+        fallida). Con dron, el primer tramo es el acercamiento al almacén y
+        la recarga posterior repone lo que le falta para salir lleno.
+        """
+        plan = self.plan(order.origin, order.destination)
+        if plan is None:
+            self._fail(order)
+            return False
+        route, legs = plan
+        charges = legs[:-1]  # Energía a reponer al final de cada tramo
+        places = list(route.recharge_stops)  # Dónde se hace cada recarga
+        if drone is not None:
+            battery = drone.battery_at(self.engine.now, self.max_battery, 60.0 * self.charge_minutes)
+            charges = [self.max_battery - (battery - approach)] + legs[:-1]
+            places = [order.origin] + places
+            legs = [approach] + legs
+            drone.busy = True
+        order.status = "En vuelo"
+        self.in_flight += 1
+        self.engine.schedule(self.flight_seconds(legs[0]), 'leg_end', (order, route, legs, charges, places, 0, drone))
+        return True
+
+    def _on_leg_end(self, data):
+        order, route, legs, charges, places, i, drone = data
+        if order is not None and i + 1 == len(legs):
+            self._deliver(order, route, drone, legs[-1])
+        elif self.stations is None or places[i] not in self.stations or \
+                self.stations.arrive(places[i], self.engine.now, data):
+            self._start_charge(data)
+
+    def _start_charge(self, data):
+        _, _, _, charges, _, i, _ = data
+        self.engine.schedule(self.charge_seconds(charges[i]), 'charge_end', data)
+
+    def _on_charge_end(self, data):
+        order, route, legs, charges, places, i, drone = data
+        if self.stations is not None and places[i] in self.stations:
+            waiting = self.stations.release(places[i], self.engine.now, self.charge_seconds(charges[i]))
+            if waiting is not None:
+                self._start_charge(waiting)
+        if order is None:  # Fin de un reposicionamiento: el dron queda libre y lleno en el cargador
+            drone.land(places[i], self.max_battery, self.engine.now, at_charger=True)
+            return
+        self.engine.schedule(self.flight_seconds(legs[i + 1]), 'leg_end',
+                             (order, route, legs, charges, places, i + 1, drone))
+
+    def _deliver(self, order, route, drone=None, last_leg=0.0):
+        now = self.engine.now
+        order.status = "Entregado"
+        order.delivery_date = self.sim_datetime(now)
+        order.total_cost = route.total_cost
+        self.delivered += 1
+        self.in_flight -= 1
+        latency = now - self._arrivals.pop(order.order_id)
+        self.latencies.append(latency)
+        self.latencies_by_priority.setdefault(order.priority, []).append(latency)
+        self.tracker.track_route(route, timestamp=self._epoch + now)
+        self.tracker.track_client_order(order.client.id, timestamp=self._epoch + now)
+        self.tracker.track_order(order.order_id, order)
+        if drone is not None:
+            drone.land(order.destination, self.max_battery - last_leg, now)
+            drone.deliveries += 1
+            self._reposition(drone)
+
+    def _reposition(self, drone):
+        """
+        Si con su batería el dron no alcanza ningún almacén, lo manda a
+        recargar al cargador más cercano (pasando por la cola de la estación);
+        si tampoco alcanza ninguno, queda varado.
+        """
+        distances = self.manager.shortest_path_tree(drone.position).distances(self._chargers)
+        if min(distances[:len(self.warehouses)]) <= drone.battery:
+            return
+        nearest = min(range(len(distances)), key=distances.__getitem__)
+        distance = distances[nearest]
+        if distance > drone.battery:
+            self.stranded += 1
+            return
+        drone.busy = True
+        self.repositions += 1
+        self.engine.schedule(self.flight_seconds(distance), 'leg_end',
+                             (None, None, [distance], [self.max_battery - (drone.battery - distance)],
+                              [self._chargers[nearest]], 0, drone))
+
+    # --- Ejecución ----------------------------------------------------------
+
+    def run(self, hours=8.0):
+        """Simula hours horas (continúa desde donde quedó la ejecución anterior)."""
+        if self.engine.processed == 0 and not self.engine.pending():
+            self.engine.schedule(self.rng.expovariate(self.arrivals_per_hour / 3600.0), 'order_arrival')
+            if self.fleet is not None:
+                self.engine.schedule(self.dispatch_seconds, 'dispatch')
+        self.engine.run(until=self.engine.now + hours * 3600.0)
+        return self.report()
+
+    def report(self):
+        hours = self.engine.now / 3600.0
+        latencies = sorted(self.latencies)
+        engine = self.engine.stats()
+        report = {
+            'simulated_hours': hours,
+            'orders': len(self.orders),
+            'orders_by_status': self.orders.status_counts(),
+            'delivered': self.delivered,
+            'failed': self.failed,
+            'in_flight': self.in_flight,
+            'deliveries_per_hour': self.delivered / hours if hours else 0.0,
+            'mean_delivery_minutes': sum(latencies) / len(latencies) / 60 if latencies else 0.0,
+            'p95_delivery_minutes': latencies[int(0.95 * (len(latencies) - 1))] / 60 if latencies else 0.0,
+            'events': engine['events'],
+            'events_per_minute': engine['events_per_minute'],
+            'wall_seconds': engine['wall_seconds'],
+            'by_priority': {
+                priority: dict(latency_summary(seconds, 'delivery'), delivered=len(seconds),
+                               deliveries_per_hour=len(seconds) / hours if hours else 0.0)
+                for priority, seconds in sorted(self.latencies_by_priority.items())
+            },
+        }
+        if self.stations is not None:
+            report['stations'] = self.stations.summary()
+            report['replans'] = self.replans
+        if self.fleet is not None:
+            report['pending'] = len(self.scheduler)
+            report['queue'] = self.scheduler.stats()
+            report['fleet'] = self.fleet.summary(self.engine.now, 60.0 * self.charge_minutes)
+            report['repositions'] = self.repositions
+            report['stranded'] = self.stranded
+            report['dispatch_rounds'] = self.dispatcher.rounds
+            report['mean_assignment_seconds'] = (self.dispatcher.wall_seconds / self.dispatcher.rounds
+                                                 if self.dispatcher.rounds else 0.0)
+        return report
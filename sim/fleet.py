@@ -0,0 +1,129 @@
+import time
+import numpy as np
+from domain.dron import Drone
+from model.assignment import class_assignment
+from sim.rutas import RouteManager
+
+
+class Fleet:
+    """Flota de drones, repartidos al inicio en ronda entre los almacenes."""
+
+    def __init__(self, warehouses, num_drones, max_battery):
+        warehouses = list(warehouses)
+        if not warehouses:
+            raise ValueError("The fleet needs at least one warehouse.")
+        self.max_battery = max_battery
+        self.drones = [Drone(f"DR{i + 1:04d}", warehouses[i % len(warehouses)], max_battery)
+                       for i in range(num_drones)]
+
+    @classmethod
+    def from_graph(cls, graph, num_drones, max_battery):
+        warehouses = [v.element() for v in graph.vertices() if v.type() == 'warehouse']
+        return cls(warehouses, num_drones, max_battery)
+
+    def __len__(self):
+        return len(self.drones)
+
+    def __iter__(self):
+        return iter(self.drones)
+
+    def idle(self):
+        return [d for d in self.drones if not d.busy]
+
+    def summary(self, now=0.0, full_charge_seconds=0.0):
+        batteries = [d.battery_at(now, self.max_battery, full_charge_seconds) for d in self.drones]
+        busy = sum(d.busy for d in self.drones)
+        return {
+            'drones': len(self.drones),
+            'busy': busy,
+            'idle': len(self.drones) - busy,
+            'mean_battery': sum(batteries) / len(batteries) if batteries else 0.0,
+            'deliveries': sum(d.deliveries for d in self.drones),
+        }
+
+
+class Dispatcher:
+    """
+    Asigna por lotes órdenes pendientes a drones libres resolviendo un
+    problema de asignación de costo mínimo.
+
+    El costo de (dron, orden) es la distancia del dron al almacén de origen
+    más la distancia del almacén al cliente; el par es infactible si el dron
+    no alcanza el almacén con la batería que tiene en ese instante o si el
+    cliente es inalcanzable. Las distancias salen de una matriz almacenes x
+    nodos armada con los árboles de caminos mínimos en caché del
+    RouteManager, que se reconstruye solo cuando cambia el grafo. La
+    distancia de un nodo a un almacén se lee del árbol del almacén (grafo no
+    dirigido).
+    """
+
+    def __init__(self, route_manager: RouteManager, fleet: Fleet, full_charge_seconds=900.0):
+        self.manager = route_manager
+        self.fleet = fleet
+        self.full_charge_seconds = full_charge_seconds
+        self.rounds = 0
+        self.assigned = 0
+        self.wall_seconds = 0.0
+        self._matrix = None
+        self._matrix_key = None
+        self._warehouse_row = {}
+        self._node_col = {}
+
+    def distance_matrix(self):
+        """Matriz almacenes x nodos de distancias mínimas, en caché por versión del grafo."""
+        graph = self.manager.graph
+        key = (id(graph), graph._version, graph._weights_version)
+        if key != self._matrix_key:
+            nodes = [v.element() for v in graph.vertices()]
+            warehouses = [v.element() for v in graph.vertices() if v.type() == 'warehouse']
+            rows = [self.manager.shortest_path_tree(w).distances(nodes) for w in warehouses]
+            self._matrix = np.array(rows, dtype=np.float64).reshape(len(warehouses), len(nodes))
+            self._warehouse_row = {w: i for i, w in enumerate(warehouses)}
+            self._node_col = {n: i for i, n in enumerate(nodes)}
+            self._matrix_key = key
+        return self._matrix
+
+    def costs(self, drones, orders, now=0.0):
+        """
+        Componentes del costo: (acercamientos, almacén de cada orden,
+        entregas). acercamientos es drones x almacenes (inf si el dron no
+        llega con su batería en el instante now); el costo de (dron, orden)
+        es acercamientos[dron, almacén de la orden] + entregas[orden].
+        """
+        matrix = self.distance_matrix()
+        try:
+            origins = np.array([self._warehouse_row[o.origin] for o in orders], dtype=np.int64)
+        except KeyError as e:
+            raise ValueError(f"Order origin {e.args[0]} is not a warehouse.") from None
+        destinations = np.array([self._node_col[o.destination] for o in orders], dtype=np.int64)
+        positions = np.array([self._node_col[d.position] for d in drones], dtype=np.int64)
+        batteries = np.array([d.battery_at(now, self.fleet.max_battery, self.full_charge_seconds)
+                              for d in drones])
+        approach = matrix[:, positions].T
+        approach = np.where(approach > batteries[:, None], np.inf, approach)
+        return approach, origins, matrix[origins, destinations].reshape(len(orders))
+
+    def assign(self, orders, drones=None, now=0.0):
+        """
+        Empareja órdenes y drones (por defecto, los libres) minimizando el
+        costo total. Retorna [(dron, orden, distancia de acercamiento)]; las
+        órdenes sin dron factible quedan fuera.
+
+        Como todas las órdenes de un mismo almacén cuestan lo mismo para un
+        dron salvo por su tramo de entrega, se resuelve con class_assignment
+        sobre la matriz drones x almacenes en vez de la matriz densa drones x
+        órdenes.
+        """
+        drones = self.fleet.idle() if drones is None else list(drones)
+        orders = list(orders)
+        if not drones or not orders:
+            return []
+        start = time.perf_counter()
+        approach, origins, delivery = self.costs(drones, orders, now)
+        reachable = np.nonzero(np.isfinite(delivery))[0]
+        rows, cols = class_assignment(approach, origins[reachable], delivery[reachable])
+        cols = reachable[cols]
+        self.wall_seconds += time.perf_counter() - start
+        self.rounds += 1
+        self.assigned += len(rows)
+        return [(drones[r], orders[c], float(approach[r, origins[c]])) for r, c in zip(rows, cols)]
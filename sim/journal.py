@@ -0,0 +1,320 @@
+import atexit
+import contextlib
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+import zlib
+from datetime import datetime
+from domain.orden import Order
+from domain.ruta import Route
+from model.graph import Graph
+from sim.stores import ClientStore, OrderStore
+
+JOURNAL_DIR = os.path.join("data", "journal")
+SEGMENT_PREFIX = "journal-"
+SNAPSHOT_PREFIX = "snapshot-"
+STATE_FILE = "state.pkl"
+GRAPH_DIR = "graph"
+ORDER_FIELDS = ('order_id', 'client_id', 'origin', 'destination', 'weight', 'priority', 'status', 'total_cost')
+
+
+def _fsync_dir(path):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _order_to_record(order: Order):
+    record = {field: getattr(order, field) for field in ORDER_FIELDS}
+    record['creation_date'] = order.creation_date.isoformat() if order.creation_date else None
+    record['delivery_date'] = order.delivery_date.isoformat() if order.delivery_date else None
+    record['client_total_orders'] = order.client.total_orders
+    return record
+
+
+class SimulationJournal:
+    """
+    Bitácora append-only de las mutaciones del estado de simulación, con
+    snapshots compactados y reproducción al arrancar.
+
+    Cada registro es una línea "crc32 json" con un número de secuencia (lsn)
+    creciente. Las líneas se escriben al sistema operativo en cada append y
+    se sincronizan a disco (fsync) por lotes: cada sync_every registros o
+    cada sync_interval segundos, lo que ocurra primero. Cada snapshot_every
+    registros se guarda un snapshot (grafo en formato columnar más el resto
+    del estado) y se descartan los segmentos y snapshots anteriores, de modo
+    que recover() solo reproduce los registros posteriores al último
+    snapshot. Una línea incompleta o corrupta al final (escritura
+    interrumpida) se descarta al recuperar.
+
+    El snapshot periódico lo dispara el append que cruza el umbral, desde
+    cualquier hilo; para que no serialice el estado mientras otro hilo lo
+    modifica, se toma con state_lock, el mismo lock que el dueño del
+    estado sostiene al mutarlo.
+    """
+
+    def __init__(self, directory=JOURNAL_DIR, sync_every=64, sync_interval=1.0, snapshot_every=5000):
+        self.directory = directory
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.snapshot_every = snapshot_every
+        self.state_provider = None  # Callable que retorna el estado para los snapshots periódicos
+        self.state_lock = None  # Lock que excluye las mutaciones de ese estado mientras se serializa
+        self._lock = threading.RLock()
+        self._file = None
+        self._lsn = 0
+        self._snapshot_lsn = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._snapshot_graph = None  # (id del grafo, versión, versión de pesos) del último snapshot
+        self._replaying = False
+        os.makedirs(directory, exist_ok=True)
+        atexit.register(self.close)
+
+    # --- Archivos -------------------------------------------------------------
+
+    def _entries(self, prefix):
+        """[(lsn, ruta)] ordenados de los segmentos o snapshots completos del directorio."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and not name.endswith('.tmp'):
+                try:
+                    lsn = int(name[len(prefix):].split('.')[0])
+                except ValueError:
+                    continue
+                entries.append((lsn, os.path.join(self.directory, name)))
+        return sorted(entries)
+
+    def _open_segment(self, first_lsn):
+        if self._file is not None:
+            self._file.close()
+        path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{first_lsn:012d}.log")
+        self._file = open(path, 'a', encoding='utf-8')
+        _fsync_dir(self.directory)
+
+    # --- Escritura --------------------------------------------------------------
+
+    def append(self, kind, **data):
+        """Agrega un registro y retorna su lsn. No hace nada mientras se reproduce la bitácora."""
+        if self._replaying:
+            return None
+        due = False
+        with self._lock:
+            if self._file is None:
+                self._open_segment(self._lsn + 1)
+            self._lsn += 1
+            payload = json.dumps({'lsn': self._lsn, 'type': kind, **data}, separators=(',', ':'), default=str)
+            self._file.write(f"{zlib.crc32(payload.encode()):08x} {payload}\n")
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+                self.sync()
+            due = self.snapshot_every and self._lsn - self._snapshot_lsn >= self.snapshot_every
+            lsn = self._lsn
+        if due and self.state_provider is not None:
+            self._periodic_snapshot()
+        return lsn
+
+    def _periodic_snapshot(self):
+        with self.state_lock or contextlib.nullcontext():
+            with self._lock:
+                if self._lsn - self._snapshot_lsn < self.snapshot_every:
+                    return  # Otro hilo lo tomó mientras se esperaba el lock del estado
+                self.snapshot(**self.state_provider())
+
+    def sync(self):
+        """Fuerza a disco los registros pendientes."""
+        with self._lock:
+            if self._file is not None and self._unsynced:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self._unsynced = 0
+            self._last_sync = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self.sync()
+                self._file.close()
+                self._file = None
+
+    # --- Eventos ----------------------------------------------------------------
+
+    def order_created(self, order: Order):
+        return self.append('order_created', order=_order_to_record(order))
+
+    def order_routed(self, order: Order):
+        return self.append('order_routed', order=_order_to_record(order))
+
+    def order_status_changed(self, order: Order):
+        """Cancelación, entrega confirmada o cambio de prioridad desde la API."""
+        return self.append('order_status', order=_order_to_record(order))
+
+    def route_tracked(self, route: Route, timestamp):
+        return self.append('route_tracked', path=list(route.path), cost=route.total_cost,
+                           recharge_stops=list(route.recharge_stops), timestamp=timestamp)
+
+    def client_order_tracked(self, client_id, timestamp):
+        return self.append('client_order', client_id=client_id, timestamp=timestamp)
+
+    def order_tracked(self, order_id):
+        return self.append('order_tracked', order_id=order_id)
+
+    # --- Snapshots ------------------------------------------------------------
+
+    def snapshot(self, graph, clients, orders, route_tracker, avl_tree=None, summary=""):
+        """
+        Guarda el estado completo en el lsn actual y compacta: borra los
+        segmentos y snapshots anteriores y abre un segmento nuevo.
+        """
+        with self._lock:
+            self.sync()
+            self._lsn += 1  # Cada snapshot consume un lsn propio, así dos snapshots nunca comparten directorio
+            lsn = self._lsn
+            final = os.path.join(self.directory, f"{SNAPSHOT_PREFIX}{lsn:012d}")
+            tmp = final + '.tmp'
+            shutil.rmtree(tmp, ignore_errors=True)
+            os.makedirs(tmp)
+            graph_key = (id(graph), graph._version, graph._weights_version)
+            previous = self._entries(SNAPSHOT_PREFIX)
+            if previous and graph_key == self._snapshot_graph:
+                # El grafo no cambió: se enlazan los archivos del snapshot anterior en vez de reescribirlos
+                source = os.path.join(previous[-1][1], GRAPH_DIR)
+                os.makedirs(os.path.join(tmp, GRAPH_DIR))
+                for name in os.listdir(source):
+                    os.link(os.path.join(source, name), os.path.join(tmp, GRAPH_DIR, name))
+            else:
+                graph.save(os.path.join(tmp, GRAPH_DIR))
+            state = {'lsn': lsn, 'clients': clients, 'orders': orders, 'route_tracker': route_tracker,
+                     'avl_tree': avl_tree, 'summary': summary, 'created': datetime.now().isoformat()}
+            with open(os.path.join(tmp, STATE_FILE), 'wb') as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, final)
+            _fsync_dir(self.directory)
+            self._snapshot_lsn = lsn
+            self._snapshot_graph = graph_key
+            self._open_segment(lsn + 1)
+            for old_lsn, path in self._entries(SEGMENT_PREFIX):
+                if old_lsn <= lsn:
+                    os.remove(path)
+            for old_lsn, path in self._entries(SNAPSHOT_PREFIX):
+                if old_lsn < lsn:
+                    shutil.rmtree(path, ignore_errors=True)
+            return lsn
+
+    # --- Recuperación -----------------------------------------------------------
+
+    def _read_segment(self, path):
+        """Registros válidos del segmento; trunca el archivo en la primera línea dañada."""
+        records = []
+        valid_bytes = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    checksum, payload = line.rstrip(b'\n').split(b' ', 1)
+                    if not line.endswith(b'\n') or int(checksum, 16) != zlib.crc32(payload):
+                        raise ValueError
+                    records.append(json.loads(payload))
+                except ValueError:
+                    break
+                valid_bytes += len(line)
+        if valid_bytes < os.path.getsize(path):
+            with open(path, 'r+b') as f:
+                f.truncate(valid_bytes)
+                os.fsync(f.fileno())
+            return records, False
+        return records, True
+
+    def recover(self):
+        """
+        Reconstruye el estado: carga el último snapshot y reproduce los
+        registros posteriores. Retorna un dict con graph, clients, orders,
+        route_tracker, avl_tree, summary y replayed (registros reproducidos),
+        o None si no hay snapshot. Las escrituras siguientes continúan la secuencia.
+        """
+        with self._lock:
+            for name in os.listdir(self.directory):
+                if name.endswith('.tmp'):
+                    shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+            snapshots = self._entries(SNAPSHOT_PREFIX)
+            state = None
+            if snapshots:
+                snapshot_lsn, path = snapshots[-1]
+                with open(os.path.join(path, STATE_FILE), 'rb') as f:
+                    state = pickle.load(f)
+                # Sin mmap: la próxima compactación borra este directorio, y un archivo
+                # mapeado no se puede borrar en todas las plataformas (Windows).
+                state['graph'] = Graph.load(os.path.join(path, GRAPH_DIR), mmap=False)
+                self._snapshot_lsn = self._lsn = snapshot_lsn
+                self._snapshot_graph = (id(state['graph']), state['graph']._version, state['graph']._weights_version)
+            replayed = 0
+            if state is not None:
+                # Los snapshots anteriores a los stores guardaban listas simples.
+                if not isinstance(state['orders'], OrderStore):
+                    state['orders'] = OrderStore(state['orders'])
+                if not isinstance(state['clients'], ClientStore):
+                    state['clients'] = ClientStore(state['clients'])
+                orders, clients = state['orders'], state['clients']
+            segments = self._entries(SEGMENT_PREFIX)
+            for i, (_, path) in enumerate(segments):
+                records, intact = self._read_segment(path)
+                for record in records:
+                    if record['lsn'] <= self._lsn:
+                        continue
+                    if state is not None:
+                        self._apply(state, record, orders, clients)
+                        replayed += 1
+                    self._lsn = record['lsn']
+                if not intact:
+                    for _, later in segments[i + 1:]:
+                        os.remove(later)  # Lo escrito después de una línea dañada no es confiable
+                    break
+            self._open_segment(self._lsn + 1)
+            if state is None:
+                return None
+            state.pop('lsn', None)
+            state.pop('created', None)
+            state['replayed'] = replayed
+            return state
+
+    def _apply(self, state, record, orders, clients):
+        kind = record['type']
+        tracker = state['route_tracker']
+        self._replaying = True
+        try:
+            if kind in ('order_created', 'order_routed', 'order_status'):
+                self._upsert_order(state, record['order'], orders, clients)
+            elif kind == 'route_tracked':
+                route = Route(record['path'], record['cost'], record['recharge_stops'], [])
+                tracker.track_route(route, timestamp=record['timestamp'])
+            elif kind == 'client_order':
+                tracker.track_client_order(record['client_id'], timestamp=record['timestamp'])
+            elif kind == 'order_tracked':
+                order = orders.get(record['order_id'])
+                if order is not None:
+                    tracker.track_order(order.order_id, order)
+        finally:
+            self._replaying = False
+
+    @staticmethod
+    def _upsert_order(state, data, orders, clients):
+        order = orders.get(data['order_id'])
+        if order is None:
+            client = clients.get(data['client_id'])
+            if client is None:
+                return
+            order = orders.add(Order(data['order_id'], client, data['origin'], data['destination'],
+                                     data['weight'], data['priority']))
+        order.status = data['status']
+        order.priority = data['priority']
+        order.total_cost = data['total_cost']
+        order.creation_date = datetime.fromisoformat(data['creation_date']) if data['creation_date'] else None
+        order.delivery_date = datetime.fromisoformat(data['delivery_date']) if data['delivery_date'] else None
+        order.client.total_orders = data['client_total_orders']
@@ -0,0 +1,257 @@
+from collections.abc import Sequence
+import numpy as np
+
+ROUTE_SEPARATOR = " -> "
+
+
+class RouteHistory:
+    """
+    Historial de rutas en columnas. Cada ruta distinta (camino + recargas) se
+    interna una vez: sus nodos, como ids enteros, viven en un búfer compartido
+    y cada registro guarda solo el id de ruta, el costo y el instante.
+    Con capacity, el historial es un búfer circular que conserva los últimos
+    capacity registros; las rutas que dejan de referenciarse se compactan.
+    """
+
+    def __init__(self, capacity=None, initial_size=1024):
+        if capacity is not None and capacity < 1:
+            raise ValueError("capacity must be at least 1.")
+        self.capacity = capacity
+        size = capacity if capacity is not None else initial_size
+        # Columnas por registro
+        self._route = np.empty(size, dtype=np.int32)
+        self._cost = np.empty(size, dtype=np.float64)
+        self._time = np.empty(size, dtype=np.float64)
+        self._start = 0  # Posición del registro más antiguo en el búfer circular
+        self._count = 0
+        self._total = 0  # Registros agregados desde el inicio (incluye los descartados)
+        # Nodos internados
+        self._node_ids = {}
+        self._node_names = []
+        # Rutas internadas: tramo [offset, offset + path_len + recharge_len) del búfer de nodos
+        self._route_ids = {}
+        self._route_keys = []
+        self._offset = np.empty(64, dtype=np.int64)
+        self._path_len = np.empty(64, dtype=np.int32)
+        self._recharge_len = np.empty(64, dtype=np.int32)
+        self._refs = np.zeros(64, dtype=np.int64)
+        self._nodes = np.empty(1024, dtype=np.int32)
+        self._nodes_used = 0
+        self._dead = 0
+        self._strings = {}  # id de ruta -> texto "A -> B", creado bajo demanda
+
+    # --- Internado -------------------------------------------------------
+
+    def _node(self, name):
+        i = self._node_ids.get(name)
+        if i is None:
+            i = self._node_ids[name] = len(self._node_names)
+            self._node_names.append(name)
+        return i
+
+    @staticmethod
+    def _grow(array, needed):
+        if needed <= len(array):
+            return array
+        grown = np.empty(max(needed, 2 * len(array)), dtype=array.dtype)
+        grown[:len(array)] = array
+        return grown
+
+    def _intern_route(self, path, recharge_stops):
+        """Retorna (id de ruta, True si se acaba de internar)."""
+        key = (tuple(path), tuple(recharge_stops))
+        r = self._route_ids.get(key)
+        if r is not None:
+            return r, False
+        r = len(self._route_keys)
+        self._route_ids[key] = r
+        self._route_keys.append(key)
+        ids = [self._node(n) for n in key[0]] + [self._node(n) for n in key[1]]
+        self._nodes = self._grow(self._nodes, self._nodes_used + len(ids))
+        self._nodes[self._nodes_used:self._nodes_used + len(ids)] = ids
+        for name in ('_offset', '_path_len', '_recharge_len', '_refs'):
+            setattr(self, name, self._grow(getattr(self, name), r + 1))
+        self._offset[r] = self._nodes_used
+        self._path_len[r] = len(key[0])
+        self._recharge_len[r] = len(key[1])
+        self._refs[r] = 0
+        self._nodes_used += len(ids)
+        return r, True
+
+    def _compact(self):
+        """Descarta las rutas sin registros y renumera las vivas en el búfer de nodos."""
+        live = np.nonzero(self._refs[:len(self._route_keys)] > 0)[0]
+        remap = np.full(len(self._route_keys), -1, dtype=np.int32)
+        remap[live] = np.arange(len(live), dtype=np.int32)
+        lengths = self._path_len[live].astype(np.int64) + self._recharge_len[live]
+        offsets = np.cumsum(lengths) - lengths
+        nodes = np.empty(max(1024, int(lengths.sum())), dtype=np.int32)
+        for new, old in enumerate(live.tolist()):
+            start, length = int(self._offset[old]), int(lengths[new])
+            nodes[offsets[new]:offsets[new] + length] = self._nodes[start:start + length]
+        self._route_keys = [self._route_keys[r] for r in live.tolist()]
+        self._route_ids = {key: i for i, key in enumerate(self._route_keys)}
+        self._strings = {int(remap[r]): s for r, s in self._strings.items() if remap[r] >= 0}
+        self._path_len = self._path_len[live].copy()
+        self._recharge_len = self._recharge_len[live].copy()
+        self._refs = self._refs[live].copy()
+        self._offset = offsets
+        self._nodes = nodes
+        self._nodes_used = int(lengths.sum())
+        self._dead = 0
+        slots = self._slots()
+        self._route[slots] = remap[self._route[slots]]
+
+    # --- Registro ------------------------------------------------------------
+
+    def _slots(self):
+        """Posiciones físicas de los registros vivos, del más antiguo al más reciente."""
+        if self.capacity is None:
+            return np.arange(self._count)
+        return (self._start + np.arange(self._count)) % self.capacity
+
+    def append(self, path, cost, timestamp, recharge_stops=()):
+        r, new = self._intern_route(path, recharge_stops)
+        if self.capacity is None:
+            if self._count == len(self._route):
+                self._route = self._grow(self._route, self._count + 1)
+                self._cost = self._grow(self._cost, self._count + 1)
+                self._time = self._grow(self._time, self._count + 1)
+            slot = self._count
+            self._count += 1
+        elif self._count < self.capacity:
+            slot = (self._start + self._count) % self.capacity
+            self._count += 1
+        else:
+            slot = self._start
+            self._start = (self._start + 1) % self.capacity
+            evicted = self._route[slot]
+            self._refs[evicted] -= 1
+            if self._refs[evicted] == 0:
+                self._dead += 1
+        self._route[slot] = r
+        self._cost[slot] = cost
+        self._time[slot] = timestamp
+        if self._refs[r] == 0 and not new:
+            self._dead -= 1  # Una ruta que había quedado sin registros vuelve a usarse
+        self._refs[r] += 1
+        self._total += 1
+        if self._dead > max(1024, len(self._route_keys) // 2):
+            self._compact()
+
+    def __len__(self):
+        return self._count
+
+    def total_tracked(self):
+        """Registros agregados desde el inicio, incluidos los ya descartados por la retención."""
+        return self._total
+
+    def _physical(self, i):
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("route history index out of range")
+        return i if self.capacity is None else (self._start + i) % self.capacity
+
+    def route_id(self, i):
+        return int(self._route[self._physical(i)])
+
+    def path(self, r):
+        start = int(self._offset[r])
+        return [self._node_names[n] for n in self._nodes[start:start + self._path_len[r]].tolist()]
+
+    def recharge_stops(self, r):
+        start = int(self._offset[r] + self._path_len[r])
+        return [self._node_names[n] for n in self._nodes[start:start + self._recharge_len[r]].tolist()]
+
+    def route_string(self, r):
+        s = self._strings.get(r)
+        if s is None:
+            s = self._strings[r] = ROUTE_SEPARATOR.join(self._route_keys[r][0])
+        return s
+
+    def record(self, i):
+        """Registro i (0 = más antiguo) como dict, con las mismas claves que el historial anterior."""
+        slot = self._physical(i)
+        r = int(self._route[slot])
+        return {'route': self.route_string(r), 'path': self.path(r), 'cost': float(self._cost[slot]),
+                'timestamp': float(self._time[slot]), 'recharge_stops': self.recharge_stops(r)}
+
+    def view(self):
+        return RouteHistoryView(self)
+
+    # --- Exportación ---------------------------------------------------------
+
+    def to_columns(self):
+        """Columnas NumPy en orden cronológico más las tablas de rutas y nodos internados."""
+        slots = self._slots()
+        n_routes = len(self._route_keys)
+        return {
+            'route_id': self._route[slots].copy(),
+            'cost': self._cost[slots].copy(),
+            'timestamp': self._time[slots].copy(),
+            'route_offset': self._offset[:n_routes].copy(),
+            'route_path_len': self._path_len[:n_routes].copy(),
+            'route_recharge_len': self._recharge_len[:n_routes].copy(),
+            'node_buffer': self._nodes[:self._nodes_used].copy(),
+            'node_names': list(self._node_names),
+        }
+
+    def to_arrow(self):
+        """pyarrow.Table con una fila por registro; route y los nodos van codificados como diccionario."""
+        import pyarrow as pa
+        columns = self.to_columns()
+        n_routes = len(self._route_keys)
+        route_strings = pa.array([self.route_string(r) for r in range(n_routes)], type=pa.string())
+        node_names = pa.array(columns['node_names'], type=pa.string())
+
+        def node_lists(starts, lengths):
+            # Una lista por ruta distinta, tomada del búfer compartido, y luego repetida por registro.
+            offsets = np.zeros(n_routes + 1, dtype=np.int32)
+            np.cumsum(lengths, out=offsets[1:])
+            take = np.concatenate([np.arange(s, s + l) for s, l in zip(starts.tolist(), lengths.tolist())]) \
+                if n_routes else np.empty(0, dtype=np.int64)
+            values = pa.DictionaryArray.from_arrays(pa.array(columns['node_buffer'][take.astype(np.int64)], type=pa.int32()), node_names)
+            return pa.ListArray.from_arrays(pa.array(offsets), values).take(pa.array(columns['route_id']))
+
+        path = node_lists(columns['route_offset'], columns['route_path_len'])
+        recharges = node_lists(columns['route_offset'] + columns['route_path_len'], columns['route_recharge_len'])
+        return pa.table({
+            'route': pa.DictionaryArray.from_arrays(pa.array(columns['route_id'], type=pa.int32()), route_strings),
+            'path': path,
+            'cost': pa.array(columns['cost']),
+            'timestamp': pa.array(columns['timestamp']),
+            'recharge_stops': recharges,
+        })
+
+    def memory_bytes(self):
+        """Bytes de las columnas NumPy y de las tablas de internado (aprox. para las listas de Python)."""
+        arrays = (self._route, self._cost, self._time, self._offset, self._path_len,
+                  self._recharge_len, self._refs, self._nodes)
+        return int(sum(a.nbytes for a in arrays) + 100 * len(self._node_names) + 150 * len(self._route_keys))
+
+
+class RouteHistoryView(Sequence):
+    """Vista perezosa del historial: cada registro se arma como dict solo al accederlo."""
+
+    def __init__(self, history):
+        self._history = history
+
+    def __len__(self):
+        return len(self._history)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._history.record(i) for i in range(*index.indices(len(self)))]
+        return self._history.record(index)
+
+    def __iter__(self):
+        history = self._history
+        for i in range(len(history)):
+            yield history.record(i)
+
+    def __bool__(self):
+        return len(self._history) > 0
+
+    def __repr__(self):
+        return f"RouteHistoryView({len(self)} records)"
@@ -1,78 +1,536 @@
-import heapq
 from datetime import datetime
 import random
 import time
-from collections import defaultdict, Counter
+from collections import defaultdict, Counter, OrderedDict
 from domain.ruta import Route
 from domain.orden import Order
 from domain.cliente import Client
 from model.graph import Graph
+from model.bottleneck import BottleneckIndex
+from model.landmarks import LandmarkIndex
+from sim.route_history import RouteHistory, ROUTE_SEPARATOR
+from sim.scheduler import OrderScheduler
+from sim.stores import ClientStore, OrderStore
+from tda.sketches import CountMinSketch, SpaceSaving
+from tda.sliding_window import WindowedCounter
+from tda.ranked_counter import RankedCounter
 
 class RouteManager:
-    def __init__(self, graph: Graph):
+    MASK_CACHE_SIZE = 8  # Cantidad de máscaras de cierre con caché propia
+    POINT_QUERY_LIMIT = 3  # Con landmarks, hasta cuántos tramos candidatos se resuelven con A* en vez de SSSP
+    MAX_YEN_EXPANSIONS = 25  # Secuencias de paradas expandidas por ruta pedida al buscar alternativas distintas
+
+    def __init__(self, graph: Graph, landmarks: LandmarkIndex = None):
         self.graph = graph
-        self.route_cache = {}
+        self.landmarks = landmarks
+        self.route_cache = {}  # (origen, destino) -> tramo leído de un árbol SSSP en caché
+        self._point_cache = {}  # (origen, destino) -> tramo resuelto con A*, sin árbol que lo respalde
+        self.sssp_cache = {}  # origen -> ShortestPathResult
+        self.alternatives_cache = {}  # (origen, destino, batería, k, factor, máscara) -> [Route]
+        self._masked_cache = OrderedDict()  # ClosureMask -> {'trees': {...}, 'routes': {...}}
+        self._bottleneck_index = None
+        self._hops_cache = {}  # (parada, batería) -> [(estación, costo)] tramos factibles a estaciones
+        self._stations_cache = None
+        self._graph_version = graph._version
+        graph.add_weight_listener(self._on_edge_weight_changed)
+
+    def use_landmarks(self, num_landmarks=4, strategy='farthest', seed=None) -> LandmarkIndex:
+        """Construye landmarks ALT para acotar y acelerar los tramos de la búsqueda con recarga."""
+        self.landmarks = LandmarkIndex(self.graph, num_landmarks=num_landmarks, strategy=strategy, seed=seed)
+        return self.landmarks
+
+    def _active_landmarks(self):
+        # Tras cualquier cambio de pesos o estructura las cotas podrían no ser válidas.
+        if self.landmarks is not None and self.landmarks.is_current(self.graph):
+            return self.landmarks
+        return None
+
+    def clear_caches(self):
+        """Descarta todas las rutas y árboles calculados."""
+        self.route_cache.clear()
+        self._point_cache.clear()
+        self.sssp_cache.clear()
+        self.alternatives_cache.clear()
+        self._masked_cache.clear()
+        self._bottleneck_index = None
+        self._hops_cache.clear()
+        self._stations_cache = None
+        self._graph_version = self.graph._version
+
+    def _sync_with_graph(self):
+        # Un cambio estructural (insertar/eliminar vértices o aristas) invalida todo.
+        if self._graph_version != self.graph._version:
+            self.clear_caches()
+
+    def _on_edge_weight_changed(self, edge, old_weight):
+        """
+        Repara en su lugar cada árbol SSSP en caché y descarta solo las rutas cuyos
+        destinos cambiaron. Las cachés derivadas de muchos tramos se vacían.
+        """
+        self._sync_with_graph()
+        changed_by_source = {}
+        for source, tree in self.sssp_cache.items():
+            changed = tree.repair(self.graph, edge, old_weight)
+            if changed:
+                changed_by_source[source] = tree.elements(changed)
+        stale = [k for k in self.route_cache
+                 if k[0] not in self.sssp_cache or k[1] in changed_by_source.get(k[0], ())]
+        for key in stale:
+            del self.route_cache[key]
+        # Los tramos resueltos con A* no salen de ningún árbol reparado: se descartan siempre.
+        self._point_cache.clear()
+        self.alternatives_cache.clear()
+        self._masked_cache.clear()
+        self._bottleneck_index = None
+        self._hops_cache.clear()
+
+    def bottleneck_index(self) -> BottleneckIndex:
+        """Índice minimax sobre el MST, construido la primera vez que se necesita."""
+        self._sync_with_graph()
+        if self._bottleneck_index is None:
+            self._bottleneck_index = BottleneckIndex(self.graph)
+        return self._bottleneck_index
+
+    def _may_be_reachable(self, origin, destination, max_battery):
+        """
+        False si no puede haber ruta: un extremo no está en el grafo (el índice
+        minimax lo rechazaría con ValueError) o algún salto obligatorio supera
+        la batería, con o sin recargas.
+        """
+        if self.graph.get_vertex_by_element(origin) is None or self.graph.get_vertex_by_element(destination) is None:
+            return False
+        return self.bottleneck_index().is_reachable(origin, destination, max_battery)
+
+    def min_battery_for(self, origin, destination):
+        """Batería mínima para que exista un camino origen-destino sin saltos más largos que ella."""
+        return self.bottleneck_index().min_battery(origin, destination)
 
-    def get_path_and_cost(self, start_id, end_id):
+    def shortest_path_tree(self, start_id):
+        """Árbol de caminos mínimos desde start_id, calculado una sola vez por origen."""
+        self._sync_with_graph()
+        tree = self.sssp_cache.get(start_id)
+        if tree is None:
+            tree = self.graph.shortest_paths(start_id)
+            self.sssp_cache[start_id] = tree
+        return tree
+
+    def _mask_entry(self, mask):
+        entry = self._masked_cache.get(mask)
+        if entry is None:
+            entry = {'trees': {}, 'routes': {}}
+            self._masked_cache[mask] = entry
+            if len(self._masked_cache) > self.MASK_CACHE_SIZE:
+                self._masked_cache.popitem(last=False)
+        else:
+            self._masked_cache.move_to_end(mask)
+        return entry
+
+    def _get_masked_path_and_cost(self, start_id, end_id, mask):
+        """
+        Tramo más corto evitando la máscara. Si la ruta sin máscara (en caché) no toca
+        ningún cierre sigue siendo óptima, porque cerrar aristas solo alarga caminos.
+        """
+        entry = self._mask_entry(mask)
+        if (start_id, end_id) in entry['routes']:
+            return entry['routes'][(start_id, end_id)]
+        route_info = self.get_path_and_cost(start_id, end_id)
+        if route_info and mask.blocks_path(self.graph, route_info['path']):
+            tree = entry['trees'].get(start_id)
+            if tree is None:
+                tree = self.graph.shortest_paths(start_id, mask=mask)
+                entry['trees'][start_id] = tree
+            path = tree.path_to(end_id)
+            cost = tree.distance(end_id)
+            route_info = {'path': path, 'cost': cost} if path and cost != float('inf') else None
+        entry['routes'][(start_id, end_id)] = route_info
+        return route_info
+
+    def get_path_and_cost(self, start_id, end_id, mask=None):
+        if mask is not None and not mask.is_empty():
+            return self._get_masked_path_and_cost(start_id, end_id, mask)
+        self._sync_with_graph()
         if (start_id, end_id) in self.route_cache:
             return self.route_cache[(start_id, end_id)]
-        distances, predecessors = self.graph.dijkstra(start_id)
-        path = self.graph.get_shortest_path(start_id, end_id, predecessors)
-        cost = distances.get(end_id, float('inf'))
+        tree = self.shortest_path_tree(start_id)
+        path = tree.path_to(end_id)
+        cost = tree.distance(end_id)
         if path and cost != float('inf'):
             route_info = {'path': path, 'cost': cost}
             self.route_cache[(start_id, end_id)] = route_info
             return route_info
         return None
 
-    def find_route_with_recharge(self, origin, destination, max_battery: int) -> Route | None:
+    def _point_path_and_cost(self, start_id, end_id, landmarks):
+        """Tramo start->end con A* guiado por landmarks, sin calcular el árbol completo."""
+        self._sync_with_graph()
+        key = (start_id, end_id)
+        if key in self.route_cache:
+            return self.route_cache[key]
+        if key in self._point_cache:
+            return self._point_cache[key]
+        result = self.graph.astar(start_id, end_id, heuristic=landmarks.heuristic(end_id))
+        path = result.path_to(end_id)
+        cost = result.distance(end_id)
+        if path and cost != float('inf'):
+            route_info = {'path': path, 'cost': cost}
+            self._point_cache[key] = route_info
+            return route_info
+        return None
+
+    def find_route_with_recharge(self, origin, destination, max_battery: int, frontier=None, mask=None,
+                                 penalties=None) -> Route | None:
         """
-        Encuentra la ruta óptima... (el resto de la función se mantiene igual)
+        Encuentra la ruta óptima de origen a destino sin que ningún tramo entre
+        recargas supere max_battery. frontier elige el backend de la cola de
+        prioridad (ver tda.priority_queue); por defecto se decide según el tamaño del grafo.
+        mask es una ClosureMask opcional (zonas de exclusión) que la ruta debe evitar.
+        Con landmarks activos, desde una parada sin árbol SSSP en caché se descartan
+        sin buscar los tramos cuya cota inferior supera la batería (o no pueden
+        mejorar la mejor llegada conocida), y si quedan pocos se resuelven con A*.
+        penalties es un dict opcional estación -> costo extra por recargar ahí
+        (congestión, ver sim.stations): cuenta para elegir la ruta pero no para
+        la batería ni para el total_cost de la Route, y como no toca los pesos
+        del grafo no invalida ningún árbol ni tramo en caché.
         """
-        pq = [(0, origin, [origin], [])]
-        visited = {origin: 0}
-        recharge_stations = {v.element() for v in self.graph.vertices() if v.type() == 'recharge'}
+        if not self._may_be_reachable(origin, destination, max_battery):
+            return None
+
+        recharge_stations = self._recharge_stations()
+        possible_next_stops = recharge_stations.union({destination})
+        landmarks = self._active_landmarks()
+        unmasked = mask is None or mask.is_empty()
+        pq = self.graph._make_frontier(frontier, len(recharge_stations) + 2)
+        pq.push(origin, 0)
+        visited = {origin: 0}  # Costo de búsqueda (distancia más penalizaciones)
+        previous = {origin: None}
 
         while pq:
-            total_cost, current_node, path, recharges = heapq.heappop(pq)
-            if current_node == destination:
-                return Route(path=path, total_cost=total_cost, recharge_stops=recharges, segments=[])
+            total_cost, current_node = pq.pop()
             if total_cost > visited[current_node]:
                 continue
-            
-            possible_next_stops = recharge_stations.union({destination})
-            for next_stop in possible_next_stops:
-                if next_stop == current_node:
-                    continue
-                segment_info = self.get_path_and_cost(current_node, next_stop)
-                if segment_info and segment_info['cost'] <= max_battery:
-                    new_cost = total_cost + segment_info['cost']
+            if current_node == destination:
+                stops = []
+                while current_node is not None:
+                    stops.append(current_node)
+                    current_node = previous[current_node]
+                return self._stops_to_route(stops[::-1], recharge_stations, mask)
+
+            penalty = penalties.get(current_node, 0) if penalties and current_node != origin else 0
+            if unmasked and (landmarks is None or current_node in self.sssp_cache):
+                # Tramos a las estaciones en caché por batería; solo el del destino se consulta.
+                hops = self._station_hops(current_node, max_battery)
+                hops = hops + [(destination, self.shortest_path_tree(current_node).distance(destination))]
+            else:
+                hops = self._searched_hops(current_node, possible_next_stops, max_battery, total_cost + penalty,
+                                           visited, landmarks, mask)
+            for next_stop, cost in hops:
+                if cost <= max_battery and next_stop != current_node:
+                    new_cost = total_cost + penalty + cost
                     if new_cost < visited.get(next_stop, float('inf')):
                         visited[next_stop] = new_cost
-                        new_path = path[:-1] + segment_info['path']
-                        new_recharges = recharges + [current_node] if current_node in recharge_stations else recharges
-                        heapq.heappush(pq, (new_cost, next_stop, new_path, new_recharges))
+                        previous[next_stop] = current_node
+                        pq.push(next_stop, new_cost)
         return None
 
+    def _searched_hops(self, current_node, possible_next_stops, max_battery, cost_so_far, visited, landmarks, mask):
+        """
+        Tramos (parada, costo) desde current_node resolviendo cada uno con la
+        máscara o, con landmarks y sin árbol en caché, podando por cota y con A*.
+        """
+        candidates = [stop for stop in possible_next_stops if stop != current_node]
+        point_queries = False
+        if landmarks is not None and candidates and (mask is None or mask.is_empty()):
+            # Holgura relativa para que el redondeo de las cotas no descarte tramos exactos.
+            bounds = landmarks.lower_bounds(current_node, candidates) * (1 - 1e-9)
+            candidates = [stop for stop, bound in zip(candidates, bounds.tolist())
+                          if bound <= max_battery and cost_so_far + bound < visited.get(stop, float('inf'))]
+            point_queries = len(candidates) <= self.POINT_QUERY_LIMIT
+        hops = []
+        for next_stop in candidates:
+            if point_queries:
+                segment_info = self._point_path_and_cost(current_node, next_stop, landmarks)
+            else:
+                segment_info = self.get_path_and_cost(current_node, next_stop, mask)
+            if segment_info:
+                hops.append((next_stop, segment_info['cost']))
+        return hops
+
+    def _station_hops(self, node, max_battery):
+        """Estaciones de recarga alcanzables desde node con max_battery, con su costo (en caché)."""
+        self._sync_with_graph()
+        key = (node, max_battery)
+        hops = self._hops_cache.get(key)
+        if hops is None:
+            stations = list(self._recharge_stations())
+            costs = self.shortest_path_tree(node).distances(stations)
+            hops = [(station, cost) for station, cost in zip(stations, costs) if cost <= max_battery]
+            self._hops_cache[key] = hops
+        return hops
+
+    def _recharge_stations(self):
+        self._sync_with_graph()
+        if self._stations_cache is None:
+            self._stations_cache = {v.element() for v in self.graph.vertices() if v.type() == 'recharge'}
+        return self._stations_cache
+
+    def _segment_cost(self, start_id, end_id, mask=None):
+        """Costo del tramo más corto start->end usando el árbol SSSP en caché."""
+        if mask is None or mask.is_empty():
+            return self.shortest_path_tree(start_id).distance(end_id)
+        segment_info = self.get_path_and_cost(start_id, end_id, mask)
+        return segment_info['cost'] if segment_info else float('inf')
+
+    def _stops_to_route(self, stops, recharge_stations, mask=None):
+        path = [stops[0]]
+        total_cost = 0
+        for a, b in zip(stops, stops[1:]):
+            segment_info = self.get_path_and_cost(a, b, mask)
+            path = path[:-1] + segment_info['path']
+            total_cost += segment_info['cost']
+        recharges = [stop for stop in stops[:-1] if stop in recharge_stations]
+        return Route(path=path, total_cost=total_cost, recharge_stops=recharges, segments=[])
+
+    def _spur_search(self, origin, destination, max_battery, stops, banned_stops, banned_hops, mask=None):
+        """Dijkstra sobre el grafo de paradas (origen, recargas, destino) con paradas y tramos vetados."""
+        frontier = self.graph._make_frontier(None, len(stops))
+        frontier.push(origin, 0)
+        best = {origin: 0}
+        previous = {origin: None}
+        while frontier:
+            cost, current = frontier.pop()
+            if cost > best[current]:
+                continue
+            if current == destination:
+                sequence = []
+                while current is not None:
+                    sequence.append(current)
+                    current = previous[current]
+                return cost, sequence[::-1]
+            for next_stop in stops:
+                if next_stop == current or next_stop in banned_stops or (current, next_stop) in banned_hops:
+                    continue
+                hop = self._segment_cost(current, next_stop, mask)
+                if hop > max_battery:
+                    continue
+                new_cost = cost + hop
+                if new_cost < best.get(next_stop, float('inf')):
+                    best[next_stop] = new_cost
+                    previous[next_stop] = current
+                    frontier.push(next_stop, new_cost)
+        return None
+
+    def find_k_routes_with_recharge(self, origin, destination, max_battery: int, k: int = 3, max_cost_factor: float = 1.5, mask=None) -> list[Route]:
+        """
+        Retorna hasta k rutas factibles con recarga, físicamente distintas y ordenadas por
+        costo (algoritmo de Yen sobre el grafo de paradas). Solo se incluyen rutas cuyo costo no supera
+        max_cost_factor veces el costo de la ruta óptima. Los tramos reutilizan los
+        árboles SSSP en caché y el resultado queda guardado en alternatives_cache.
+        """
+        key = (origin, destination, max_battery, k, max_cost_factor, mask)
+        if key in self.alternatives_cache:
+            return self.alternatives_cache[key]
+        if k <= 0 or not self._may_be_reachable(origin, destination, max_battery):
+            return []
+
+        recharge_stations = self._recharge_stations()
+        stops = recharge_stations.union({destination})
+        first = self._spur_search(origin, destination, max_battery, stops, set(), set(), mask)
+        if first is None:
+            self.alternatives_cache[key] = []
+            return []
+
+        cost_limit = first[0] * max_cost_factor
+        # Varias secuencias de paradas pueden dar el mismo camino físico (una estación por la
+        # que el tramo ya pasaba, marcada o no como recarga). Yen sigue expandiendo todas las
+        # secuencias, pero solo se aceptan rutas con un camino nuevo.
+        explored = [first]
+        routes = [self._stops_to_route(first[1], recharge_stations, mask)]
+        paths = {tuple(routes[0].path)}
+        candidates = []
+        seen = {tuple(first[1])}
+        while len(routes) < k and len(explored) < self.MAX_YEN_EXPANSIONS * k:
+            last_stops = explored[-1][1]
+            root_cost = 0
+            for i in range(len(last_stops) - 1):
+                spur_node = last_stops[i]
+                root = last_stops[:i + 1]
+                banned_hops = {(p[i], p[i + 1]) for _, p in explored if p[:i + 1] == root and len(p) > i + 1}
+                spur = self._spur_search(spur_node, destination, max_battery, stops, set(root[:-1]), banned_hops, mask)
+                if spur is not None:
+                    total_stops = root[:-1] + spur[1]
+                    total_cost = root_cost + spur[0]
+                    if tuple(total_stops) not in seen and total_cost <= cost_limit:
+                        seen.add(tuple(total_stops))
+                        candidates.append((total_cost, total_stops))
+                root_cost += self._segment_cost(last_stops[i], last_stops[i + 1], mask)
+            if not candidates:
+                break
+            candidates.sort(key=lambda c: c[0])
+            explored.append(candidates.pop(0))
+            route = self._stops_to_route(explored[-1][1], recharge_stations, mask)
+            if tuple(route.path) not in paths:
+                paths.add(tuple(route.path))
+                routes.append(route)
+
+        self.alternatives_cache[key] = routes
+        return routes
+
 class RouteTracker:
-    """Rastrea el historial de rutas, frecuencia y otras estadísticas. (Sin cambios)"""
-    def __init__(self):
-        self.route_history = []; self.route_frequency = Counter()
-        self.node_visits = Counter(); self.client_orders = defaultdict(int)
+    """
+    Rastrea el historial de rutas, frecuencia y otras estadísticas.
+    El historial es columnar (RouteHistory); con history_capacity solo se
+    conservan los últimos registros, mientras que frecuencias y visitas
+    siguen contando todas las rutas.
+    Con approximate=True las frecuencias de rutas y visitas a nodos usan
+    memoria fija: Space-Saving (sketch_capacity contadores) para los top-k y
+    Count-Min (error relativo sketch_epsilon con probabilidad 1 - sketch_delta)
+    para consultas puntuales. Los rastreadores se combinan con merge().
+    Además cuenta rutas, visitas y pedidos por cliente en ventanas deslizantes
+    (window_buckets intervalos de window_bucket_seconds) para consultar la
+    actividad reciente sin recorrer el historial.
+    clock da el instante de los eventos registrados sin timestamp y el "ahora"
+    de las ventanas; por defecto es el reloj real (time.time). Una simulación
+    en tiempo simulado necesita su propio rastreador con su reloj.
+    """
+    def __init__(self, history_capacity=None, approximate=False, sketch_capacity=1000,
+                 sketch_epsilon=0.001, sketch_delta=0.01, window_bucket_seconds=10.0, window_buckets=90,
+                 clock=time.time):
+        self.clock = clock
+        self.route_history = RouteHistory(capacity=history_capacity)
+        self.approximate = approximate
+        if approximate:
+            self.route_frequency = SpaceSaving(sketch_capacity)
+            self.node_visits = SpaceSaving(sketch_capacity)
+            self.route_sketch = CountMinSketch.from_error(sketch_epsilon, sketch_delta)
+            self.node_sketch = CountMinSketch.from_error(sketch_epsilon, sketch_delta)
+        else:
+            self.route_frequency = Counter(); self.node_visits = Counter()
+        self.client_orders = defaultdict(int)
         self.order_records = []
-    def track_route(self, route: Route):
+        self.recent_routes = WindowedCounter(window_bucket_seconds, window_buckets, clock=clock)
+        self.recent_nodes = WindowedCounter(window_bucket_seconds, window_buckets, clock=clock)
+        self.recent_clients = WindowedCounter(window_bucket_seconds, window_buckets, clock=clock)
+        self.journal = None  # SimulationJournal opcional donde se registra cada mutación
+        self.node_roles = None  # nodo -> rol; con él se mantienen los rankings de visitas por rol
+        self.role_visits = {}  # rol -> RankedCounter
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['journal'] = None  # La bitácora no forma parte de los snapshots
+        return state
+    def track_route(self, route: Route, timestamp=None):
         if route:
-            route_str = " -> ".join(route.path)
-            self.route_history.append({'route': route_str, 'path': route.path, 'cost': route.total_cost, 'timestamp': time.time(), 'recharge_stops': route.recharge_stops})
-            self.route_frequency[route_str] += 1
-            for node in route.path: self.node_visits[node] += 1
-    def track_client_order(self, client_id: str): self.client_orders[client_id] += 1
-    def track_order(self, order_id: str, order: Order): self.order_records.append((order_id, order))
-    def get_most_frequent_routes(self, limit=10): return self.route_frequency.most_common(limit)
-    def get_node_visit_stats(self, limit=20): return self.node_visits.most_common(limit)
+            route_str = ROUTE_SEPARATOR.join(route.path)
+            now = self.clock() if timestamp is None else timestamp
+            self.route_history.append(route.path, route.total_cost, now, route.recharge_stops)
+            self.recent_routes.add(route_str, now=now)
+            for node in route.path: self.recent_nodes.add(node, now=now)
+            if self.approximate:
+                self.route_frequency.update(route_str); self.route_sketch.update(route_str)
+                for node in route.path:
+                    self.node_visits.update(node); self.node_sketch.update(node)
+            else:
+                self.route_frequency[route_str] += 1
+                for node in route.path: self.node_visits[node] += 1
+            if self.node_roles is not None:
+                for node in route.path:
+                    role = self.node_roles.get(node)
+                    if role is not None: self.role_visits[role].increment(node)
+            # Se registra después de aplicar el cambio: un snapshot disparado por la bitácora ya lo incluye
+            if self.journal is not None: self.journal.route_tracked(route, now)
+    def track_client_order(self, client_id: str, timestamp=None):
+        now = self.clock() if timestamp is None else timestamp
+        self.client_orders[client_id] += 1
+        self.recent_clients.add(client_id, now=now)
+        if self.journal is not None: self.journal.client_order_tracked(client_id, now)
+    def track_order(self, order_id: str, order: Order):
+        self.order_records.append((order_id, order))
+        if self.journal is not None: self.journal.order_tracked(order_id)
+    def get_most_frequent_routes(self, limit=10, with_error=False):
+        """[(ruta, frecuencia)], o [(ruta, frecuencia, error máximo)] con with_error."""
+        return self._top(self.route_frequency, limit, with_error)
+    def get_node_visit_stats(self, limit=20, with_error=False):
+        """[(nodo, visitas)], o [(nodo, visitas, error máximo)] con with_error."""
+        return self._top(self.node_visits, limit, with_error)
+    def set_node_roles(self, roles):
+        """
+        Define el rol de cada nodo ({nodo: rol}, p. ej. a partir de los vértices
+        del grafo) y arma un ranking de visitas por rol con las visitas ya
+        registradas; desde entonces cada ruta lo actualiza en O(1) por nodo.
+        """
+        self.node_roles = dict(roles)
+        per_role = defaultdict(dict)
+        for node, visits in self.node_visits.most_common(None):
+            role = self.node_roles.get(node)
+            if role is not None: per_role[role][node] = visits
+        self.role_visits = {role: RankedCounter(per_role.get(role)) for role in set(self.node_roles.values())}
+    def get_role_visit_ranking(self, role, offset=0, limit=None):
+        """([(nodo, visitas)] de la página pedida, total de nodos visitados con ese rol)."""
+        ranking = self.role_visits.get(role)
+        if ranking is None:
+            return [], 0
+        return ranking.page(offset, limit), len(ranking)
+    def get_recent_routes(self, window=None, limit=10):
+        """Rutas más frecuentes en los últimos window segundos (todo el rango si es None)."""
+        return self.recent_routes.top_k(limit, window)
+    def get_recent_node_visits(self, window=None, limit=20, nodes=None):
+        """Nodos más visitados en la ventana; nodes restringe el ranking a ese conjunto."""
+        return self.recent_nodes.top_k(limit, window, keys=nodes)
+    def get_recent_clients(self, window=None, limit=10):
+        """Clientes con más pedidos en la ventana."""
+        return self.recent_clients.top_k(limit, window)
+    def _top(self, counter, limit, with_error):
+        if not with_error:
+            return counter.most_common(limit)
+        if self.approximate:
+            return counter.top_k(limit)
+        return [(item, count, 0) for item, count in counter.most_common(limit)]
+    def _estimate(self, summary, sketch, item):
+        if not self.approximate:
+            return summary[item], 0
+        # Cota superior: la menor entre Space-Saving y Count-Min; cota inferior: la de Space-Saving
+        upper, error = summary.estimate(item)
+        lower = upper - error if item in summary else 0
+        upper = min(upper, sketch.estimate(item))
+        return upper, upper - lower
+    def estimate_route_frequency(self, route):
+        """(frecuencia, error máximo) de una ruta, dada como camino o como texto "A -> B"."""
+        route_str = route if isinstance(route, str) else ROUTE_SEPARATOR.join(route)
+        return self._estimate(self.route_frequency, getattr(self, 'route_sketch', None), route_str)
+    def estimate_node_visits(self, node):
+        """(visitas, error máximo) de un nodo."""
+        return self._estimate(self.node_visits, getattr(self, 'node_sketch', None), node)
+    def merge(self, other: "RouteTracker"):
+        """
+        Suma las frecuencias, visitas, pedidos por cliente y ventanas recientes de otro rastreador
+        (por ejemplo, de un proceso trabajador) con el mismo modo y tamaños de sketch.
+        El historial y los registros de órdenes no se combinan.
+        """
+        if other.approximate != self.approximate:
+            raise ValueError("Cannot merge exact and approximate trackers.")
+        if other.clock is not self.clock:
+            raise ValueError("Cannot merge trackers that run on different clocks.")
+        if self.approximate:
+            self.route_frequency.merge(other.route_frequency); self.route_sketch.merge(other.route_sketch)
+            self.node_visits.merge(other.node_visits); self.node_sketch.merge(other.node_sketch)
+        else:
+            self.route_frequency.update(other.route_frequency); self.node_visits.update(other.node_visits)
+        for client_id, count in other.client_orders.items():
+            self.client_orders[client_id] += count
+        self.recent_routes.merge(other.recent_routes)
+        self.recent_nodes.merge(other.recent_nodes)
+        self.recent_clients.merge(other.recent_clients)
+        if self.node_roles is not None:
+            combined = {role: dict(ranking.most_common()) for role, ranking in self.role_visits.items()}
+            for node, visits in other.node_visits.most_common(None):
+                role = self.node_roles.get(node)
+                if role is not None: combined[role][node] = combined[role].get(node, 0) + visits
+            self.role_visits = {role: RankedCounter(counts) for role, counts in combined.items()}
+        return self
     def get_client_stats(self): return sorted(self.client_orders.items(), key=lambda x: x[1], reverse=True)
     def get_order_stats(self): return self.order_records
-    def get_route_history(self): return self.route_history
+    def get_route_history(self):
+        """Vista perezosa del historial: cada registro se arma como dict solo al recorrerlo."""
+        return self.route_history.view()
 
 
 class RouteOptimizer:
@@ -89,16 +547,17 @@ class OrderSimulator:
     def __init__(self, route_manager: RouteManager, route_tracker: RouteTracker):
         self.route_manager = route_manager
         self.tracker = route_tracker
-        self.clients = []
-        self.orders = []
+        self.clients = ClientStore()
+        self.orders = OrderStore()
+        self.scheduler = OrderScheduler()  # Órdenes creadas que aún no se procesaron
         
     def generate_clients(self, graph: Graph):
-        self.clients = []
+        self.clients = ClientStore()
         client_nodes = [v.element() for v in graph.vertices() if v.type() == 'client']
         for i, node_id in enumerate(client_nodes):
             client_type = random.choice(["Premium", "Normal"])
             client = Client(id=f"C{i+1:03d}", name=f"Cliente {i+1}", node_id=node_id, client_type=client_type)
-            self.clients.append(client)
+            self.clients.add(client)
         return self.clients
     
     # <-- INICIO DE LA LÓGICA MODIFICADA ---
@@ -113,22 +572,26 @@ class OrderSimulator:
 
         # 1. Primero, CREAMOS todas las órdenes y las dejamos en estado 'pending'.
         print(f"Creando {num_orders_to_create} órdenes...")
-        for i in range(num_orders_to_create):
+        first_id = len(self.orders) + 1  # Los ids siguen de una llamada a otra sin repetirse
+        for i in range(first_id, first_id + num_orders_to_create):
             origin = random.choice(warehouse_nodes)
             client = random.choice(self.clients)
             order = Order(
-                order_id=f"ORD{i+1:03d}", client=client, origin=origin,
+                order_id=f"ORD{i:03d}", client=client, origin=origin,
                 destination=client.node_id, weight=random.uniform(0.5, 5.0),
                 priority=random.choice(['normal', 'urgent']))
-            self.orders.append(order) # La añadimos a la lista principal
+            self.orders.add(order) # La añadimos al store principal
+            self.scheduler.push(order, order.creation_date.timestamp())
+            if self.tracker.journal is not None: self.tracker.journal.order_created(order)
 
-        # 2. Luego, PROCESAMOS solo una parte de ellas.
-        # Asegurarnos de no procesar más órdenes de las que existen
-        orders_to_process_list = self.orders[:min(num_orders_to_process, len(self.orders))]
+        # 2. Luego, PROCESAMOS solo una parte de ellas, urgentes primero (con envejecimiento).
+        orders_to_process_list = self.scheduler.pop_many(num_orders_to_process)
         
         print(f"Procesando {len(orders_to_process_list)} de {len(self.orders)} órdenes totales...")
         for order in orders_to_process_list:
+            popped_at = datetime.now().timestamp()
             self._process_single_order(order, max_battery)
+            self.scheduler.finish(order, popped_at, failed=order.status == "Fallido")
             self.tracker.track_client_order(order.client.id)
             self.tracker.track_order(order.order_id, order) # Rastreamos la orden procesada
     
@@ -149,12 +612,13 @@ class OrderSimulator:
             # Lógica para marcar como fallida
             order.status = "Fallido"
             print(f"Estado: Fallido - No se pudo encontrar una ruta válida ❌")
+        if self.tracker.journal is not None: self.tracker.journal.order_routed(order)
     # <-- FIN DE LA LÓGICA MODIFICADA ---
             
     def get_simulation_summary(self):
         if not self.orders: return "No hay órdenes para generar un resumen."
         total = len(self.orders)
-        processed = sum(1 for o in self.orders if o.status in ["Entregado", "Fallido"])
+        delivered = self.orders.count("Entregado")
+        processed = delivered + self.orders.count("Fallido")
         pending = total - processed
-        delivered = sum(1 for o in self.orders if o.status == "Entregado")
         return (f"Órdenes totales: {total}, Pendientes: {pending}, Procesadas: {processed}, Entregadas con éxito: {delivered}")
\ No newline at end of file
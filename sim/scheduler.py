@@ -0,0 +1,182 @@
+import heapq
+from collections import deque
+
+
+class OrderScheduler:
+    """
+    Cola de órdenes pendientes: urgentes primero, con envejecimiento.
+
+    Cada orden se ordena por su plazo, llegada + holgura de su prioridad
+    (allowances, en segundos). Con la holgura por defecto una urgente pasa
+    delante de las normales que llegaron hasta media hora antes, pero una
+    normal que ya esperó más que eso le gana a las urgentes nuevas, así que
+    ninguna espera para siempre. Como la clave de una orden no cambia
+    mientras espera, el envejecimiento no exige recorrer la cola.
+
+    Es un heap binario (heapq) indexado por order_id: el índice apunta a la
+    entrada vigente de cada orden, cambiar la prioridad empuja una entrada
+    nueva (O(log n)) y cancelar solo anula la vigente (O(1)); las entradas
+    anuladas se descartan al llegar a la cima o al compactar, cuando son
+    más de la mitad del heap. Una orden tomada con pop sigue registrada
+    hasta finish, que anota su espera y si fue despachada o falló en las
+    estadísticas de su prioridad, o requeue, que la devuelve a la cola con
+    su llegada original. Las estadísticas de espera cubren las últimas
+    wait_window órdenes de cada prioridad (un búfer circular), así que un
+    servidor de larga duración no acumula esperas sin límite; los conteos
+    son desde el inicio.
+    """
+
+    DEFAULT_ALLOWANCES = {'urgent': 0.0, 'normal': 1800.0}
+    COMPACT_MIN_SIZE = 1024  # Con menos entradas no vale la pena compactar
+    WAIT_WINDOW = 4096  # Esperas recientes que se conservan por prioridad para media, p95 y máximo
+
+    def __init__(self, allowances=None, wait_window=WAIT_WINDOW):
+        if wait_window < 1:
+            raise ValueError("wait_window must be at least 1.")
+        self.allowances = dict(self.DEFAULT_ALLOWANCES if allowances is None else allowances)
+        self._default_allowance = max(self.allowances.values(), default=0.0)
+        self.wait_window = wait_window
+        self._heap = []  # [plazo, secuencia, order_id o None si la entrada fue anulada]
+        self._live = {}  # order_id -> entrada vigente en el heap
+        self._stale = 0
+        self._entries = {}  # order_id -> (llegada, Order), desde push hasta finish/cancel
+        self._seq = 0
+        self._stats = {}  # prioridad -> {'dispatched', 'failed', 'cancelled', 'waits' (últimas esperas)}
+        self._queued = {}  # prioridad -> órdenes en cola
+
+    @classmethod
+    def from_pending(cls, orders, allowances=None, wait_window=WAIT_WINDOW):
+        """
+        Cola con las órdenes en estado pending de un OrderStore (por ejemplo,
+        recuperado de la bitácora), con su fecha de creación como llegada.
+        Las estadísticas de antes de la recuperación no se conservan.
+        """
+        scheduler = cls(allowances, wait_window)
+        for order in orders.by_status("pending"):
+            scheduler.push(order, order.creation_date.timestamp())
+        return scheduler
+
+    def __len__(self):
+        return len(self._live)
+
+    def __bool__(self):
+        return bool(self._live)
+
+    def __contains__(self, order_id):
+        return order_id in self._live
+
+    def _enqueue(self, order, arrival):
+        order_id = order.order_id
+        if order_id in self._live:
+            self._invalidate(order_id)
+        else:
+            self._queued[order.priority] = self._queued.get(order.priority, 0) + 1
+        self._seq += 1  # Desempate por orden de llegada a la cola
+        entry = [arrival + self.allowances.get(order.priority, self._default_allowance), self._seq, order_id]
+        self._live[order_id] = entry
+        heapq.heappush(self._heap, entry)
+
+    def _invalidate(self, order_id):
+        self._live.pop(order_id)[2] = None
+        self._stale += 1
+        if self._stale > len(self._heap) // 2 and len(self._heap) > self.COMPACT_MIN_SIZE:
+            self._heap = [entry for entry in self._heap if entry[2] is not None]
+            heapq.heapify(self._heap)
+            self._stale = 0
+
+    def _dequeue(self, order):
+        self._invalidate(order.order_id)
+        self._queued[order.priority] -= 1
+
+    def push(self, order, now):
+        """Encola una orden que llega en el instante now (segundos)."""
+        self._entries[order.order_id] = (now, order)
+        self._enqueue(order, now)
+
+    def requeue(self, order):
+        """Devuelve a la cola una orden tomada con pop, con su llegada original."""
+        arrival, _ = self._entries[order.order_id]
+        self._enqueue(order, arrival)
+
+    def peek(self):
+        """La orden más prioritaria sin sacarla de la cola, o None si no hay ninguna esperando."""
+        heap = self._heap
+        while heap and heap[0][2] is None:
+            heapq.heappop(heap)
+            self._stale -= 1
+        return self._entries[heap[0][2]][1] if heap else None
+
+    def pop(self):
+        """Saca la orden más prioritaria (sigue registrada hasta finish o requeue), o None si no hay."""
+        order = self.peek()
+        if order is None:
+            return None
+        entry = heapq.heappop(self._heap)
+        del self._live[entry[2]]
+        self._queued[order.priority] -= 1
+        return order
+
+    def pop_many(self, n):
+        orders = []
+        while self._live and len(orders) < n:
+            orders.append(self.pop())
+        return orders
+
+    def reprioritize(self, order_id, priority):
+        """Cambia la prioridad de una orden en cola conservando su llegada. Retorna la orden o None."""
+        entry = self._entries.get(order_id)
+        if entry is None or order_id not in self._live:
+            return None
+        arrival, order = entry
+        self._dequeue(order)
+        order.priority = priority
+        self._enqueue(order, arrival)
+        return order
+
+    def cancel(self, order_id):
+        """Quita de la cola una orden que todavía espera. Retorna la orden o None."""
+        if order_id not in self._live:
+            return None
+        _, order = self._entries.pop(order_id)
+        self._dequeue(order)
+        self._priority_stats(order.priority)['cancelled'] += 1
+        return order
+
+    def finish(self, order, now, failed=False):
+        """La orden salió de la cola para siempre: anota su espera y si fue despachada o falló."""
+        if order.order_id in self._live:
+            self._dequeue(order)
+        arrival, _ = self._entries.pop(order.order_id)
+        stats = self._priority_stats(order.priority)
+        stats['failed' if failed else 'dispatched'] += 1
+        stats['waits'].append(now - arrival)
+
+    def _priority_stats(self, priority):
+        stats = self._stats.get(priority)
+        if stats is None:
+            stats = self._stats[priority] = {'dispatched': 0, 'failed': 0, 'cancelled': 0,
+                                             'waits': deque(maxlen=self.wait_window)}
+        return stats
+
+    def stats(self):
+        """Por prioridad: en cola, despachadas, fallidas, canceladas y espera reciente en cola (segundos)."""
+        queued = self._queued
+        report = {}
+        for priority in sorted(set(self._stats) | set(queued)):
+            stats = self._priority_stats(priority)
+            report[priority] = dict(latency_summary(stats['waits'], 'wait'), queued=queued.get(priority, 0),
+                                    dispatched=stats['dispatched'], failed=stats['failed'],
+                                    cancelled=stats['cancelled'])
+        return report
+
+
+def latency_summary(seconds, prefix):
+    """Media, p95 y máximo (en segundos) de una lista de latencias, con claves prefijadas."""
+    ordered = sorted(seconds)
+    if not ordered:
+        return {f'mean_{prefix}_seconds': 0.0, f'p95_{prefix}_seconds': 0.0, f'max_{prefix}_seconds': 0.0}
+    return {
+        f'mean_{prefix}_seconds': sum(ordered) / len(ordered),
+        f'p95_{prefix}_seconds': ordered[int(0.95 * (len(ordered) - 1))],
+        f'max_{prefix}_seconds': ordered[-1],
+    }
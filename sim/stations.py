@@ -0,0 +1,179 @@
+import math
+from collections import deque
+
+
+class RechargeStation:
+    """
+    Estación de recarga con una cantidad fija de puestos y una cola FIFO de
+    drones esperando puesto.
+    """
+
+    def __init__(self, node_id, slots, service_seconds):
+        if slots < 1:
+            raise ValueError("A recharge station needs at least one slot.")
+        self.node_id = node_id
+        self.slots = slots
+        self.charging = 0
+        self.queue = deque()  # (instante de llegada, dato del cliente)
+        self.served = 0
+        self.waited = 0  # Cargas que tuvieron que esperar puesto
+        self.wait_seconds = 0.0
+        self.max_queue = 0
+        self._service_total = 0.0
+        self._service_default = service_seconds
+
+    def mean_service_seconds(self):
+        """Duración media observada de una carga (la estimada mientras no haya datos)."""
+        return self._service_total / self.served if self.served else self._service_default
+
+    def expected_wait_seconds(self):
+        """Espera estimada de un dron que llegara ahora: drones por delante repartidos entre los puestos."""
+        ahead = self.charging + len(self.queue) - self.slots + 1
+        if ahead <= 0:
+            return 0.0
+        return ahead * self.mean_service_seconds() / self.slots
+
+    def __str__(self):
+        return (f"RechargeStation(node={self.node_id}, slots={self.slots}, charging={self.charging}, "
+                f"queued={len(self.queue)})")
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class StationNetwork:
+    """
+    Capacidad y colas de las estaciones de recarga, más las penalizaciones
+    por congestión que usa el ruteo.
+
+    La penalización de una estación es su espera estimada convertida a
+    unidades de costo (cost_per_second) y redondeada hacia abajo a múltiplos
+    de penalty_step, para que las fluctuaciones chicas de carga no la
+    cambien. Cada cambio de penalización avanza la época (epoch) y queda en
+    un registro acotado; con él, is_still_optimal decide si una ruta
+    calculada en una época anterior sigue siendo óptima sin recalcularla.
+    Las penalizaciones no tocan los pesos del grafo, así que los árboles y
+    tramos en caché del RouteManager nunca se invalidan.
+    """
+
+    LOG_SIZE = 4096  # Cambios de penalización recordados para validar rutas
+
+    def __init__(self, nodes, slots=2, service_seconds=450.0, cost_per_second=0.0, penalty_step=1.0):
+        """slots es un entero para todas las estaciones o un dict nodo -> puestos (el resto usa 2)."""
+        if penalty_step <= 0:
+            raise ValueError("penalty_step must be positive.")
+        per_node = slots if isinstance(slots, dict) else {}
+        default = 2 if isinstance(slots, dict) else slots
+        self.stations = {node: RechargeStation(node, per_node.get(node, default), service_seconds)
+                         for node in nodes}
+        self.cost_per_second = cost_per_second
+        self.penalty_step = penalty_step
+        self.epoch = 0
+        self._penalties = {}  # nodo -> penalización vigente (solo las no nulas)
+        self._log = deque(maxlen=self.LOG_SIZE)  # (nodo, subió) por época, el último es la época actual
+
+    @classmethod
+    def from_graph(cls, graph, **kwargs):
+        nodes = [v.element() for v in graph.vertices() if v.type() == 'recharge']
+        return cls(nodes, **kwargs)
+
+    def __contains__(self, node):
+        return node in self.stations
+
+    def __getitem__(self, node):
+        return self.stations[node]
+
+    def __len__(self):
+        return len(self.stations)
+
+    # --- Puestos y colas ------------------------------------------------------
+
+    def arrive(self, node, now, item):
+        """
+        Un dron llega a cargar. Retorna True si ocupa un puesto de inmediato;
+        si no, item queda en la cola hasta que release lo entregue.
+        """
+        station = self.stations[node]
+        if station.charging < station.slots:
+            station.charging += 1
+            self._refresh(station)
+            return True
+        station.queue.append((now, item))
+        station.max_queue = max(station.max_queue, len(station.queue))
+        self._refresh(station)
+        return False
+
+    def release(self, node, now, service_seconds):
+        """
+        Un dron terminó de cargar (tras service_seconds). Libera su puesto y,
+        si hay cola, lo pasa al primero: retorna su item, o None.
+        """
+        station = self.stations[node]
+        station.served += 1
+        station._service_total += service_seconds
+        item = None
+        if station.queue:
+            arrived, item = station.queue.popleft()
+            station.waited += 1
+            station.wait_seconds += now - arrived
+        else:
+            station.charging -= 1
+        self._refresh(station)
+        return item
+
+    # --- Penalizaciones -------------------------------------------------------
+
+    def penalty(self, node):
+        return self._penalties.get(node, 0.0)
+
+    def penalties(self):
+        """Penalizaciones no nulas vigentes (nodo -> costo extra por recargar ahí)."""
+        return self._penalties
+
+    def _refresh(self, station):
+        cost = station.expected_wait_seconds() * self.cost_per_second
+        level = math.floor(cost / self.penalty_step) * self.penalty_step
+        old = self._penalties.get(station.node_id, 0.0)
+        if level == old:
+            return
+        if level:
+            self._penalties[station.node_id] = level
+        else:
+            del self._penalties[station.node_id]
+        self.epoch += 1
+        self._log.append((station.node_id, level > old))
+
+    def is_still_optimal(self, recharge_stops, epoch):
+        """
+        True si una ruta óptima calculada en epoch sigue siéndolo: desde
+        entonces ninguna de sus estaciones se encareció y ninguna otra se
+        abarató (su costo solo pudo bajar y el de las demás solo subir).
+        False si no alcanza el registro para decidirlo.
+        """
+        since = self.epoch - epoch
+        if since == 0:
+            return True
+        if since > len(self._log):
+            return False
+        used = set(recharge_stops)
+        for i in range(len(self._log) - since, len(self._log)):
+            node, increased = self._log[i]
+            if increased == (node in used):
+                return False
+        return True
+
+    def summary(self):
+        stations = self.stations.values()
+        waited = sum(s.waited for s in stations)
+        return {
+            'stations': len(self.stations),
+            'slots': sum(s.slots for s in stations),
+            'charging': sum(s.charging for s in stations),
+            'queued': sum(len(s.queue) for s in stations),
+            'charges': sum(s.served for s in stations),
+            'waited': waited,
+            'mean_wait_minutes': sum(s.wait_seconds for s in stations) / waited / 60 if waited else 0.0,
+            'max_queue': max((s.max_queue for s in stations), default=0),
+            'congested': len(self._penalties),
+            'penalty_epoch': self.epoch,
+        }
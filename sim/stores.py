@@ -0,0 +1,125 @@
+from domain.cliente import Client
+from domain.orden import Order
+
+
+class OrderStore:
+    """
+    Órdenes de una simulación con índices por id, por estado y por cliente.
+
+    Se usa como la lista de órdenes que reemplaza (se recorre, se indexa por
+    posición, append, len), pero buscar por id, listar las de un estado o de
+    un cliente y contar por estado no recorren nada: get y count son O(1).
+    Cada orden agregada avisa al store cuando cambia su status, así que los
+    índices siguen al día sin importar quién la modifique.
+    """
+
+    def __init__(self, orders=()):
+        self._orders = []
+        self._by_id = {}
+        self._by_status = {}  # estado -> {order_id: Order}, en orden de llegada
+        self._by_client = {}  # client_id -> [Order]
+        for order in orders:
+            self.add(order)
+
+    def add(self, order: Order):
+        """Agrega una orden (ValueError si ya hay otra con el mismo id)."""
+        if order.order_id in self._by_id:
+            raise ValueError(f"Order '{order.order_id}' is already in the store.")
+        if order._store is not None and order._store is not self:
+            raise ValueError(f"Order '{order.order_id}' already belongs to another store.")
+        order._store = self
+        self._orders.append(order)
+        self._by_id[order.order_id] = order
+        self._by_status.setdefault(order.status, {})[order.order_id] = order
+        self._by_client.setdefault(order.client_id, []).append(order)
+        return order
+
+    append = add  # Compatibilidad con el código que trataba las órdenes como lista
+
+    def _status_changed(self, order, old_status):
+        bucket = self._by_status[old_status]
+        del bucket[order.order_id]
+        if not bucket:
+            del self._by_status[old_status]
+        self._by_status.setdefault(order.status, {})[order.order_id] = order
+
+    def get(self, order_id):
+        return self._by_id.get(order_id)
+
+    def __contains__(self, order_id):
+        return order_id in self._by_id
+
+    def __len__(self):
+        return len(self._orders)
+
+    def __iter__(self):
+        return iter(self._orders)
+
+    def __getitem__(self, index):
+        return self._orders[index]
+
+    def count(self, status):
+        return len(self._by_status.get(status, ()))
+
+    def status_counts(self):
+        return {status: len(bucket) for status, bucket in self._by_status.items()}
+
+    def by_status(self, status):
+        """Órdenes con ese estado, en el orden en que llegaron a él."""
+        return list(self._by_status.get(status, {}).values())
+
+    def by_client(self, client_id):
+        return list(self._by_client.get(client_id, ()))
+
+    def __getstate__(self):
+        # Los índices se reconstruyen al cargar: el pickle solo lleva las órdenes.
+        return {'orders': self._orders}
+
+    def __setstate__(self, state):
+        self.__init__()
+        for order in state['orders']:
+            self.add(order)
+
+
+class ClientStore:
+    """
+    Clientes de una simulación con índices por id y por nodo. Igual que
+    OrderStore, se usa como la lista de clientes que reemplaza.
+    """
+
+    def __init__(self, clients=()):
+        self._clients = []
+        self._by_id = {}
+        self._by_node = {}  # node_id -> [Client]
+        for client in clients:
+            self.add(client)
+
+    def add(self, client: Client):
+        if client.id in self._by_id:
+            raise ValueError(f"Client '{client.id}' is already in the store.")
+        self._clients.append(client)
+        self._by_id[client.id] = client
+        self._by_node.setdefault(client.node_id, []).append(client)
+        return client
+
+    append = add
+
+    def get(self, client_id):
+        return self._by_id.get(client_id)
+
+    def at_node(self, node_id):
+        """El primer cliente registrado en node_id, o None."""
+        clients = self._by_node.get(node_id)
+        return clients[0] if clients else None
+
+    def __contains__(self, client_id):
+        return client_id in self._by_id
+
+    def __len__(self):
+        return len(self._clients)
+
+    def __iter__(self):
+        return iter(self._clients)
+
+    def __getitem__(self, index):
+        return self._clients[index]
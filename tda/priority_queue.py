@@ -0,0 +1,209 @@
+import heapq
+import math
+
+
+class Frontier:
+    """Strategy interface for the frontier of a shortest-path search.
+
+    push(item, priority) inserts item or lowers its priority if it is already
+    queued; pop() returns the (priority, item) pair with the lowest priority.
+    Backends without decrease-key may return stale duplicates, which the
+    searches already discard by comparing against their best known cost.
+    """
+    name = "abstract"
+
+    def push(self, item, priority):
+        raise NotImplementedError
+
+    def pop(self):
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def __bool__(self):
+        return len(self) > 0
+
+
+class BinaryHeapFrontier(Frontier):
+    """heapq-based frontier; decrease-key is emulated with duplicate pushes."""
+    name = "binary"
+    __slots__ = '_heap', '_counter'
+
+    def __init__(self):
+        self._heap = []
+        self._counter = 0
+
+    def push(self, item, priority):
+        self._counter += 1 # Desempate estable sin comparar los items
+        heapq.heappush(self._heap, (priority, self._counter, item))
+
+    def pop(self):
+        priority, _, item = heapq.heappop(self._heap)
+        return priority, item
+
+    def __len__(self):
+        return len(self._heap)
+
+
+class _PairingNode:
+    __slots__ = 'priority', 'item', 'child', 'sibling', 'prev'
+
+    def __init__(self, priority, item):
+        self.priority = priority
+        self.item = item
+        self.child = None
+        self.sibling = None
+        self.prev = None  # Padre si es el primer hijo, si no el hermano anterior
+
+
+class PairingHeapFrontier(Frontier):
+    """Pairing heap with true decrease-key: each item is queued at most once."""
+    name = "pairing"
+
+    def __init__(self):
+        self._root = None
+        self._nodes = {}
+
+    @staticmethod
+    def _link(a, b):
+        if a is None:
+            return b
+        if b is None:
+            return a
+        if b.priority < a.priority:
+            a, b = b, a
+        b.prev = a
+        b.sibling = a.child
+        if a.child is not None:
+            a.child.prev = b
+        a.child = b
+        a.sibling = None
+        a.prev = None
+        return a
+
+    def push(self, item, priority):
+        node = self._nodes.get(item)
+        if node is None:
+            node = _PairingNode(priority, item)
+            self._nodes[item] = node
+            self._root = self._link(self._root, node)
+            return
+        if priority >= node.priority:
+            return
+        node.priority = priority
+        if node is self._root:
+            return
+        # Cortar el subárbol de su posición y volver a enlazarlo con la raíz.
+        if node.prev.child is node:
+            node.prev.child = node.sibling
+        else:
+            node.prev.sibling = node.sibling
+        if node.sibling is not None:
+            node.sibling.prev = node.prev
+        node.sibling = None
+        node.prev = None
+        self._root = self._link(self._root, node)
+
+    def pop(self):
+        root = self._root
+        del self._nodes[root.item]
+        # Fusión en dos pasadas de los hijos de la raíz.
+        pairs = []
+        child = root.child
+        while child is not None:
+            a = child
+            b = child.sibling
+            child = b.sibling if b is not None else None
+            a.sibling = a.prev = None
+            if b is not None:
+                b.sibling = b.prev = None
+            pairs.append(self._link(a, b))
+        new_root = None
+        for node in reversed(pairs):
+            new_root = self._link(node, new_root)
+        self._root = new_root
+        return root.priority, root.item
+
+    def __len__(self):
+        return len(self._nodes)
+
+
+class RadixHeapFrontier(Frontier):
+    """Monotone radix heap over priorities quantized to integer units.
+
+    With the default scale of 100000 and weights in km, keys are centimetres.
+    Meant for monotone searches (Dijkstra with non-negative weights, A* with a
+    consistent heuristic). Items sharing a centimetre may pop out of order and
+    keys that fall below the last popped one through float rounding are
+    clamped to it; the searches tolerate both because they re-relax any
+    vertex whose cost improves.
+    """
+    name = "radix"
+
+    def __init__(self, scale=100000):
+        self._scale = scale
+        self._last = 0
+        self._size = 0
+        self._buckets = [[] for _ in range(65)]
+
+    def _bucket(self, key):
+        return (key ^ self._last).bit_length()
+
+    def push(self, item, priority):
+        key = max(int(priority * self._scale), self._last)
+        self._buckets[self._bucket(key)].append((key, priority, item))
+        self._size += 1
+
+    def pop(self):
+        buckets = self._buckets
+        if not buckets[0]:
+            i = 1
+            while not buckets[i]:
+                i += 1
+            entries = buckets[i]
+            buckets[i] = []
+            self._last = min(entry[0] for entry in entries)
+            for entry in entries:
+                buckets[self._bucket(entry[0])].append(entry)
+        _, priority, item = buckets[0].pop()
+        self._size -= 1
+        return priority, item
+
+    def __len__(self):
+        return self._size
+
+
+FRONTIERS = {
+    BinaryHeapFrontier.name: BinaryHeapFrontier,
+    PairingHeapFrontier.name: PairingHeapFrontier,
+    RadixHeapFrontier.name: RadixHeapFrontier,
+}
+
+# Backend preferido según el número de vértices: (límite superior, nombre).
+# Se puede regenerar con sim/benchmarks.py y sobrescribir con set_frontier_policy.
+_FRONTIER_POLICY = [(math.inf, BinaryHeapFrontier.name)]
+
+
+def get_frontier(name):
+    """Return the Frontier class registered under name."""
+    try:
+        return FRONTIERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown frontier backend '{name}'. Options: {sorted(FRONTIERS)}")
+
+
+def set_frontier_policy(policy):
+    """Replace the size policy with a list of (max_vertices, backend name) pairs."""
+    global _FRONTIER_POLICY
+    for _, name in policy:
+        get_frontier(name)
+    _FRONTIER_POLICY = sorted(policy, key=lambda entry: entry[0])
+
+
+def choose_frontier(num_vertices):
+    """Return the Frontier class the current policy selects for a graph size."""
+    for max_vertices, name in _FRONTIER_POLICY:
+        if num_vertices <= max_vertices:
+            return FRONTIERS[name]
+    return BinaryHeapFrontier
@@ -0,0 +1,76 @@
+class RankedCounter:
+    """Counter whose keys are always ordered by decreasing count.
+
+    Keys live in one array sorted by count, split into blocks of equal
+    count; _start maps each count to the first index of its block. A unit
+    increment swaps the key with the first key of its block and bumps it
+    into the block above, so increment() is O(1) and any page of the
+    ranking is a slice. Ties keep no particular order.
+    """
+
+    __slots__ = '_keys', '_counts', '_pos', '_start'
+
+    def __init__(self, counts=None):
+        self._keys = []
+        self._counts = []
+        self._pos = {}
+        self._start = {}  # conteo -> primer índice de su bloque en _keys
+        if counts:
+            self.rebuild(counts)
+
+    def rebuild(self, counts):
+        """Replace the contents with a {key: count} mapping (O(n log n))."""
+        ranked = sorted(((k, c) for k, c in counts.items() if c > 0), key=lambda item: item[1], reverse=True)
+        self._keys = [k for k, _ in ranked]
+        self._counts = [c for _, c in ranked]
+        self._pos = {k: i for i, k in enumerate(self._keys)}
+        self._start = {}
+        for i, c in enumerate(self._counts):
+            self._start.setdefault(c, i)
+
+    def increment(self, key):
+        keys, counts, pos, start = self._keys, self._counts, self._pos, self._start
+        i = pos.get(key)
+        if i is None:
+            i = pos[key] = len(keys)
+            keys.append(key)
+            counts.append(0)
+            start.setdefault(0, i)
+        c = counts[i]
+        j = start[c]
+        if i != j:
+            other = keys[j]
+            keys[i], keys[j] = other, key
+            pos[other], pos[key] = i, j
+        counts[j] = c + 1
+        if j + 1 < len(keys) and counts[j + 1] == c:
+            start[c] = j + 1
+        else:
+            del start[c]
+        start.setdefault(c + 1, j)
+
+    def add(self, key, count=1):
+        for _ in range(count):
+            self.increment(key)
+
+    def __getitem__(self, key):
+        i = self._pos.get(key)
+        return 0 if i is None else self._counts[i]
+
+    def __contains__(self, key):
+        return key in self._pos
+
+    def __len__(self):
+        return len(self._keys)
+
+    def rank(self, key):
+        """0-based position of key in the ranking, or None."""
+        return self._pos.get(key)
+
+    def page(self, offset=0, limit=None):
+        """[(key, count)] for ranks offset .. offset + limit - 1."""
+        end = len(self._keys) if limit is None else min(len(self._keys), offset + limit)
+        return [(self._keys[i], self._counts[i]) for i in range(max(0, offset), end)]
+
+    def most_common(self, n=None):
+        return self.page(0, n)
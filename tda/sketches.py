@@ -0,0 +1,177 @@
+import hashlib
+import heapq
+import math
+import numpy as np
+
+
+class SpaceSaving:
+    """Space-Saving heavy-hitter summary with at most capacity counters.
+
+    Every monitored item keeps a count that overestimates its true frequency
+    by at most its error; when the summary is full a new item replaces the
+    one with the smallest count and inherits it as error. Any item with true
+    frequency above total / capacity is guaranteed to be monitored.
+    Summaries with the same capacity merge into one with the same bound
+    (Agarwal et al., "Mergeable Summaries"), so workers can count apart.
+    """
+
+    def __init__(self, capacity=1000):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1.")
+        self.capacity = capacity
+        self.total = 0
+        self._counts = {}
+        self._errors = {}
+        self._heap = []  # (conteo, item), con entradas obsoletas que se descartan al buscar el mínimo
+
+    def _min_entry(self):
+        heap, counts = self._heap, self._counts
+        while counts.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0]
+
+    def _push(self, item, count):
+        heapq.heappush(self._heap, (count, item))
+        if len(self._heap) > 4 * self.capacity + 64:
+            self._heap = [(c, i) for i, c in self._counts.items()]
+            heapq.heapify(self._heap)
+
+    def update(self, item, count=1):
+        self.total += count
+        current = self._counts.get(item)
+        if current is not None:
+            current += count
+        elif len(self._counts) < self.capacity:
+            current = count
+            self._errors[item] = 0
+        else:
+            floor, victim = self._min_entry()
+            heapq.heappop(self._heap)
+            del self._counts[victim], self._errors[victim]
+            current = floor + count
+            self._errors[item] = floor
+        self._counts[item] = current
+        self._push(item, current)
+
+    def min_count(self):
+        """Upper bound for the frequency of any item that is not monitored."""
+        return self._min_entry()[0] if len(self._counts) >= self.capacity else 0
+
+    def estimate(self, item):
+        """(count, error): the true frequency lies in [count - error, count]."""
+        count = self._counts.get(item)
+        if count is None:
+            floor = self.min_count()
+            return floor, floor
+        return count, self._errors[item]
+
+    def __getitem__(self, item):
+        return self.estimate(item)[0]
+
+    def __contains__(self, item):
+        return item in self._counts
+
+    def __len__(self):
+        return len(self._counts)
+
+    def error_bound(self):
+        """Maximum overestimation of any count: total / capacity."""
+        return self.total / self.capacity
+
+    def top_k(self, k=None):
+        """[(item, count, error)] by decreasing count; all monitored items when k is None."""
+        items = ((item, count, self._errors[item]) for item, count in self._counts.items())
+        if k is None:
+            return sorted(items, key=lambda entry: entry[1], reverse=True)
+        return heapq.nlargest(k, items, key=lambda entry: entry[1])
+
+    def most_common(self, n=None):
+        """Same shape as Counter.most_common: [(item, count)]."""
+        return [(item, count) for item, count, _ in self.top_k(n)]
+
+    def guaranteed_top_k(self, k):
+        """Entries of top_k(k) that are certainly among the k most frequent items."""
+        top = self.top_k(k + 1)
+        threshold = top[k][1] if len(top) > k else self.min_count()
+        return [entry for entry in top[:k] if entry[1] - entry[2] >= threshold]
+
+    def merge(self, other):
+        """Add the counts of another summary with the same capacity (in place)."""
+        if other.capacity != self.capacity:
+            raise ValueError("Only summaries with the same capacity can be merged.")
+        self_floor, other_floor = self.min_count(), other.min_count()
+        counts, errors = {}, {}
+        for item in self._counts.keys() | other._counts.keys():
+            a, b = self._counts.get(item), other._counts.get(item)
+            counts[item] = (self_floor if a is None else a) + (other_floor if b is None else b)
+            errors[item] = ((self_floor if a is None else self._errors[item]) +
+                            (other_floor if b is None else other._errors[item]))
+        kept = heapq.nlargest(self.capacity, counts.items(), key=lambda entry: entry[1])
+        self._counts = dict(kept)
+        self._errors = {item: errors[item] for item in self._counts}
+        self._heap = [(c, i) for i, c in self._counts.items()]
+        heapq.heapify(self._heap)
+        self.total += other.total
+        return self
+
+
+class CountMinSketch:
+    """Count-Min sketch: depth rows of width counters in a NumPy table.
+
+    estimate(item) never underestimates, and with probability 1 - delta it
+    overestimates by at most epsilon * total when built with
+    from_error(epsilon, delta). Hashes are keyed by seed (not Python's
+    per-process hash), so sketches with the same shape and seed built in
+    different processes merge by adding their tables.
+    """
+
+    def __init__(self, width=2048, depth=5, seed=0):
+        if width < 1 or depth < 1:
+            raise ValueError("width and depth must be at least 1.")
+        self.width = width
+        self.depth = depth
+        self.seed = seed
+        self.total = 0
+        self._table = np.zeros((depth, width), dtype=np.int64)
+        self._rows = np.arange(depth)
+        self._steps = np.arange(depth, dtype=np.uint64)
+        self._key = seed.to_bytes(8, 'little', signed=True)
+
+    @classmethod
+    def from_error(cls, epsilon, delta=0.01, seed=0):
+        """Sketch sized so that estimates exceed the truth by <= epsilon * total w.p. 1 - delta."""
+        if epsilon <= 0 or not 0 < delta < 1:
+            raise ValueError("epsilon must be positive and delta in (0, 1).")
+        return cls(width=math.ceil(math.e / epsilon), depth=math.ceil(math.log(1 / delta)), seed=seed)
+
+    def _columns(self, item):
+        digest = hashlib.blake2b(str(item).encode(), digest_size=16, key=self._key).digest()
+        h1 = np.uint64(int.from_bytes(digest[:8], 'little'))
+        h2 = np.uint64(int.from_bytes(digest[8:], 'little') | 1)
+        # Doble hashing (Kirsch-Mitzenmacher): columna_i = h1 + i * h2
+        return ((h1 + self._steps * h2) % np.uint64(self.width)).astype(np.intp)
+
+    def update(self, item, count=1):
+        self._table[self._rows, self._columns(item)] += count
+        self.total += count
+
+    def estimate(self, item):
+        return int(self._table[self._rows, self._columns(item)].min())
+
+    def __getitem__(self, item):
+        return self.estimate(item)
+
+    def error_bound(self):
+        """Overestimation that holds with probability 1 - exp(-depth): e * total / width."""
+        return math.e * self.total / self.width
+
+    def merge(self, other):
+        """Add another sketch with the same width, depth and seed (in place)."""
+        if (other.width, other.depth, other.seed) != (self.width, self.depth, self.seed):
+            raise ValueError("Only sketches with the same width, depth and seed can be merged.")
+        self._table += other._table
+        self.total += other.total
+        return self
+
+    def memory_bytes(self):
+        return int(self._table.nbytes)
@@ -0,0 +1,120 @@
+import heapq
+import math
+import time
+from collections import Counter
+
+
+class WindowedCounter:
+    """Counts per key over a sliding time window, kept in a ring of buckets.
+
+    The ring holds num_buckets buckets of bucket_seconds each, so the longest
+    window is num_buckets * bucket_seconds. An update touches one bucket and
+    a running total; buckets that fall out of the ring are subtracted from
+    the total when time moves past them, so every count is amortized O(1).
+    Queries over the whole span read the running total; shorter windows add
+    up only the buckets they cover. Windows are rounded up to whole buckets.
+    """
+
+    def __init__(self, bucket_seconds=10.0, num_buckets=90, clock=time.time):
+        if bucket_seconds <= 0 or num_buckets < 1:
+            raise ValueError("bucket_seconds must be positive and num_buckets at least 1.")
+        self.bucket_seconds = bucket_seconds
+        self.num_buckets = num_buckets
+        self.clock = clock
+        self._buckets = [Counter() for _ in range(num_buckets)]
+        self._totals = Counter()  # Suma de todos los buckets vivos
+        self._head = None  # Índice absoluto (instante // bucket_seconds) del bucket más reciente
+
+    def span(self):
+        """Longest window that can be queried, in seconds."""
+        return self.bucket_seconds * self.num_buckets
+
+    def _index(self, now):
+        return int((self.clock() if now is None else now) // self.bucket_seconds)
+
+    def _advance(self, index):
+        if self._head is None:
+            self._head = index
+            return
+        if index <= self._head:
+            return
+        if index - self._head >= self.num_buckets:
+            for bucket in self._buckets:
+                bucket.clear()
+            self._totals.clear()
+            self._head = index
+            return
+        # Los buckets que reutiliza el anillo salen del total antes de vaciarse; solo sus
+        # claves pueden quedar en cero, así que se limpian sin recorrer todo el total.
+        totals = self._totals
+        for absolute in range(self._head + 1, index + 1):
+            bucket = self._buckets[absolute % self.num_buckets]
+            if bucket:
+                for key, count in bucket.items():
+                    remaining = totals[key] - count
+                    if remaining > 0:
+                        totals[key] = remaining
+                    else:
+                        del totals[key]
+                bucket.clear()
+        self._head = index
+
+    def add(self, key, count=1, now=None):
+        """Count key at time now (default: the clock). Events older than the span are dropped."""
+        index = self._index(now)
+        self._advance(index)
+        if index <= self._head - self.num_buckets:
+            return False
+        self._buckets[index % self.num_buckets][key] += count
+        self._totals[key] += count
+        return True
+
+    def counts(self, window=None, now=None):
+        """Counter of the last window seconds (the whole span when window is None)."""
+        self._advance(self._index(now))
+        buckets = self.num_buckets if window is None else min(self.num_buckets, max(1, math.ceil(window / self.bucket_seconds)))
+        if buckets == self.num_buckets:
+            return Counter(self._totals)
+        result = Counter()
+        for absolute in range(self._head - buckets + 1, self._head + 1):
+            result.update(self._buckets[absolute % self.num_buckets])
+        return result
+
+    def count(self, key, window=None, now=None):
+        if window is None:
+            self._advance(self._index(now))
+            return self._totals.get(key, 0)
+        return self.counts(window, now).get(key, 0)
+
+    def top_k(self, k=10, window=None, now=None, keys=None):
+        """[(key, count)] by decreasing count in the window, optionally only for keys in keys."""
+        counts = self.counts(window, now)
+        items = counts.items() if keys is None else ((key, c) for key, c in counts.items() if key in keys)
+        if k is None:
+            return sorted(items, key=lambda item: item[1], reverse=True)
+        return heapq.nlargest(k, items, key=lambda item: item[1])
+
+    def series(self, key=None, window=None, now=None):
+        """[(bucket start time, count)] oldest first, for one key or for all keys together."""
+        self._advance(self._index(now))
+        buckets = self.num_buckets if window is None else min(self.num_buckets, max(1, math.ceil(window / self.bucket_seconds)))
+        points = []
+        for absolute in range(self._head - buckets + 1, self._head + 1):
+            bucket = self._buckets[absolute % self.num_buckets]
+            value = sum(bucket.values()) if key is None else bucket.get(key, 0)
+            points.append((absolute * self.bucket_seconds, value))
+        return points
+
+    def merge(self, other):
+        """Add the live buckets of another counter with the same bucket layout (in place)."""
+        if (other.bucket_seconds, other.num_buckets) != (self.bucket_seconds, self.num_buckets):
+            raise ValueError("Only counters with the same bucket_seconds and num_buckets can be merged.")
+        if other._head is None:
+            return self
+        self._advance(other._head)
+        for absolute in range(other._head - other.num_buckets + 1, other._head + 1):
+            bucket = other._buckets[absolute % other.num_buckets]
+            if bucket and absolute > self._head - self.num_buckets:
+                self._buckets[absolute % self.num_buckets].update(bucket)
+                self._totals.update(bucket)
+        return self
@@ -1,6 +1,7 @@
 import streamlit as st
 import pandas as pd
 import io
+import os
 import sys
 import time
 import random
@@ -10,13 +11,18 @@ from datetime import datetime
 from model.graph import Graph
 from tda.avl import AVLTree 
 from sim.rutas import RouteManager, RouteTracker, RouteOptimizer, OrderSimulator 
+from sim.coverage import CoverageAnalyzer
+from sim.journal import SimulationJournal
+from sim.scheduler import OrderScheduler
+from sim.stores import ClientStore, OrderStore
+from model.centrality import critical_nodes
 from visual.AVLVisualizer import AVLTreeVisualizer
 from visual.AVLVisualizer import get_tree_traversals
 from validaciones.validaciones import *
 from visual.networkx_adapter import crear_visualizacion_red
 from visual.AVLVisualizer import create_pie_chart, create_bar_chart
 from api.shared_simulation_state import state_instance
-from visual.map.map_builder import create_empty_map, add_nodes_to_map, add_edges_to_map, highlight_path_on_map, highlight_mst_on_map
+from visual.map.map_builder import create_empty_map, add_nodes_to_map, add_edges_to_map, highlight_path_on_map, highlight_mst_on_map, add_coverage_to_map
 from visual.map.flight_summary import display_route_details
 from .report_generator import generate_pdf_report_content, get_report_filename
 
@@ -59,19 +65,37 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-def ejecutar_simulacion_completa(num_nodos, num_aristas, num_ordenes_crear, num_ordenes_procesar, max_battery, warehouse_pct, recharge_pct):
-    """Ejecutar la simulación principal y retornar todos los resultados relevantes."""
+DIRECTORIO_REDES = os.path.join("data", "redes")
+DIRECTORIO_BITACORA = os.path.join("data", "journal")
 
-    g = Graph(directed=False)
-    g.generate_random_graph(
-        num_nodes=num_nodos, 
-        num_edges_target=num_aristas,
-        warehouse_pct=warehouse_pct,
-        recharge_pct=recharge_pct
-    )
+def ruta_red_guardada(num_nodos, num_aristas, warehouse_pct, recharge_pct):
+    """Directorio donde se guarda la red generada con estos parámetros."""
+    return os.path.join(DIRECTORIO_REDES, f"red_{num_nodos}n_{num_aristas}a_{warehouse_pct}w_{recharge_pct}r")
+
+def ejecutar_simulacion_completa(num_nodos, num_aristas, num_ordenes_crear, num_ordenes_procesar, max_battery, warehouse_pct, recharge_pct, reutilizar_red=False):
+    """Ejecutar la simulación principal y retornar todos los resultados relevantes.
+
+    Con reutilizar_red, la red se carga desde disco si ya se guardó una con los
+    mismos parámetros; si no, se genera y se guarda para las siguientes sesiones.
+    """
+
+    ruta_red = ruta_red_guardada(num_nodos, num_aristas, warehouse_pct, recharge_pct)
+    if reutilizar_red and os.path.exists(os.path.join(ruta_red, "manifest.json")):
+        g = Graph.load(ruta_red)
+    else:
+        g = Graph(directed=False)
+        g.generate_random_graph(
+            num_nodes=num_nodos, 
+            num_edges_target=num_aristas,
+            warehouse_pct=warehouse_pct,
+            recharge_pct=recharge_pct
+        )
+        if reutilizar_red:
+            g.save(ruta_red)
     
     route_manager = RouteManager(g)
     route_tracker = RouteTracker() 
+    route_tracker.set_node_roles({v.element(): v.type() for v in g.vertices()})
     order_simulator = OrderSimulator(route_manager, route_tracker)
 
     old_stdout = sys.stdout
@@ -87,8 +111,7 @@ def ejecutar_simulacion_completa(num_nodos, num_aristas, num_ordenes_crear, num_
     simulation_summary_text = order_simulator.get_simulation_summary()
 
     node_counts_by_type = {'warehouse': 0, 'recharge': 0, 'client': 0}
-    for v_obj in g.vertices():
-        node_counts_by_type[v_obj.type()] = node_counts_by_type.get(v_obj.type(), 0) + 1
+    node_counts_by_type.update(g.metrics()["type_distribution"])
 
     return {
         "graph": g,
@@ -98,10 +121,50 @@ def ejecutar_simulacion_completa(num_nodos, num_aristas, num_ordenes_crear, num_
         "simulation_log": salida_simulacion_log,
         "clients_list": order_simulator.clients, 
         "orders_list": order_simulator.orders,   
+        "scheduler": order_simulator.scheduler,
         "simulation_summary": simulation_summary_text,
         "node_counts": node_counts_by_type
     }
 
+def restaurar_estado_guardado():
+    """
+    Abre la bitácora de simulación una vez por proceso y recupera el último
+    estado (snapshot + registros posteriores). Si la sesión aún no tiene una
+    simulación, carga en ella el estado recuperado.
+    """
+    if state_instance.get_journal() is None:
+        bitacora = SimulationJournal(DIRECTORIO_BITACORA)
+        recuperado = bitacora.recover()
+        state_instance.attach_journal(bitacora)
+        if recuperado:
+            print(f"INFO: Estado recuperado de la bitácora ({recuperado['replayed']} registros reproducidos).")
+            state_instance.update_data(
+                graph=recuperado["graph"], clients=recuperado["clients"], orders=recuperado["orders"],
+                tracker=recuperado["route_tracker"], avl=recuperado["avl_tree"], summary=recuperado["summary"]
+            )
+            # update_data descarta el scheduler anterior: las pendientes recuperadas vuelven a la cola
+            state_instance.attach_scheduler(OrderScheduler.from_pending(recuperado["orders"]))
+    if st.session_state.sim_graph is None:
+        datos = state_instance.get_data()
+        if datos.get("graph") is not None and datos.get("route_tracker") is not None:
+            g = datos["graph"]
+            ordenes = datos["orders"]
+            st.session_state.sim_graph = g
+            st.session_state.sim_manager = RouteManager(g)
+            st.session_state.sim_tracker = datos["route_tracker"]
+            st.session_state.sim_avl_tree = datos["avl_tree"]
+            st.session_state.sim_clients = datos["clients"]
+            st.session_state.sim_orders = ordenes
+            st.session_state.sim_summary = datos["summary"]
+            st.session_state.sim_node_counts = {'warehouse': 0, 'recharge': 0, 'client': 0}
+            st.session_state.sim_node_counts.update(g.metrics()["type_distribution"])
+            st.session_state.sim_params = {
+                'num_nodos': g.num_vertices(),
+                'num_aristas': g.num_edges(),
+                'num_ordenes_crear': len(ordenes),
+                'num_ordenes_procesar': len(ordenes) - ordenes.count("pending")
+            }
+
 def renderizar_pestana_simulacion(parametros, estadisticas_nodos, salida_simulacion):
     """Renderizar la pestaña de resultados de simulación"""
     st.header("📊 Resultados de la Simulación")
@@ -147,7 +210,7 @@ def renderizar_pestana_simulacion(parametros, estadisticas_nodos, salida_simulac
 
 
 from streamlit_folium import st_folium
-from visual.map.map_builder import create_empty_map, add_nodes_to_map, add_edges_to_map, highlight_path_on_map, highlight_mst_on_map
+from visual.map.map_builder import create_empty_map, add_nodes_to_map, add_edges_to_map, highlight_path_on_map, highlight_mst_on_map, add_coverage_to_map
 
 
 def renderizar_pestana_explorar_red(grafo: Graph, tracker: RouteTracker, max_battery: int):
@@ -189,6 +252,9 @@ def renderizar_pestana_explorar_red(grafo: Graph, tracker: RouteTracker, max_bat
         selected_origin = st.selectbox("Punto de Origen (Almacén):", options=almacen_nodes, key="map_origin")
         selected_destination = st.selectbox("Punto de Destino (Cliente):", options=client_nodes, key="map_destination")
 
+        mostrar_cobertura = st.checkbox("🔋 Mostrar cobertura del almacén de origen", key="show_coverage")
+        cargas_cobertura = st.slider("Cargas de batería", 1, 4, 1, key="coverage_charges") if mostrar_cobertura else 1
+
         if st.session_state.show_mst_on_map:
             st.info("Visualizando: Árbol de Expansión Mínima.")
         elif st.session_state.selected_route_details:
@@ -226,7 +292,7 @@ def renderizar_pestana_explorar_red(grafo: Graph, tracker: RouteTracker, max_bat
             if st.button("🚚 Completar Entrega y Registrar Orden", key="complete_delivery"):
                 with st.spinner("Registrando orden..."):
                     route_info = st.session_state.selected_route_details
-                    client_obj = next((c for c in st.session_state.sim_clients if c.node_id == selected_destination), None)
+                    client_obj = st.session_state.sim_clients.at_node(selected_destination)
                     origin_node = selected_origin
 
                     if client_obj and route_info:
@@ -236,19 +302,23 @@ def renderizar_pestana_explorar_red(grafo: Graph, tracker: RouteTracker, max_bat
                             recharge_stops=route_info['recharges'],
                             segments=[]
                         )
-                        new_order_id = f"ORD_MAP_{int(time.time())}"
+                        new_order_id = f"ORD_MAP_{int(time.time())}_{len(st.session_state.sim_orders) + 1}"
                         new_order = Order(
                             order_id=new_order_id, client=client_obj,
                             origin=origin_node, destination=client_obj.node_id,
                             weight=random.uniform(1.0, 5.0), priority='normal'
                         )
                         new_order.mark_delivered(route.total_cost)
-                        st.session_state.sim_orders.append(new_order)
-
-                        tracker = st.session_state.sim_tracker
-                        tracker.track_route(route)
-                        tracker.track_order(new_order.order_id, new_order)                        
-                        tracker.track_client_order(client_obj.id) 
+                        with state_instance.mutation():  # La API puede estar leyendo o guardando el mismo estado
+                            st.session_state.sim_orders.append(new_order)
+                            bitacora = state_instance.get_journal()
+                            if bitacora is not None:
+                                bitacora.order_created(new_order)
+
+                            tracker = st.session_state.sim_tracker
+                            tracker.track_route(route)
+                            tracker.track_order(new_order.order_id, new_order)
+                            tracker.track_client_order(client_obj.id)
                         
                         st.session_state.map_success_message = f"✅ ¡Orden {new_order_id} creada exitosamente para el cliente {client_obj.id}!" # <-- LÍNEA MODIFICADA
                         
@@ -274,6 +344,12 @@ def renderizar_pestana_explorar_red(grafo: Graph, tracker: RouteTracker, max_bat
         add_nodes_to_map(m, list(grafo.vertices()))
         if st.session_state.selected_route_details and not st.session_state.show_mst_on_map:
             highlight_path_on_map(m, grafo, st.session_state.selected_route_details["path"], color="red")
+        if mostrar_cobertura:
+            analizador = st.session_state.get('coverage_analyzer')
+            if analizador is None or analizador.graph is not grafo or analizador.max_battery != max_battery:
+                analizador = st.session_state.coverage_analyzer = CoverageAnalyzer(grafo, max_battery)
+            cobertura = analizador.warehouse_coverage(max_charges=cargas_cobertura)
+            add_coverage_to_map(m, grafo, cobertura, warehouses=[selected_origin])
         if st.session_state.show_mst_on_map:
             mst_edges = grafo.kruskal_mst()
             highlight_mst_on_map(m, mst_edges, color="purple", dash_array="10, 10")
@@ -428,6 +504,20 @@ def renderizar_pestana_analisis_rutas(tracker: RouteTracker):
             )
             st.pyplot(fig_visitas)
 
+    max_minutos = max(1, int(tracker.recent_nodes.span() // 60))
+    minutos = st.slider("⏱️ Ventana de actividad reciente (minutos)", 1, max_minutos, min(5, max_minutos))
+    visitas_recientes = tracker.get_recent_node_visits(minutos * 60, limit=10)
+    if visitas_recientes:
+        st.subheader(f"🕒 Nodos Más Visitados (últimos {minutos} min)")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.dataframe(pd.DataFrame(visitas_recientes, columns=['Nodo', 'Visitas']), use_container_width=True)
+        with col2:
+            st.dataframe(pd.DataFrame(tracker.get_recent_routes(minutos * 60, limit=5), columns=['Ruta', 'Frecuencia']),
+                         use_container_width=True)
+    else:
+        st.info(f"Sin visitas en los últimos {minutos} minutos.")
+
 
     st.markdown("---")
     st.subheader("📄 Exportar Informe")
@@ -457,30 +547,24 @@ def renderizar_pestana_estadisticas(grafo, patrones_ruta, reportes_optimizacion,
     
     col1, col2, col3 = st.columns(3)
     
-    total_aristas = len(list(grafo.edges()))
-    total_vertices = len(list(grafo.vertices()))
+    metricas = grafo.metrics()
     
     with col1:
-        st.metric("Densidad del Grafo", f"{(total_aristas / (total_vertices * (total_vertices - 1))):.3f}")
+        st.metric("Densidad del Grafo", f"{metricas['density']:.3f}")
     with col2:
-        grado_promedio = (2 * total_aristas) / total_vertices if total_vertices > 0 else 0
-        st.metric("Grado Promedio", f"{grado_promedio:.2f}")
+        st.metric("Grado Promedio", f"{metricas['average_degree']:.2f}")
     with col3:
         conectividad = "Conectado" if grafo.is_connected() else "Desconectado"
         st.metric("Conectividad del Grafo", conectividad)
     
     st.subheader("📊 Análisis de Distribución de Grados")
     
-    grados = []
-    for vertice in grafo.vertices():
-        grado_entrada = len(list(grafo.incident_edges(vertice, outgoing=False)))
-        grado_salida = len(list(grafo.incident_edges(vertice, outgoing=True)))
-        grados.append(grado_entrada + grado_salida)
+    histograma_grados = metricas['degree_histogram']
     
-    if grados:
+    if histograma_grados:
         import matplotlib.pyplot as plt
         fig, ax = plt.subplots(figsize=(10, 6))
-        ax.hist(grados, bins=max(1, len(set(grados))), color='#45b7d1', alpha=0.7, edgecolor='black')
+        ax.bar(list(histograma_grados.keys()), list(histograma_grados.values()), width=0.8, color='#45b7d1', alpha=0.7, edgecolor='black')
         ax.set_title('Distribución de Grados de Nodos', fontsize=14, fontweight='bold')
         ax.set_xlabel('Grado', fontsize=12)
         ax.set_ylabel('Frecuencia', fontsize=12)
@@ -488,6 +572,33 @@ def renderizar_pestana_estadisticas(grafo, patrones_ruta, reportes_optimizacion,
         plt.tight_layout()
         st.pyplot(fig)
     
+    st.subheader("🛰️ Nodos Críticos (Centralidad de Intermediación)")
+    col_muestras, col_rol = st.columns(2)
+    with col_muestras:
+        muestras = st.slider("Fuentes muestreadas", 16, 1024, 256, step=16, help="Más fuentes reducen el error de la estimación; con tantas fuentes como nodos el cálculo es exacto.")
+    with col_rol:
+        rol = st.selectbox("Tipo de nodo", ["recharge", "warehouse", "client", "all"], key="centrality_role")
+    if st.button("📡 Calcular Centralidad", key="compute_centrality"):
+        with st.spinner("Calculando centralidad de intermediación..."):
+            ranking, resultado = critical_nodes(grafo, role=None if rol == "all" else rol, limit=10, samples=muestras, seed=0)
+            st.session_state.centrality_report = (ranking, resultado, rol, grafo)
+    if st.session_state.get('centrality_report') and st.session_state.centrality_report[3] is grafo:
+        ranking, resultado, rol_calculado, _ = st.session_state.centrality_report
+        exactitud = "exacta" if resultado['exact'] else f"error ≤ {resultado['epsilon']:.3f} con prob. {1 - resultado['delta']:.0%}"
+        st.caption(f"{resultado['samples']} fuentes, {resultado['seconds']:.2f} s ({exactitud}) · tipo: {rol_calculado}")
+        if ranking:
+            df_centralidad = pd.DataFrame(ranking, columns=['Nodo', 'Centralidad'])
+            st.dataframe(df_centralidad, use_container_width=True)
+            fig_centralidad = create_bar_chart(
+                x_data=df_centralidad['Nodo'],
+                y_data=df_centralidad['Centralidad'],
+                title='Nodos con Mayor Centralidad de Intermediación',
+                colors=['#d62728'] * len(df_centralidad),
+                xlabel='Nodo',
+                ylabel='Centralidad'
+            )
+            st.pyplot(fig_centralidad)
+    
     st.subheader("📋 Análisis Detallado")
     
     if patrones_ruta:
@@ -534,6 +645,7 @@ def main():
         num_ordenes_procesar = st.number_input("Número de Órdenes a Procesar", min_value=0, max_value=num_ordenes_crear, value=5, step=5, help="Cuántas de las órdenes creadas se intentarán entregar.")
         st.subheader("Parámetros del Dron") 
         max_battery_capacity = st.slider("🔋 Capacidad Máxima de Batería", 25, 200, 50, step=5)
+        reutilizar_red = st.checkbox("💾 Reutilizar red guardada", value=False, help="Carga desde disco la red generada antes con los mismos parámetros en lugar de generar una nueva.")
         
         st.subheader("Nodos Cliente Derivados")
         clientes_derivados = int(num_nodos * 0.6)
@@ -545,11 +657,12 @@ def main():
     if 'sim_tracker' not in st.session_state: st.session_state.sim_tracker = None
     if 'sim_avl_tree' not in st.session_state: st.session_state.sim_avl_tree = None
     if 'sim_log' not in st.session_state: st.session_state.sim_log = ""
-    if 'sim_clients' not in st.session_state: st.session_state.sim_clients = []
-    if 'sim_orders' not in st.session_state: st.session_state.sim_orders = []
+    if 'sim_clients' not in st.session_state: st.session_state.sim_clients = ClientStore()
+    if 'sim_orders' not in st.session_state: st.session_state.sim_orders = OrderStore()
     if 'sim_summary' not in st.session_state: st.session_state.sim_summary = ""
     if 'sim_node_counts' not in st.session_state: st.session_state.sim_node_counts = {}
     if 'sim_params' not in st.session_state: st.session_state.sim_params = {} 
+    restaurar_estado_guardado()
     
     if boton_ejecutar:
         with st.spinner("🚀 Inicializando y ejecutando simulación completa... Por favor espere."):
@@ -560,7 +673,8 @@ def main():
                 num_ordenes_procesar, 
                 max_battery_capacity,
                 porcentaje_almacen, 
-                porcentaje_recarga  
+                porcentaje_recarga,
+                reutilizar_red
             )
             st.session_state.sim_graph = sim_results["graph"]
             st.session_state.sim_manager = sim_results["route_manager"]
@@ -587,6 +701,7 @@ def main():
                 avl=st.session_state.sim_avl_tree,
                 summary=st.session_state.sim_summary
             )
+            state_instance.attach_scheduler(sim_results["scheduler"])
 
             st.session_state.ruta_calculada = None
             st.session_state.mensaje_ruta = ""
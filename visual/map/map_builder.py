@@ -138,3 +138,61 @@ def highlight_mst_on_map(folium_map, mst_edges, color="blue", line_weight=3, das
             opacity=0.7,
             dash_array=dash_array
         ).add_to(folium_map)
+
+COVERAGE_COLORS = ["#2ca02c", "#ff7f0e", "#d62728", "#9467bd"]
+
+def _convex_hull(points):
+    """Monotone chain convex hull of (lat, lon) points, in boundary order."""
+    points = sorted(set(points))
+    if len(points) <= 2:
+        return points
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    lower, upper = [], []
+    for p in points:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+    for p in reversed(points):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+    return lower[:-1] + upper[:-1]
+
+def add_coverage_to_map(folium_map, graph, coverage, warehouses=None):
+    """
+    Draws warehouse coverage areas as convex hulls, one layer per number of charges.
+    Args:
+        folium_map: The Folium map object.
+        graph: The Graph object (to get vertex coordinates by element).
+        coverage: {warehouse: {client: charges}} as returned by CoverageAnalyzer.warehouse_coverage.
+        warehouses: Optional list of warehouses to draw (defaults to all).
+    """
+    for warehouse in (warehouses if warehouses is not None else coverage):
+        reached = coverage.get(warehouse, {})
+        origin = graph.get_vertex_by_element(warehouse)
+        if origin is None or not reached:
+            continue
+        max_charges = max(reached.values())
+        # De la mayor a la menor cobertura, para que las áreas internas queden encima.
+        for charges in range(max_charges, 0, -1):
+            points = [(origin.latitude(), origin.longitude())]
+            for client, needed in reached.items():
+                if needed <= charges:
+                    vertex = graph.get_vertex_by_element(client)
+                    points.append((vertex.latitude(), vertex.longitude()))
+            hull = _convex_hull(points)
+            if len(hull) < 3:
+                continue
+            color = COVERAGE_COLORS[(charges - 1) % len(COVERAGE_COLORS)]
+            folium.Polygon(
+                locations=hull,
+                color=color,
+                weight=2,
+                fill=True,
+                fill_color=color,
+                fill_opacity=0.12,
+                tooltip=f"Coverage of {warehouse}: {sum(1 for c in reached.values() if c <= charges)} clients with {charges} charge(s)"
+            ).add_to(folium_map)